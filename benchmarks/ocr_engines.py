@@ -0,0 +1,89 @@
+"""Compare OCR latency of the in-process and subprocess Tesseract engines
+
+Usage:
+    python -m benchmarks.ocr_engines <crops_dir> [--repeat 5]
+
+Runs the alliance-tag OCR settings over every PNG under crops_dir (for
+example tmp/<device>/rejects, which holds the processed.png inputs of
+rejected applicants) with each available engine and reports the latency
+per call and how often the engines return the same text.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+
+from src.core.ocr_engine import PytesseractEngine, TesserocrEngine, tesserocr
+from src.core.text_detection import ALLIANCE_CHARS
+
+SETTINGS = {
+    'lang': 'eng',
+    'psm': 7,
+    'oem': 1,
+    'variables': {
+        'tessedit_char_whitelist': f'{ALLIANCE_CHARS}[]',
+        'tessedit_write_images': '0',
+        'textord_min_linesize': '2',
+        'edges_max_children_per_outline': '40'
+    }
+}
+
+
+def run(crops_dir: Path, repeat: int) -> int:
+    crops = []
+    for path in sorted(crops_dir.rglob("*.png")):
+        image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if image is not None:
+            crops.append(image)
+    if not crops:
+        print(f"No crops found in {crops_dir}")
+        return 1
+
+    engines = [PytesseractEngine(**SETTINGS)]
+    if tesserocr is not None:
+        engines.append(TesserocrEngine(**SETTINGS))
+    else:
+        print("tesserocr is not installed, only timing pytesseract")
+
+    texts: Dict[str, List[str]] = {}
+    print(f"{len(crops)} crops x {repeat} runs")
+    print(f"{'engine':<12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for engine in engines:
+        # Warm up: the first call of an in-process engine loads the model
+        engine.recognize(crops[0])
+
+        timings = []
+        results = []
+        for _ in range(repeat):
+            for crop in crops:
+                start = time.perf_counter()
+                text, _ = engine.recognize(crop)
+                timings.append((time.perf_counter() - start) * 1000)
+                results.append(text)
+        engine.close()
+
+        texts[engine.name] = results
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{engine.name:<12} {statistics.mean(timings):>9.2f} {statistics.median(timings):>9.2f} {p95:>9.2f}")
+
+    if len(texts) == 2:
+        baseline, candidate = texts.values()
+        same = sum(a == b for a, b in zip(baseline, candidate))
+        print(f"Same text on {same}/{len(baseline)} calls")
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare OCR engine latency")
+    parser.add_argument("crops_dir", type=Path, help="Directory searched recursively for PNG crops")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs over all crops per engine")
+    args = parser.parse_args()
+    return run(args.crops_dir, args.repeat)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Compare adaptive alliance tag preprocessing with the fixed 8x path
+
+Usage:
+    python -m benchmarks.ocr_preprocessing <rejects_dir> [--repeat 5] [--scales 8 4] [--min-scale 2 --max-scale 8]
+
+Every original.png under rejects_dir (the raw crops saved for rejected
+applicants in tmp/<device>/rejects) is preprocessed at each fixed scale and
+at the adaptive scale, then read with the alliance OCR engine. The adaptive
+path uses --min-scale/--max-scale rather than config, whose defaults pin it
+to 8x. The report
+lists preprocessing and OCR time per crop, how often each path parses to a
+whitelisted tag and how often it agrees with the fixed 8x path.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+
+from src.core.config import CONFIG
+from src.core.ocr_preprocess import alliance_scale, preprocess_alliance
+from src.core.text_detection import alliance_ocr_engine, parse_alliance_text
+
+
+def run(rejects_dir: Path, repeat: int, scales: List[float], min_scale: float, max_scale: float) -> int:
+    crops = []
+    for path in sorted(rejects_dir.rglob("original.png")):
+        image = cv2.imread(str(path))
+        if image is not None:
+            crops.append(image)
+    if not crops:
+        print(f"No original.png crops found in {rejects_dir}")
+        return 1
+
+    whitelist = set(CONFIG.get('control_list', {}).get('whitelist', {}).get('alliance', []))
+    engine = alliance_ocr_engine()
+    adaptive = [alliance_scale(crop.shape[0], min_scale, max_scale) for crop in crops]
+    print(f"{len(crops)} crops x {repeat} runs, adaptive scale {min(adaptive):.2f}-{max(adaptive):.2f}")
+    print(f"{'path':<10} {'prep ms':>9} {'ocr ms':>9} {'total ms':>9} {'whitelisted':>12} {'agree':>7}")
+
+    baseline: Optional[List[str]] = None
+    for scale in list(scales) + [None]:
+        label = "adaptive" if scale is None else f"{scale:g}x"
+        prep_times, ocr_times, tags = [], [], []
+        for crop, adaptive_scale in zip(crops, adaptive):
+            crop_scale = adaptive_scale if scale is None else scale
+            for _ in range(repeat):
+                start = time.perf_counter()
+                binary = preprocess_alliance(crop, crop_scale)
+                prep_times.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            text, _ = engine.recognize(binary)
+            ocr_times.append((time.perf_counter() - start) * 1000)
+            tags.append(parse_alliance_text(text))
+
+        if baseline is None:
+            baseline = tags
+        prep_ms = statistics.mean(prep_times)
+        ocr_ms = statistics.mean(ocr_times)
+        whitelisted = sum(tag in whitelist for tag in tags)
+        agree = sum(a == b for a, b in zip(baseline, tags))
+        print(
+            f"{label:<10} {prep_ms:>9.3f} {ocr_ms:>9.2f} {prep_ms + ocr_ms:>9.2f} "
+            f"{whitelisted:>6}/{len(tags):<5} {agree * 100 / len(tags):>6.1f}%"
+        )
+
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark alliance tag OCR preprocessing")
+    parser.add_argument("rejects_dir", type=Path, help="Directory searched recursively for original.png crops")
+    parser.add_argument("--repeat", type=int, default=5, help="Preprocessing runs per crop")
+    parser.add_argument("--scales", nargs="+", type=float, default=[8.0], help="Fixed scales to compare; the first is the baseline")
+    parser.add_argument("--min-scale", type=float, default=2.0, help="Lower limit of the adaptive scale")
+    parser.add_argument("--max-scale", type=float, default=8.0, help="Upper limit of the adaptive scale")
+    args = parser.parse_args()
+    return run(args.rejects_dir, args.repeat, args.scales, args.min_scale, args.max_scale)
+
+if __name__ == "__main__":
+    sys.exit(main())
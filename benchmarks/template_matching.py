@@ -0,0 +1,104 @@
+"""Benchmark template matching modes on recorded frames
+
+Usage:
+    python -m benchmarks.template_matching <frames_dir> [--templates home start ...] [--levels 1 2]
+
+Every PNG in frames_dir is matched against each template in the default
+full-resolution colour mode and in the grayscale and pyramid modes. For each
+mode the average time, the speedup over the default and how often it agrees
+with the default (same found/not found and the same centre) are reported.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+
+from src.core.frame import Frame
+from src.core.image_processing import _coarse_to_fine
+from src.core.template_store import TEMPLATES, TemplateEntry
+
+
+def _with_settings(entry: TemplateEntry, color: bool, levels: int) -> TemplateEntry:
+    """Copy of a template entry with another matching mode"""
+    config = dict(entry.config, color=color, pyramid_levels=levels)
+    return TemplateEntry(entry.name, entry.image.copy(), config)
+
+def _center(entry: TemplateEntry, max_val: float, max_loc: Tuple[int, int]):
+    if max_val < entry.threshold:
+        return None
+    return (max_loc[0] + entry.width // 2, max_loc[1] + entry.height // 2)
+
+def run(frames_dir: Path, template_names: List[str], levels: List[int]) -> int:
+    frames = []
+    for path in sorted(frames_dir.glob("*.png")):
+        image = cv2.imread(str(path))
+        if image is not None:
+            frames.append(image)
+    if not frames:
+        print(f"No frames found in {frames_dir}")
+        return 1
+
+    TEMPLATES.load()
+    modes = [("gray", False, 0)]
+    modes += [(f"pyramid{level}", True, level) for level in levels]
+    modes += [(f"pyramid{level}-gray", False, level) for level in levels]
+
+    print(f"{len(frames)} frames, {len(template_names)} templates")
+    print(f"{'template':<32} {'mode':<16} {'ms':>8} {'speedup':>8} {'agree':>7}")
+
+    for name in template_names:
+        entry = TEMPLATES.get(name)
+        if entry is None:
+            continue
+
+        baseline: List = []
+        base_time = 0.0
+        base_entry = _with_settings(entry, True, 0)
+        for image in frames:
+            # A new Frame per call so no mode profits from another's cached conversions
+            frame = Frame("bench", image, 0)
+            start = time.perf_counter()
+            result = _coarse_to_fine(frame, base_entry, entry.threshold)
+            base_time += time.perf_counter() - start
+            baseline.append(_center(entry, *result))
+
+        base_ms = base_time * 1000 / len(frames)
+        print(f"{name:<32} {'color':<16} {base_ms:>8.2f} {1.0:>8.2f} {100.0:>6.1f}%")
+
+        for label, color, level in modes:
+            mode_entry = _with_settings(entry, color, level)
+            elapsed = 0.0
+            agree = 0
+            for image, expected in zip(frames, baseline):
+                frame = Frame("bench", image, 0)
+                start = time.perf_counter()
+                result = _coarse_to_fine(frame, mode_entry, entry.threshold)
+                elapsed += time.perf_counter() - start
+                agree += _center(entry, *result) == expected
+
+            mode_ms = elapsed * 1000 / len(frames)
+            speedup = base_ms / mode_ms if mode_ms else 0.0
+            print(f"{'':<32} {label:<16} {mode_ms:>8.2f} {speedup:>8.2f} {agree * 100 / len(frames):>6.1f}%")
+
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark template matching modes")
+    parser.add_argument("frames_dir", type=Path, help="Directory of recorded PNG screenshots")
+    parser.add_argument("--templates", nargs="+", help="Templates to test (default: all)")
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 2], help="Pyramid levels to test")
+    args = parser.parse_args()
+
+    template_names = args.templates
+    if not template_names:
+        from src.core.config import CONFIG
+        template_names = list(CONFIG['templates'])
+
+    return run(args.frames_dir, template_names, args.levels)
+
+if __name__ == "__main__":
+    sys.exit(main())
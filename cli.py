@@ -5,11 +5,19 @@ import argparse
 import traceback
 import json
 import signal
-from src.core.logging import setup_logging, app_logger
-from src.core.adb import get_connected_device
+import threading
+import asyncio
+from src.core.logging import setup_logging, app_logger, include_thread_names
+from src.core.adb import get_connected_device, get_device_list
+from src.core.device_properties import load_device_properties
+from src.core.template_store import TEMPLATES
+from src.core.frame import get_current_frame
+from src.core.screen_classifier import SCREEN_INDEX
 from src.automation.automation import MainAutomation
+from src.automation.async_automation import run_devices_async
 from src.core.cleanup import CleanupManager
 from src.automation.handler_factory import HandlerFactory
+from src.automation.routines.routineBase import run_routine_sync
 
 
 def get_routine_config():
@@ -27,10 +35,13 @@ def get_routine_config():
         return {}
 
 parser = argparse.ArgumentParser(description='Game automation CLI')
-parser.add_argument('command', choices=['auto', 'routine', 'reset'], help='Automation command to run', default='auto')
+parser.add_argument('command', choices=['auto', 'routine', 'reset', 'screen'], help='Automation command to run', default='auto')
 parser.add_argument('routine_name', nargs='?', choices=list(get_routine_config().keys()), help='Name of routine to run')
 parser.add_argument('--debug', action='store_true', help='Enable debug logging')
 parser.add_argument('--no-cleanup', action='store_true', help='Skip cleanup on exit')
+parser.add_argument('--async', dest='use_async', action='store_true', help='Drive auto from one asyncio event loop')
+parser.add_argument('--devices', help='Run auto on several devices: "all" or a comma separated list of device IDs')
+parser.add_argument('--label', help='With screen: save the current screen as a reference screen for this label')
 
 cleanup_manager = CleanupManager()
 
@@ -65,16 +76,115 @@ def run_single_routine(device_id: str, routine_name: str) -> bool:
         
         if handler:
             app_logger.info(f"Running {routine_name} routine")
-            return handler.start()
+            return run_routine_sync(handler)
         return False
         
     except Exception as e:
         app_logger.error(f"Error running routine {routine_name}: {e}")
         return False
 
+def prepare_device(device_id: str) -> None:
+    """Probe device properties and rescale templates for its screen"""
+    properties = load_device_properties(device_id)
+    if properties is not None:
+        TEMPLATES.prepare_device(device_id, properties.screen_size)
+
+def run_screen_command(device_id: str, label: str = None) -> bool:
+    """Classify the current screen, or save it as a reference screen for label"""
+    frame = get_current_frame(device_id, fresh=True)
+    if frame is None:
+        app_logger.error("Failed to capture screen")
+        return False
+
+    if label:
+        path = SCREEN_INDEX.save_reference(label, frame.image)
+        if path is None:
+            return False
+        app_logger.info(f"Saved reference screen for {label} to {path}")
+        return True
+
+    match = SCREEN_INDEX.classify(frame.image)
+    if match is None:
+        app_logger.info(f"No reference screens found in {SCREEN_INDEX.screens_dir}")
+    else:
+        app_logger.info(f"Current screen: {match.label} (confidence {match.confidence:.3f}, margin {match.margin:.3f})")
+    return True
+
+def resolve_devices(devices_arg: str) -> list[str]:
+    """Resolve the --devices argument to connected device IDs"""
+    connected = get_device_list()
+    if devices_arg == 'all':
+        return connected
+
+    requested = [device.strip() for device in devices_arg.split(',') if device.strip()]
+    for device_id in requested:
+        if device_id not in connected:
+            app_logger.warning(f"Device {device_id} is not connected, skipping it")
+    return [device_id for device_id in requested if device_id in connected]
+
+def run_multi_device(device_ids: list[str], debug: bool) -> bool:
+    """Run one automation per device, each on its own worker thread
+
+    Templates, config and OCR resources are module level and shared by all
+    workers; state, temp files and handlers belong to each MainAutomation.
+    """
+    include_thread_names()
+    results = {}
+
+    def worker(device_id: str):
+        automation = MainAutomation(device_id, debug=debug, per_device_state=True)
+        results[device_id] = automation.run()
+
+    threads = []
+    for device_id in device_ids:
+        prepare_device(device_id)
+        thread = threading.Thread(target=worker, args=(device_id,), name=device_id, daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    # Join with a timeout so the main thread keeps handling signals
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+
+    for device_id in device_ids:
+        if not results.get(device_id):
+            app_logger.error(f"Automation for {device_id} stopped with errors")
+    return all(results.get(device_id) for device_id in device_ids)
+
 def main():
     args = parser.parse_args()
     setup_logging()
+    TEMPLATES.load()
+    SCREEN_INDEX.load()
+
+    if args.devices:
+        if args.command != 'auto':
+            app_logger.error("--devices is only supported with the auto command")
+            return 1
+
+        device_ids = resolve_devices(args.devices)
+        if not device_ids:
+            app_logger.error("No matching devices found")
+            sys.exit(1)
+
+        app_logger.info(f"Running automation on {len(device_ids)} devices: {', '.join(device_ids)}")
+        cleanup_manager.set_devices(device_ids)
+        cleanup_manager.set_skip_cleanup(args.no_cleanup)
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+
+        try:
+            if args.use_async:
+                include_thread_names()
+                for device_id in device_ids:
+                    prepare_device(device_id)
+                success = asyncio.run(run_devices_async(device_ids, debug=args.debug))
+            else:
+                success = run_multi_device(device_ids, args.debug)
+            return 0 if success else 1
+        finally:
+            cleanup()
     
     device_id = get_connected_device()
     if not device_id:
@@ -85,6 +195,7 @@ def main():
         sys.exit(1)
     
     app_logger.info(f"Connected to device: {device_id}")
+    prepare_device(device_id)
     
     cleanup_manager.set_device(device_id)
     cleanup_manager.set_skip_cleanup(args.no_cleanup)
@@ -101,10 +212,18 @@ def main():
             return 0 if success else 1
             
         elif args.command == 'auto':
+            if args.use_async:
+                success = asyncio.run(run_devices_async([device_id], debug=args.debug, per_device_state=False))
+                return 0 if success else 1
+
             automation = MainAutomation(device_id, debug=args.debug)
             success = automation.run()
             return 0 if success else 1
             
+        elif args.command == 'screen':
+            success = run_screen_command(device_id, args.label)
+            return 0 if success else 1
+            
         elif args.command == 'reset':
             automation = MainAutomation(device_id, debug=args.debug)
             success = automation.force_reset()
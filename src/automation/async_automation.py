@@ -0,0 +1,115 @@
+import asyncio
+import time
+from typing import List
+
+from src.automation.automation import MainAutomation
+from src.automation.routines.routineBase import AsyncRoutineBase, SyncRoutineAdapter
+from src.core.async_adb import run_on_device, shutdown_device_executor
+from src.core.logging import app_logger
+
+class AsyncAutomation(MainAutomation):
+    """Automation loop driven by an asyncio event loop
+
+    Reuses MainAutomation's task selection, backoff and bookkeeping and only
+    replaces the steps that wait: backoff sleeps are awaited, blocking game
+    checks run on the device's I/O thread and routines run as awaitables
+    (synchronous ones through SyncRoutineAdapter), so several devices can
+    share one event loop.
+    """
+
+    async def run(self) -> bool:
+        """Main run sequence with error handling"""
+        try:
+            app_logger.info(f"Starting {self.__class__.__name__}")
+            if not await self.start():
+                app_logger.error("Failed to start automation")
+                return False
+            return True
+        except asyncio.CancelledError:
+            app_logger.info("Automation cancelled")
+            return False
+        except Exception as e:
+            app_logger.error(f"Error in automation: {e}")
+            return False
+        finally:
+            await run_on_device(self.device_id, self.cleanup)
+            shutdown_device_executor(self.device_id)
+
+    def get_async_handler(self, handler_path: str, config=None):
+        """Get a handler that can be awaited, wrapping synchronous routines"""
+        handler = self.get_handler(handler_path, config)
+        if handler is None or isinstance(handler, AsyncRoutineBase):
+            return handler
+        return SyncRoutineAdapter(handler)
+
+    def get_task_handler(self, task_data):
+        return self.get_async_handler(task_data["handler"], task_data)
+
+    async def handle_navigation_failure(self, consecutive_failures: int) -> None:
+        """Handle navigation failures with exponential backoff"""
+        await asyncio.sleep(self.navigation_backoff(consecutive_failures))
+
+        # Force game restart using internal reset
+        app_logger.info("Forcing game restart...")
+        if not await run_on_device(self.device_id, self.reset_game):
+            app_logger.error("Failed to reset game")
+
+    async def start(self) -> bool:
+        """Main automation loop with improved error handling"""
+        consecutive_failures = 0
+
+        while True:
+            try:
+                if not await self._run_automation_cycle():
+                    consecutive_failures += 1
+                    await self.handle_navigation_failure(consecutive_failures)
+                    continue
+
+                consecutive_failures = 0
+                await asyncio.sleep(1)  # Prevent CPU thrashing
+
+            except Exception as e:
+                if self.stop_on_error(e, consecutive_failures):
+                    return False
+                consecutive_failures += 1
+                await asyncio.sleep(5)  # Back off on unexpected errors
+
+    async def _run_automation_cycle(self) -> bool:
+        """Single cycle of the automation loop"""
+        self.update_timers()
+
+        # Ensure game is running
+        if not await run_on_device(self.device_id, self.verify_game_running):
+            return False
+
+        # Run scheduled tasks
+        await self.run_scheduled_tasks()
+        return True
+
+    async def run_task(self, task_name: str, handler) -> bool:
+        """Run a task, retrying it once after a game reset if it fails"""
+        success = await handler.start()
+
+        if not success:
+            app_logger.error(f"Task {task_name} failed, attempting game reset")
+            if await run_on_device(self.device_id, self.reset_game):
+                # Retry the task after reset
+                success = await handler.start()
+        return success
+
+    async def run_scheduled_tasks(self):
+        """Run tasks in order of priority"""
+        current_time = time.time()
+        for task_name, task_type, task_data, handler in self.due_tasks():
+            app_logger.info(f"Running {task_name} ({task_type})")
+            success = await self.run_task(task_name, handler)
+            self.finish_task(task_name, task_type, task_data, handler, success, current_time)
+
+async def run_devices_async(device_ids: List[str], debug: bool = False, per_device_state: bool = True) -> bool:
+    """Drive every device from one event loop"""
+    automations = [
+        AsyncAutomation(device_id, debug=debug, per_device_state=per_device_state)
+        for device_id in device_ids
+    ]
+    results = await asyncio.gather(*(automation.run() for automation in automations))
+    return all(results)
@@ -2,33 +2,38 @@ from abc import ABC, abstractmethod
 import time
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
-from src.automation.routines.routineBase import RoutineBase
+from typing import Dict, Any, Iterator, Optional, Tuple
+from src.automation.routines.routineBase import RoutineBase, run_routine_sync
 from src.core.config import CONFIG
 from src.core.logging import app_logger, setup_logging
 from src.core.scheduling import update_interval_check, update_schedule
-from src.core.adb import get_current_running_app
+from src.core.adb import get_current_running_app, close_shell_session
 from src.core.device import cleanup_temp_files, cleanup_device_screenshots
-from src.automation.state import AutomationState
+from src.core.frame_stream import stop_frame_stream
+from src.automation.state import AutomationState, device_state_file
 from src.automation.handler_factory import HandlerFactory
 from src.game.controls import launch_game, navigate_home
 import os
 import asyncio
 
 class MainAutomation:
-    def __init__(self, device_id: str, debug: bool = False):
+    def __init__(self, device_id: str, debug: bool = False, per_device_state: bool = False):
         """Initialize automation
         
         Args:
             device_id: Device identifier
             debug: Enable debug logging if True
+            per_device_state: Keep state in a file of this device, for multi-device runs
         """
         setup_logging(debug=debug)  # Set logging level based on debug flag
         self.device_id = device_id
         app_logger.info(f"Initializing automation for device: {device_id}")
         if debug:
             app_logger.info("Debug mode enabled")
-        self.state = AutomationState()
+        if per_device_state:
+            self.state = AutomationState(device_state_file(device_id))
+        else:
+            self.state = AutomationState()
         config = self.load_automation_config()
         self.time_checks = self.initialize_time_checks(config.get('time_checks', {}))
         self.scheduled_events = self.initialize_scheduled_events(config.get('scheduled_events', {}))
@@ -40,8 +45,10 @@ class MainAutomation:
         """Cleanup resources"""
         try:
             app_logger.info("Cleaning up resources...")
-            cleanup_temp_files()
+            cleanup_temp_files(self.device_id)
             cleanup_device_screenshots(self.device_id)
+            stop_frame_stream(self.device_id)
+            close_shell_session(self.device_id)
         except Exception as e:
             app_logger.error(f"Error during cleanup: {e}")
             
@@ -123,8 +130,8 @@ class MainAutomation:
                 
         return self.handlers.get(handler_path)
 
-    def handle_navigation_failure(self, consecutive_failures: int) -> None:
-        """Handle navigation failures with exponential backoff"""
+    def navigation_backoff(self, consecutive_failures: int) -> int:
+        """Seconds to wait after a navigation failure, raising when retries run out"""
         MAX_RETRIES = 5
         BASE_SLEEP = CONFIG['timings']['launch_wait']
         
@@ -134,13 +141,25 @@ class MainAutomation:
         
         sleep_time = int(min(BASE_SLEEP * (2 ** consecutive_failures), 3600))  # Cap at 1 hour
         app_logger.warning(f"Navigation failure #{consecutive_failures}, sleeping for {sleep_time} seconds")
-        time.sleep(sleep_time)
+        return sleep_time
+
+    def handle_navigation_failure(self, consecutive_failures: int) -> None:
+        """Handle navigation failures with exponential backoff"""
+        time.sleep(self.navigation_backoff(consecutive_failures))
         
         # Force game restart using internal reset
         app_logger.info("Forcing game restart...")
         if not self.reset_game():
             app_logger.error("Failed to reset game")
 
+    def stop_on_error(self, error: Exception, consecutive_failures: int) -> bool:
+        """Log an error from an automation cycle, True when the loop should stop"""
+        if isinstance(error, RuntimeError):
+            app_logger.error(f"Fatal runtime error: {error}")
+            return True
+        app_logger.error(f"Unexpected error: {error}")
+        return consecutive_failures >= 5
+
     def start(self) -> bool:
         """Main automation loop with improved error handling"""
         consecutive_failures = 0
@@ -159,23 +178,21 @@ class MainAutomation:
                 app_logger.info("Received keyboard interrupt, shutting down gracefully")
                 return True
                 
-            except RuntimeError as e:
-                app_logger.error(f"Fatal runtime error: {e}")
-                return False
-                
             except Exception as e:
-                app_logger.error(f"Unexpected error: {e}")
-                if consecutive_failures >= 5:
+                if self.stop_on_error(e, consecutive_failures):
                     return False
                 consecutive_failures += 1
                 time.sleep(5)  # Back off on unexpected errors
 
-    def _run_automation_cycle(self) -> bool:
-        """Single cycle of the automation loop"""
-        # Update timers
+    def update_timers(self) -> None:
+        """Mark the time checks and scheduled events that are due"""
         self.time_checks = update_interval_check(self.time_checks, time.time())
         self.scheduled_events = update_schedule(self.scheduled_events, time.time())
 
+    def _run_automation_cycle(self) -> bool:
+        """Single cycle of the automation loop"""
+        self.update_timers()
+
         # Ensure game is running
         if not self.verify_game_running():
             return False
@@ -216,48 +233,47 @@ class MainAutomation:
         # Sort by overdue time (most overdue first)
         return sorted(tasks, key=lambda x: x[1], reverse=True)
 
+    def due_tasks(self) -> Iterator[Tuple[str, str, Dict[str, Any], Any]]:
+        """Yield (name, type, data, handler) for each task that should run, most overdue first"""
+        for task_name, _, task_type in self.get_ordered_tasks():
+            task_data = self.time_checks[task_name] if task_type == 'time_checks' else self.scheduled_events[task_name]
+            handler = self.get_task_handler(task_data)
+            if handler and handler.should_run():
+                yield task_name, task_type, task_data, handler
+
+    def get_task_handler(self, task_data: Dict[str, Any]):
+        """Handler of a time check or scheduled event"""
+        return self.get_handler(task_data["handler"], task_data)
+
+    def finish_task(self, task_name: str, task_type: str, task_data: Dict[str, Any], handler, success: bool, run_time: float) -> None:
+        """Record the outcome of a task run"""
+        task_data["needs_check"] = False
+        if not success:
+            return
+        
+        handler.after_run()
+        task_data["last_run"] = run_time
+        self.state.set_last_run(task_name, run_time, task_type)
+        self.state.save()
+
+    def run_task(self, task_name: str, handler) -> bool:
+        """Run a task, retrying it once after a game reset if it fails"""
+        success = run_routine_sync(handler)
+        
+        if not success:
+            app_logger.error(f"Task {task_name} failed, attempting game reset")
+            if self.reset_game():
+                # Retry the task after reset
+                success = run_routine_sync(handler)
+        return success
+
     def run_scheduled_tasks(self):
         """Run tasks in order of priority"""
         current_time = time.time()
-        ordered_tasks = self.get_ordered_tasks()
-        
-        for task_name, _, task_type in ordered_tasks:
-            if task_type == 'time_checks':
-                check_data = self.time_checks[task_name]
-                handler = self.get_handler(check_data["handler"], check_data)
-            else:  # scheduled_events
-                event_data = self.scheduled_events[task_name]
-                handler = self.get_handler(event_data["handler"], event_data)
-                
-            if not handler:
-                continue
-                
-            if handler.should_run():
-                app_logger.info(f"Running {task_name} ({task_type})")
-                success = handler.start()
-                
-                if not success:
-                    app_logger.error(f"Task {task_name} failed, attempting game reset")
-                    if self.reset_game():
-                        # Retry the task after reset
-                        success = handler.start()
-                
-                if success:
-                    handler.after_run()
-                    if task_type == 'time_checks':
-                        check_data["last_run"] = current_time
-                        check_data["needs_check"] = False
-                    else:
-                        event_data["last_run"] = current_time
-                        event_data["needs_check"] = False
-                        
-                    self.state.set_last_run(task_name, current_time, task_type)
-                    self.state.save()
-                else:
-                    if task_type == 'time_checks':
-                        check_data["needs_check"] = False
-                    else:
-                        event_data["needs_check"] = False
+        for task_name, task_type, task_data, handler in self.due_tasks():
+            app_logger.info(f"Running {task_name} ({task_type})")
+            success = self.run_task(task_name, handler)
+            self.finish_task(task_name, task_type, task_data, handler, success, current_time)
 
     def verify_game_running(self) -> bool:
         """Verify game is running and at home screen, with retry logic"""
@@ -1,6 +1,6 @@
 from typing import Type, Dict, Any, Optional
 import importlib
-from src.automation.routines.routineBase import TimeCheckRoutine, RoutineBase
+from src.automation.routines.routineBase import TimeCheckRoutine, RoutineBase, AsyncTimeCheckRoutine
 from src.core.logging import app_logger
 
 class HandlerFactory:
@@ -37,7 +37,7 @@ class HandlerFactory:
             handler_class: Type[RoutineBase] = getattr(module, class_name)
             
             # Create handler instance based on type
-            if issubclass(handler_class, TimeCheckRoutine):
+            if issubclass(handler_class, (TimeCheckRoutine, AsyncTimeCheckRoutine)):
                 # Time check routines need interval
                 interval = config.get("time_to_check") or config.get("interval")
                 if not interval:
@@ -1,4 +1,11 @@
-from .routineBase import TimeCheckRoutine, DailyRoutine, RoutineBase
+from .routineBase import (
+    TimeCheckRoutine,
+    DailyRoutine,
+    RoutineBase,
+    AsyncRoutineBase,
+    AsyncTimeCheckRoutine,
+    SyncRoutineAdapter
+)
 from .cleanup import CleanupRoutine
 from .help import HelpRoutine
 from .secretary import SecretaryRoutine
@@ -1,19 +1,19 @@
-from src.automation.routines import TimeCheckRoutine
-from src.core.image_processing import find_and_tap_template
+from src.automation.routines import AsyncTimeCheckRoutine
+from src.core.image_processing import find_and_tap_template_async
 
-class AllianceDonateRoutine(TimeCheckRoutine):
+class AllianceDonateRoutine(AsyncTimeCheckRoutine):
     force_home: bool = True
 
-    def _execute(self) -> bool:
+    async def _execute(self) -> bool:
         """Execute alliance donation sequence"""
-        return self.execute_with_error_handling(self.navigate_and_donate)
+        return await self.execute_with_error_handling(self.navigate_and_donate)
 
-    def navigate_and_donate(self) -> bool:
+    async def navigate_and_donate(self) -> bool:
         self.automation.game_state["is_home"] = False
 
         """Navigate to the alliance donate menu and donate"""
         # Open alliance menu
-        if not find_and_tap_template(
+        if not await find_and_tap_template_async(
             self.device_id,
             "alliance",
             error_msg="Could not find alliance icon"
@@ -21,7 +21,7 @@ class AllianceDonateRoutine(TimeCheckRoutine):
             return True
             
         # Click alliance tech icon
-        if not find_and_tap_template(
+        if not await find_and_tap_template_async(
             self.device_id,
             "alliance_tech_icon",
             error_msg="Could not find alliance tech icon"
@@ -29,15 +29,15 @@ class AllianceDonateRoutine(TimeCheckRoutine):
             return True
             
         # Click recommended flag
-        if not find_and_tap_template(
+        if not await find_and_tap_template_async(
             self.device_id,
             "recommended_flag",
             error_msg="No recommended tech found"
         ):
             return True
             
-        # Donate with long press
-        if not find_and_tap_template(
+        # Donate with long press, awaited off the event loop
+        if not await find_and_tap_template_async(
             self.device_id,
             "donate_button",
             error_msg="No donate button found",
@@ -46,4 +46,4 @@ class AllianceDonateRoutine(TimeCheckRoutine):
         ):
             return True
             
-        return True
\ No newline at end of file
+        return True
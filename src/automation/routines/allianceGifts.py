@@ -38,9 +38,9 @@ class AllianceGiftsRoutine(TimeCheckRoutine):
             error_msg="No claim all button found"
         ):
             # Clear claim message
-            human_delay(CONFIG['timings']['menu_animation'])
+            human_delay(CONFIG['timings']['menu_animation'], self.device_id)
             press_back(self.device_id)
-            human_delay(CONFIG['timings']['menu_animation'])
+            human_delay(CONFIG['timings']['menu_animation'], self.device_id)
         
         # Donate with long press
         if not find_and_tap_template(
@@ -1,13 +1,14 @@
-from src.automation.routines import TimeCheckRoutine
+from src.automation.routines import AsyncTimeCheckRoutine
+from src.core.async_adb import run_on_device
 from src.core.logging import app_logger
 from src.core.config import CONFIG
-from src.core.image_processing import find_and_tap_template
+from src.core.image_processing import find_and_tap_template_async
+from src.core.frame_stream import start_frame_stream
 from src.core.discord_bot import DiscordNotifier
 from discord import Embed
-import asyncio
 import os
 
-class CheckForDigsRoutine(TimeCheckRoutine):
+class CheckForDigsRoutine(AsyncTimeCheckRoutine):
     
     def __init__(self, device_id: str, interval: int, last_run: float = None, automation=None):
         super().__init__(device_id, interval, last_run, automation)
@@ -16,17 +17,20 @@ class CheckForDigsRoutine(TimeCheckRoutine):
         if not self.is_enabled:
             app_logger.warning("Dig notification routine disabled: DISCORD_WEBHOOK_URL not found in environment variables")
         
-    def _execute(self) -> bool:
+    async def _execute(self) -> bool:
         """Execute dig notification check sequence"""
         if not self.is_enabled:
             return True
-        return self.execute_with_error_handling(self._execute_internal)
+        return await self.execute_with_error_handling(self._execute_internal)
         
-    def _execute_internal(self) -> bool:
+    async def _execute_internal(self) -> bool:
         """Check for dig icon and handle if found"""
         try:
+            # Polled every few seconds, so read frames from the stream when enabled
+            await run_on_device(self.device_id, start_frame_stream, self.device_id)
+
             # Open chat by clicking the dig icon
-            if not find_and_tap_template(
+            if not await find_and_tap_template_async(
                 self.device_id,
                 "dig",
                 error_msg="Could not find dig icon",
@@ -37,7 +41,7 @@ class CheckForDigsRoutine(TimeCheckRoutine):
             self.automation.game_state["is_home"] = False;
                 
             # Send Discord notification
-            asyncio.run(self.send_notification())
+            await self.send_notification()
             return True
             
         except Exception as e:
@@ -7,6 +7,6 @@ class CleanupRoutine(TimeCheckRoutine):
         return self.execute_with_error_handling(self._execute_internal)
         
     def _execute_internal(self) -> bool:
-        cleanup_temp_files()
+        cleanup_temp_files(self.device_id)
         cleanup_device_screenshots(self.device_id)
         return True 
\ No newline at end of file
@@ -1,5 +1,6 @@
 from src.automation.routines.routineBase import TimeCheckRoutine
 from src.core.image_processing import find_and_tap_template
+from src.core.frame_stream import start_frame_stream
 
 class HelpRoutine(TimeCheckRoutine):
     def _execute(self) -> bool:
@@ -7,6 +8,8 @@ class HelpRoutine(TimeCheckRoutine):
         return self.execute_with_error_handling(self._execute_internal)
         
     def _execute_internal(self) -> bool:
+        # Polled every few seconds, so read frames from the stream when enabled
+        start_frame_stream(self.device_id)
         if not find_and_tap_template(
             self.device_id,
             "help",
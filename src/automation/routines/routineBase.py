@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+import asyncio
 import time
 from src.core.logging import app_logger
+from src.core.adb import flush_input
+from src.core.async_adb import run_on_device
+from src.core import async_adb
 from typing import Optional, Dict, Any
 
 from src.game.controls import navigate_home
@@ -26,10 +30,18 @@ class RoutineBase(ABC):
                     app_logger.error("Failed to navigate home after clearing dig")
                     return False
             self.automation.game_state["is_home"] = True
-            return self._execute()
+            result = self._execute()
+            # Routine boundary is a barrier for queued inputs
+            if not flush_input(self.device_id):
+                app_logger.error("Queued inputs failed on the device")
+                return False
+            return result
         except Exception as e:
             app_logger.error(f"Error in routine execution: {e}")
             return False
+        finally:
+            # Send whatever an early return or error left queued
+            flush_input(self.device_id)
             
     def execute_with_error_handling(self, func, *args, **kwargs) -> bool:
         """Execute a function with standard error handling"""
@@ -92,4 +104,107 @@ class DailyRoutine(RoutineBase):
         return time_diff <= 5
     
     def after_run(self) -> None:
-        self.last_run = time.time() 
\ No newline at end of file
+        self.last_run = time.time() 
+
+class AsyncRoutineBase(ABC):
+    """Base class for routines whose steps are awaitables
+
+    Delays and device waits yield to the event loop, so one loop can drive
+    many devices and overlap one device's waits with another's work.
+    """
+
+    def __init__(self, device_id: str, automation=None) -> None:
+        self.device_id = device_id
+        self.automation = automation
+
+    @abstractmethod
+    async def _execute(self) -> bool:
+        """Execute the routine's main logic"""
+        pass
+
+    async def start(self) -> bool:
+        """Start the automation sequence with home navigation"""
+        try:
+            if not self.automation.game_state["is_home"]:
+                if not await run_on_device(self.device_id, navigate_home, self.device_id, True):
+                    app_logger.error("Failed to navigate home after clearing dig")
+                    return False
+            self.automation.game_state["is_home"] = True
+            result = await self._execute()
+            # Routine boundary is a barrier for queued inputs
+            if not await async_adb.flush_input(self.device_id):
+                app_logger.error("Queued inputs failed on the device")
+                return False
+            return result
+        except Exception as e:
+            app_logger.error(f"Error in routine execution: {e}")
+            return False
+        finally:
+            # Send whatever an early return or error left queued
+            await async_adb.flush_input(self.device_id)
+
+    async def execute_with_error_handling(self, func, *args, **kwargs) -> bool:
+        """Await a coroutine function with standard error handling"""
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            app_logger.error(f"Error in {func.__name__}: {e}")
+            return False
+
+    @abstractmethod
+    def should_run(self) -> bool:
+        """Check if the routine should run now"""
+        pass
+
+    @abstractmethod
+    def after_run(self) -> None:
+        """Actions to perform after successful run"""
+        pass
+
+class AsyncTimeCheckRoutine(AsyncRoutineBase):
+    """Base class for awaitable time-based check routines"""
+
+    def __init__(self, device_id: str, interval: int, last_run: float = None, automation=None) -> None:
+        super().__init__(device_id, automation)
+        self.interval = interval
+        self._last_run = last_run or 0
+
+    def should_run(self) -> bool:
+        if self._last_run is None:
+            return True
+        return time.time() - self._last_run >= self.interval
+
+    def after_run(self) -> None:
+        self._last_run = time.time()
+
+class SyncRoutineAdapter:
+    """Run a synchronous routine from the event loop
+
+    The routine's blocking start() runs on the device's I/O thread, so it
+    keeps working unchanged while other devices make progress.
+    """
+
+    def __init__(self, routine: RoutineBase) -> None:
+        self.routine = routine
+        self.device_id = routine.device_id
+
+    async def start(self) -> bool:
+        return await run_on_device(self.device_id, self.routine.start)
+
+    def should_run(self) -> bool:
+        return self.routine.should_run()
+
+    def after_run(self) -> None:
+        self.routine.after_run()
+
+def run_routine_sync(routine) -> bool:
+    """Start a synchronous or asynchronous routine from blocking code
+
+    An async routine gets its own event loop through asyncio.run for this one
+    call, and its device I/O still runs on the device's worker thread via
+    run_on_device. The blocking automation therefore stays one thread per
+    device; only AsyncAutomation shares a loop across devices.
+    """
+    if isinstance(routine, AsyncRoutineBase):
+        return asyncio.run(routine.start())
+    return routine.start()
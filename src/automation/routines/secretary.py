@@ -3,14 +3,17 @@ import cv2
 from src.automation.routines.routineBase import TimeCheckRoutine
 from src.core.logging import app_logger
 from src.core.config import CONFIG
-from src.core.image_processing import find_template, find_all_templates, wait_for_image, find_and_tap_template
-from src.core.device import take_screenshot
+from src.core.image_processing import find_template, find_all_templates, find_templates, wait_for_image, find_and_tap_template
+from src.core.frame import get_current_frame
+from src.core.screen_classifier import screen_is
 from src.core.adb import get_screen_size, press_back
 from src.game.controls import human_delay, humanized_tap, handle_swipes
 from src.core.text_detection import (
     extract_text_from_region, 
     get_text_regions, 
     log_rejected_alliance,
+    read_alliance_rows,
+    find_alliance_row,
     CONTROL_LIST
 )
 from src.core.audio import play_beep
@@ -106,7 +109,7 @@ class SecretaryRoutine(TimeCheckRoutine):
             if notification:
                 humanized_tap(device_id, notification[0], notification[1])
                 press_back(device_id)
-                human_delay(CONFIG['timings']['menu_animation'])
+                human_delay(CONFIG['timings']['menu_animation'], device_id)
 
             return True
         except Exception as e:
@@ -122,7 +125,7 @@ class SecretaryRoutine(TimeCheckRoutine):
                     return True
                     
                 press_back(self.device_id)
-                human_delay(CONFIG['timings']['menu_animation'])
+                human_delay(CONFIG['timings']['menu_animation'], self.device_id)
                 
             app_logger.error("Failed to return to secretary menu")
             return False
@@ -133,6 +136,8 @@ class SecretaryRoutine(TimeCheckRoutine):
     
     def verify_secretary_menu(self) -> bool:
         """Verify we're in the secretary menu"""
+        if screen_is(self.device_id, "secretary_list"):
+            return True
         return wait_for_image(
             self.device_id,
             "president",
@@ -151,7 +156,7 @@ class SecretaryRoutine(TimeCheckRoutine):
             ):
                 return True  # Continue with next position
             
-            human_delay(CONFIG['timings']['tap_delay'])
+            human_delay(CONFIG['timings']['tap_delay'], self.device_id)
             
             # Find and click list button
             if not find_and_tap_template(
@@ -168,12 +173,18 @@ class SecretaryRoutine(TimeCheckRoutine):
                 # Scroll to top if needed
                 if len(accept_locations) > 5:
                     handle_swipes(self.device_id, direction="up")
-                    human_delay(CONFIG['timings']['settle_time'] * 2)
+                    human_delay(CONFIG['timings']['settle_time'] * 2, self.device_id)
                     accept_locations = self.find_accept_buttons()
                 
                 processed = 0
                 accepted = 0
                 
+                # Read every visible row in one OCR pass; only doubtful rows
+                # are read again on their own below
+                batch_rows = []
+                if len(CONTROL_LIST['whitelist']['alliance']) > 0:
+                    batch_rows = read_alliance_rows(self.device_id, accept_locations)
+                
                 while processed < 5:  # Max 8 applicants
                     accept_locations = self.find_accept_buttons()
                     if not accept_locations:
@@ -182,28 +193,30 @@ class SecretaryRoutine(TimeCheckRoutine):
                     topmost_accept = accept_locations[0]
                     
                     if len(CONTROL_LIST['whitelist']['alliance']) > 0:
-                        if not take_screenshot(self.device_id):
-                            break
-
-                        current_screenshot = cv2.imread('tmp/screen.png')
-                        if current_screenshot is None:
+                        frame = get_current_frame(self.device_id)
+                        if frame is None:
                             break
 
                         alliance_region, name_region, screenshot = get_text_regions(
                             topmost_accept,
                             self.device_id,
-                            existing_screenshot=current_screenshot
+                            frame=frame
                         )
 
                         if screenshot is None:
                             continue
 
-                        alliance_text, original_text = extract_text_from_region(
-                            self.device_id,
-                            alliance_region,
-                            languages='eng',
-                            img=screenshot
-                        )
+                        row = find_alliance_row(self.device_id, batch_rows, alliance_region, screenshot)
+                        if row is not None:
+                            batch_rows.remove(row)
+                            alliance_text, original_text = row.tag, row.text
+                        else:
+                            alliance_text, original_text = extract_text_from_region(
+                                self.device_id,
+                                alliance_region,
+                                languages='eng',
+                                img=screenshot
+                            )
 
                         if alliance_text in CONTROL_LIST['whitelist']['alliance']:
                             humanized_tap(self.device_id, topmost_accept[0], topmost_accept[1])
@@ -213,7 +226,7 @@ class SecretaryRoutine(TimeCheckRoutine):
                         else:
                             # Handle rejection
                             app_logger.info(f"Rejecting candidate with alliance: {alliance_text} for {name}")
-                            log_rejected_alliance(alliance_text, original_text)
+                            log_rejected_alliance(alliance_text, original_text, self.device_id)
                             
                             if self.manual_deny:
                                 play_beep()
@@ -249,7 +262,7 @@ class SecretaryRoutine(TimeCheckRoutine):
                         humanized_tap(self.device_id, topmost_accept[0], topmost_accept[1])
                     
                     processed += 1
-                    human_delay(CONFIG['timings']['settle_time'])
+                    human_delay(CONFIG['timings']['settle_time'], self.device_id)
                                 
             # Exit menus with verification
             if not self.exit_to_secretary_menu():
@@ -270,22 +283,23 @@ class SecretaryRoutine(TimeCheckRoutine):
         try:
             positions_to_process = []
             
+            # Match every position and the applicant icon against one capture
+            frame = get_current_frame(self.device_id)
+            if frame is None:
+                return []
+            
+            secretary_types = self.secretary_types + self.additionalTypes
+            results = find_templates(frame, secretary_types + ["has_applicant"])
+            
             # Find all secretary positions
             all_positions = {}
-            secretary_types = self.secretary_types + self.additionalTypes
             for position_type in secretary_types:
-                positions = find_all_templates(
-                    self.device_id,
-                    position_type
-                )
-                if positions:
-                    all_positions[position_type] = positions[0]  # Take first match for each type
-                    app_logger.debug(f"Found {position_type} position at ({positions[0][0]}, {positions[0][1]})")
+                position = results.best(position_type)
+                if position:
+                    all_positions[position_type] = position  # Take best match for each type
+                    app_logger.debug(f"Found {position_type} position at ({position[0]}, {position[1]})")
             # Find all applicant icons
-            applicant_locations = find_all_templates(
-                self.device_id,
-                "has_applicant"
-            )
+            applicant_locations = results.get("has_applicant")
             
             if not applicant_locations:
                 app_logger.debug("No applicant icons found")
@@ -330,7 +344,7 @@ class SecretaryRoutine(TimeCheckRoutine):
             ):
                 raise RuntimeError('secretary not accessible')
             
-            human_delay(CONFIG['timings']['tap_delay'])
+            human_delay(CONFIG['timings']['tap_delay'], self.device_id)
             
             # Find list button
             if not find_template(
@@ -3,6 +3,11 @@ import json
 from typing import Dict, Any, Optional
 from src.core.logging import app_logger
 from collections import OrderedDict
+import re
+
+def device_state_file(device_id: str) -> Path:
+    """State file of one device when several devices share a process"""
+    return Path("state") / re.sub(r'[^A-Za-z0-9._-]', '_', device_id) / "automation_state.json"
 
 class AutomationState:
     def __init__(self, state_file: Path = Path("state/automation_state.json")):
@@ -1,20 +1,433 @@
 """Core ADB functionality"""
 
 import subprocess
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from .adb_client import AdbError, get_adb_client, use_native_adb
 from .config import CONFIG
 from .logging import app_logger
 import re
 import time
 import socket
 import os
+import queue
+import threading
 import traceback
 
 
+class ShellSession:
+    """Long-lived ``adb shell`` that input commands are written to
+
+    Every command is followed by an ``echo`` of a numbered completion marker
+    carrying the exit status, so callers block until the device has actually
+    run the command without paying for a new adb process per tap. The shell
+    is an ``adb shell`` process, or a ``shell:`` socket to the adb server
+    when the native client is enabled.
+    """
+
+    MARKER = "__FL_DONE__"
+    MARKER_RE = re.compile(rf"{MARKER}(\d+):(\d+)")
+
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+        self._process: Optional[subprocess.Popen] = None
+        self._socket: Optional[socket.socket] = None
+        self._stdin = None
+        self._closed = threading.Event()
+        self._output: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def is_alive(self) -> bool:
+        """Check whether the underlying shell is still running"""
+        if self._stdin is None or self._closed.is_set():
+            return False
+        return self._process is None or self._process.poll() is None
+
+    def _start(self) -> None:
+        """Open the shell and start its output reader thread"""
+        app_logger.debug(f"Opening persistent shell session for {self.device_id}")
+        if use_native_adb():
+            self._socket = get_adb_client().open_service(self.device_id, "shell:", timeout=0)
+            self._stdin = self._socket.makefile('wb', buffering=0)
+            stdout = self._socket.makefile('rb')
+        else:
+            self._process = subprocess.Popen(
+                [CONFIG.adb["binary_path"], '-s', self.device_id, 'shell'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0
+            )
+            self._stdin = self._process.stdin
+            stdout = self._process.stdout
+
+        self._output = queue.Queue()
+        self._closed = threading.Event()
+        reader = threading.Thread(
+            target=self._read_output,
+            args=(stdout, self._output, self._closed),
+            name=f"adb-shell-{self.device_id}",
+            daemon=True
+        )
+        reader.start()
+
+        if self._socket is not None:
+            # The shell: service runs on a PTY, keep it from echoing commands back
+            self._stdin.write(b"stty -echo 2>/dev/null\n")
+
+    @staticmethod
+    def _read_output(stdout, output: "queue.Queue[Optional[str]]", closed: threading.Event) -> None:
+        """Forward shell output lines to the queue, None marks end of stream"""
+        try:
+            for raw in iter(stdout.readline, b''):
+                output.put(raw.decode(errors='replace').rstrip('\r\n'))
+        except (OSError, ValueError):
+            pass
+        finally:
+            closed.set()
+            output.put(None)
+
+    def close(self) -> None:
+        """Terminate the shell"""
+        stdin, self._stdin = self._stdin, None
+        process, self._process = self._process, None
+        sock, self._socket = self._socket, None
+        try:
+            if stdin is not None and not self._closed.is_set():
+                stdin.write(b"exit\n")
+                stdin.flush()
+                if process is not None:
+                    process.wait(timeout=1)
+        except Exception:
+            pass
+        finally:
+            if process is not None and process.poll() is None:
+                process.kill()
+            if sock is not None:
+                sock.close()
+
+    def run(self, command: str, timeout: float = 10.0) -> Tuple[bool, str]:
+        """Run a command in the session and wait for its completion marker
+
+        Args:
+            command: Shell command line to execute on the device
+            timeout: Seconds to wait for the completion marker
+
+        Returns:
+            Tuple of (exit status was zero, command output)
+        """
+        with self._lock:
+            for attempt in range(2):
+                if not self.is_alive():
+                    if attempt > 0 or self._stdin is not None:
+                        app_logger.warning(f"Shell session for {self.device_id} died, reconnecting")
+                    self.close()
+                    try:
+                        self._start()
+                    except (OSError, AdbError) as e:
+                        app_logger.error(f"Failed to open shell session: {e}")
+                        self.close()
+                        return False, ""
+
+                self._counter += 1
+                try:
+                    self._stdin.write(f"{command}; echo {self.MARKER}{self._counter}:$?\n".encode())
+                    self._stdin.flush()
+                except (OSError, ValueError) as e:
+                    # Nothing reached the device, safe to retry on a fresh session
+                    app_logger.debug(f"Shell session write failed: {e}")
+                    self.close()
+                    continue
+
+                try:
+                    return self._wait_for_marker(self._counter, timeout)
+                except (TimeoutError, ConnectionError) as e:
+                    # The command may already have run, so do not replay it
+                    app_logger.error(f"Shell command '{command}' failed: {e}")
+                    self.close()
+                    return False, ""
+
+            return False, ""
+
+    def _wait_for_marker(self, number: int, timeout: float) -> Tuple[bool, str]:
+        """Collect output lines until the numbered completion marker shows up"""
+        deadline = time.time() + timeout
+        lines = []
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"no completion marker after {timeout:.1f}s")
+            try:
+                line = self._output.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise ConnectionError("shell session closed")
+
+            match = self.MARKER_RE.search(line)
+            if match is None:
+                lines.append(line)
+            elif int(match.group(1)) == number:
+                return match.group(2) == "0", "\n".join(lines)
+            # Otherwise the marker belongs to an earlier command that timed out
+
+
+class InputQueue:
+    """Per-device queue of input commands sent as one shell invocation
+
+    Consecutive inputs and the humanised delays between them are joined
+    into a single command line such as ``input tap 1 2; sleep 0.300;
+    input keyevent 4``. The queue is flushed by anything that observes the
+    device (captures, other shell commands) so it always sees the result of
+    every queued input. A flush that fails is logged and remembered, so the
+    next flush_input barrier reports it even when an implicit flush hit it.
+    """
+
+    def __init__(self, device_id: str, max_commands: int = 16):
+        self.device_id = device_id
+        self.max_commands = max_commands
+        self._commands: List[str] = []
+        self._duration = 0.0
+        self._failed = False
+        self._lock = threading.RLock()
+
+    @property
+    def failed(self) -> bool:
+        """Check whether a flush failed since the last barrier"""
+        return self._failed
+
+    def take_failure(self) -> bool:
+        """Return and clear the failure flag"""
+        with self._lock:
+            failed, self._failed = self._failed, False
+            return failed
+
+    def pending(self) -> bool:
+        """Check whether any inputs are waiting to be sent"""
+        return bool(self._commands)
+
+    def add(self, command: str, duration: float = 0.0) -> None:
+        """Queue a command expected to take duration seconds on the device"""
+        with self._lock:
+            self._commands.append(command)
+            self._duration += duration
+            if len(self._commands) >= self.max_commands:
+                self.flush()
+
+    def add_delay(self, seconds: float) -> None:
+        """Queue a device-side pause between inputs"""
+        if seconds > 0:
+            self.add(f"sleep {seconds:.3f}", seconds)
+
+    def flush(self) -> bool:
+        """Send all queued commands and wait until the device has run them"""
+        with self._lock:
+            if not self._commands:
+                return True
+            commands, duration = self._commands, self._duration
+            self._commands, self._duration = [], 0.0
+
+            # Trailing sleeps are kept so a following capture sees the settled screen
+            app_logger.debug(f"Flushing {len(commands)} queued input commands for {self.device_id}")
+            if _run_input(self.device_id, "; ".join(commands), timeout=duration + 10):
+                return True
+            app_logger.error(f"Failed to run {len(commands)} queued input commands on {self.device_id}")
+            self._failed = True
+            return False
+
+
+_shell_sessions: Dict[str, ShellSession] = {}
+_shell_sessions_lock = threading.Lock()
+_input_queues: Dict[str, InputQueue] = {}
+_last_input_time: Dict[str, float] = {}
+_input_generation: Dict[str, int] = {}
+
+def get_shell_session(device_id: str) -> ShellSession:
+    """Get the persistent shell session for a device, creating it on first use"""
+    with _shell_sessions_lock:
+        session = _shell_sessions.get(device_id)
+        if session is None:
+            session = ShellSession(device_id)
+            _shell_sessions[device_id] = session
+        return session
+
+def close_shell_sessions() -> None:
+    """Flush pending inputs and close all persistent shell sessions"""
+    with _shell_sessions_lock:
+        queues = list(_input_queues.values())
+        _input_queues.clear()
+    for input_queue in queues:
+        input_queue.flush()
+
+    with _shell_sessions_lock:
+        sessions = list(_shell_sessions.values())
+        _shell_sessions.clear()
+    for session in sessions:
+        session.close()
+
+def close_shell_session(device_id: str) -> None:
+    """Flush pending inputs and close the shell session of one device"""
+    with _shell_sessions_lock:
+        input_queue = _input_queues.pop(device_id, None)
+        session = _shell_sessions.pop(device_id, None)
+    if input_queue is not None:
+        input_queue.flush()
+    if session is not None:
+        session.close()
+
+def _batching_enabled() -> bool:
+    return CONFIG.get('input', {}).get('batching', True)
+
+def get_input_queue(device_id: str) -> InputQueue:
+    """Get the input queue for a device, creating it on first use"""
+    with _shell_sessions_lock:
+        input_queue = _input_queues.get(device_id)
+        if input_queue is None:
+            input_queue = InputQueue(device_id, CONFIG.get('input', {}).get('max_batch', 16))
+            _input_queues[device_id] = input_queue
+        return input_queue
+
+def flush_input(device_id: str) -> bool:
+    """Barrier: send queued inputs and wait until the device has run them
+
+    Returns False when these inputs or any flushed since the last barrier,
+    for example by a capture, failed on the device.
+    """
+    input_queue = _input_queues.get(device_id)
+    if input_queue is None:
+        return True
+    flushed = input_queue.flush()
+    return not input_queue.take_failure() and flushed
+
+def queue_delay(device_id: str, seconds: float) -> bool:
+    """Queue a device-side delay behind pending inputs
+
+    Returns False when nothing is pending, in which case the caller should
+    simply sleep.
+    """
+    input_queue = _input_queues.get(device_id)
+    if input_queue is None or not input_queue.pending():
+        return False
+    input_queue.add_delay(seconds)
+    return True
+
+def get_input_generation(device_id: str) -> int:
+    """Get a counter that grows with every action that may change the screen"""
+    return _input_generation.get(device_id, 0)
+
+def _bump_input_generation(device_id: str) -> None:
+    """Mark frames captured so far as stale"""
+    _input_generation[device_id] = _input_generation.get(device_id, 0) + 1
+
+def _send_input(device_id: str, command: str, duration: float = 0.0) -> bool:
+    """Queue an input command, or run it right away when batching is off
+
+    With batching True means queued, not executed; it is False when an
+    earlier batch failed since the last flush_input barrier. Call
+    flush_input to know whether queued inputs ran.
+    """
+    _bump_input_generation(device_id)
+    if _batching_enabled():
+        input_queue = get_input_queue(device_id)
+        input_queue.add(command, duration)
+        return not input_queue.failed
+    return _run_input(device_id, command, timeout=duration + 10)
+
+def get_last_input_time(device_id: str) -> float:
+    """Get the time the last input command finished on a device"""
+    return _last_input_time.get(device_id, 0.0)
+
+def _run_input(device_id: str, command: str, timeout: float = 10.0) -> bool:
+    """Run an ``input`` command through the device's shell session"""
+    success, output = get_shell_session(device_id).run(command, timeout=timeout)
+    _last_input_time[device_id] = time.time()
+    if not success and output:
+        app_logger.debug(f"Input command '{command}' output: {output}")
+    return success
+
+def run_shell(device_id: str, args: List[str], timeout: float = 30.0) -> Optional[str]:
+    """Run a one-off shell command and return its output, None on failure"""
+    flush_input(device_id)
+    try:
+        if use_native_adb():
+            exit_code, stdout, stderr = get_adb_client().shell(device_id, ' '.join(args), timeout)
+            if exit_code != 0:
+                app_logger.debug(f"Shell command {' '.join(args)} failed: {stderr.strip()}")
+                return None
+            return stdout
+
+        result = subprocess.run(
+            [CONFIG.adb["binary_path"], '-s', device_id, 'shell', *args],
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        if result.returncode != 0:
+            app_logger.debug(f"Shell command {' '.join(args)} failed: {result.stderr.strip()}")
+            return None
+        return result.stdout
+
+    except (AdbError, OSError, subprocess.SubprocessError) as e:
+        app_logger.error(f"Error running shell command {' '.join(args)}: {e}")
+        return None
+
+def run_exec_out(device_id: str, args: List[str], timeout: float = 30.0) -> Optional[bytes]:
+    """Run a command without a PTY and return its raw output, None on failure"""
+    flush_input(device_id)
+    try:
+        if use_native_adb():
+            return get_adb_client().exec_out(device_id, ' '.join(args), timeout)
+
+        result = subprocess.run(
+            [CONFIG.adb["binary_path"], '-s', device_id, 'exec-out', *args],
+            capture_output=True,
+            timeout=timeout
+        )
+        if result.returncode != 0:
+            app_logger.error(f"exec-out {' '.join(args)} failed: {result.stderr.decode(errors='replace').strip()}")
+            return None
+        return result.stdout
+
+    except (AdbError, OSError, subprocess.SubprocessError) as e:
+        app_logger.error(f"Error running exec-out {' '.join(args)}: {e}")
+        return None
+
+def _get_native_device_list() -> Optional[List[str]]:
+    """List devices through the adb server, None if the server is not reachable"""
+    try:
+        client = get_adb_client()
+        if CONFIG.adb["enforce_connection"] and CONFIG.adb['host'] and CONFIG.adb['port'] and CONFIG.adb['port'] > 0:
+            client.connect(f"{CONFIG.adb['host']}:{CONFIG.adb['port']}")
+
+        target_device = ""
+        if CONFIG.adb['host'] and CONFIG.adb['port']:
+            target_device = f"{CONFIG.adb['host']}:{CONFIG.adb['port']}"
+
+        devices = []
+        for device_id, state in client.devices():
+            app_logger.debug(f"Found device: {device_id} ({state})")
+            if len(target_device) > 0:
+                if target_device in device_id:
+                    devices.append(device_id)
+                    break
+            else:
+                devices.append(device_id)
+        return devices
+
+    except (AdbError, OSError) as e:
+        app_logger.debug(f"adb server not reachable, falling back to adb binary: {e}")
+        return None
+
+
 def get_device_list() -> List[str]:
     """Get list of connected devices"""
 
+    if use_native_adb():
+        devices = _get_native_device_list()
+        if devices is not None:
+            return devices
+
     cmd = [CONFIG.adb["binary_path"], "version"]
     try:
 
@@ -113,44 +526,49 @@ def get_device_list() -> List[str]:
 
 def launch_package(device_id: str, package_name: str):
     """Launch an app package"""
-    subprocess.run(
-        [CONFIG.adb["binary_path"], '-s', device_id, 'shell', 'monkey', '-p', package_name, '-c', 'android.intent.category.LAUNCHER', '1'],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
+    _bump_input_generation(device_id)
+    run_shell(device_id, ['monkey', '-p', package_name, '-c', 'android.intent.category.LAUNCHER', '1'])
 
 def force_stop_package(device_id: str, package_name: str):
     """Force stop an app package"""
-    subprocess.run([CONFIG.adb["binary_path"], '-s', device_id, 'shell', 'am', 'force-stop', package_name])
+    _bump_input_generation(device_id)
+    run_shell(device_id, ['am', 'force-stop', package_name])
 
 def press_back(device_id: str) -> bool:
-    """Press back button"""
+    """Press back button
+    
+    With input batching on, True means the input was queued (see _send_input).
+    """
     try:
-        cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell input keyevent 4"
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0
+        return _send_input(device_id, "input keyevent 4")
         
     except Exception as e:
         app_logger.error(f"Error pressing back: {e}")
         return False
 
 def tap_screen(device_id: str, x: int, y: int) -> bool:
-    """Tap screen at coordinates"""
+    """Tap screen at coordinates
+    
+    With input batching on, True means the input was queued (see _send_input).
+    """
     try:
-        cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell input tap {x} {y}"
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0
+        return _send_input(device_id, f"input tap {x} {y}")
         
     except Exception as e:
         app_logger.error(f"Error tapping screen: {e}")
         return False
 
 def swipe_screen(device_id: str, start_x: int, start_y: int, end_x: int, end_y: int, duration: int = 300) -> bool:
-    """Swipe screen from start to end coordinates"""
+    """Swipe screen from start to end coordinates
+    
+    With input batching on, True means the input was queued (see _send_input).
+    """
     try:
-        cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell input swipe {start_x} {start_y} {end_x} {end_y} {duration}"
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0
+        return _send_input(
+            device_id,
+            f"input swipe {start_x} {start_y} {end_x} {end_y} {duration}",
+            duration=duration / 1000
+        )
         
     except Exception as e:
         app_logger.error(f"Error swiping screen: {e}")
@@ -171,23 +589,18 @@ def get_current_running_app(device_id):
     """
     Returns the package name of the currently running app on the device.
     """
-    try:
-        result = subprocess.run(
-            [CONFIG.adb["binary_path"], '-s', device_id, 'shell', 'dumpsys', 'window', 'windows'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        for line in result.stdout.splitlines():
-            if 'mCurrentFocus' in line or 'mFocusedApp' in line:
-                package_name = line.split('/')[0].split()[-1]
-                app_logger.debug(f"Current running app: {package_name}")
-                return package_name
-        return None
-    except subprocess.CalledProcessError as e:
-        app_logger.exception(f"Failed to get current running app: {e}")
+    output = run_shell(device_id, ['dumpsys', 'window', 'windows'])
+    if output is None:
+        app_logger.error("Failed to get current running app")
         return None
 
+    for line in output.splitlines():
+        if 'mCurrentFocus' in line or 'mFocusedApp' in line:
+            package_name = line.split('/')[0].split()[-1]
+            app_logger.debug(f"Current running app: {package_name}")
+            return package_name
+    return None
+
 def long_press_screen(device_id: str, x: int, y: int, duration: int) -> bool:
     """Execute a long press at coordinates with specified duration
     
@@ -196,27 +609,28 @@ def long_press_screen(device_id: str, x: int, y: int, duration: int) -> bool:
         x: X coordinate
         y: Y coordinate
         duration: Press duration in milliseconds
+
+    With input batching on, True means the press was queued (see _send_input).
     """
     try:
-        cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell input swipe {x} {y} {x} {y} {duration}"
-        subprocess.run(cmd, shell=True, check=True)
-        return True
-    except subprocess.CalledProcessError:
+        if _send_input(device_id, f"input swipe {x} {y} {x} {y} {duration}", duration=duration / 1000):
+            return True
         app_logger.error(f"Failed to execute long press on device {device_id}")
         return False
+    except Exception as e:
+        app_logger.error(f"Error executing long press: {e}")
+        return False
 
 def get_screen_size(device_id: str) -> tuple[int, int]:
-    """Get device screen size"""
+    """Get device screen size from the device properties cache"""
+    # Import here to avoid circular dependency
+    from .device_properties import get_device_properties
+
     try:
-        result = subprocess.run(
-            [CONFIG.adb["binary_path"], '-s', device_id, 'shell', 'wm', 'size'],
-            capture_output=True, 
-            text=True
-        )
-        match = re.search(r'(\d+)x(\d+)', result.stdout)
-        if match:
-            return int(match.group(1)), int(match.group(2))
-        raise ValueError("Could not parse screen size")
+        properties = get_device_properties(device_id)
+        if properties is not None:
+            return properties.screen_size
+        raise ValueError("Could not read device properties")
     except Exception as e:
         raise RuntimeError(f"Failed to get screen size: {e}")
     
@@ -251,20 +665,21 @@ def simulate_shake(device_id: str, duration_ms: int = 1000) -> bool:
             
             for values in pattern:
                 # Use the full adb shell command instead of emu
-                cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell \"setprop debug.sensors.accelerometer.x {values.split(':')[0]};" \
+                cmd = f"setprop debug.sensors.accelerometer.x {values.split(':')[0]};" \
                       f"setprop debug.sensors.accelerometer.y {values.split(':')[1]};" \
-                      f"setprop debug.sensors.accelerometer.z {values.split(':')[2]}\""
+                      f"setprop debug.sensors.accelerometer.z {values.split(':')[2]}"
                 app_logger.debug(f"Executing: {cmd}")
-                subprocess.run(cmd, shell=True)
+                run_shell(device_id, [cmd])
                 time.sleep(0.1)
                 
             # Reset to normal
-            cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell \"setprop debug.sensors.accelerometer.x 0;" \
-                  f"setprop debug.sensors.accelerometer.y 0;" \
-                  f"setprop debug.sensors.accelerometer.z 9.81\""
-            subprocess.run(cmd, shell=True)
+            cmd = "setprop debug.sensors.accelerometer.x 0;" \
+                  "setprop debug.sensors.accelerometer.y 0;" \
+                  "setprop debug.sensors.accelerometer.z 9.81"
+            run_shell(device_id, [cmd])
             time.sleep(0.2)
             
+        _bump_input_generation(device_id)
         return True
             
     except Exception as e:
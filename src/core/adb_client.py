@@ -0,0 +1,272 @@
+"""Native client for the adb server host protocol
+
+Talks to the adb server on port 5037 directly instead of spawning the adb
+binary, keeping a small pool of sockets per device that are already bound
+to the device transport.
+"""
+
+import socket
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .config import CONFIG
+from .logging import app_logger
+
+
+# Packet ids of the shell v2 protocol
+_SHELL_STDOUT = 1
+_SHELL_STDERR = 2
+_SHELL_EXIT = 3
+
+
+class AdbError(RuntimeError):
+    """Raised when the adb server rejects a request"""
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes from the socket"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            raise ConnectionError("adb server closed the connection")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+def _recv_all(sock: socket.socket) -> bytes:
+    """Read until the server closes the connection"""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+def _read_status(sock: socket.socket) -> None:
+    """Read an OKAY/FAIL status, raising AdbError on FAIL"""
+    status = _recv_exact(sock, 4)
+    if status == b'OKAY':
+        return
+    if status == b'FAIL':
+        length = int(_recv_exact(sock, 4), 16)
+        raise AdbError(_recv_exact(sock, length).decode(errors='replace'))
+    raise AdbError(f"Unexpected adb server status: {status!r}")
+
+def _send_request(sock: socket.socket, request: str) -> None:
+    """Send a length-prefixed host request and check the reply"""
+    data = request.encode()
+    sock.sendall(f"{len(data):04x}".encode() + data)
+    _read_status(sock)
+
+def _send_sync(sock: socket.socket, command: bytes, payload: bytes = b'') -> None:
+    """Send a sync service request: id, little-endian length, payload"""
+    sock.sendall(command + struct.pack('<I', len(payload)) + payload)
+
+def _sync_pull(sock: socket.socket, remote_path: str) -> bytes:
+    """Read a file over a socket already running the sync service"""
+    path = remote_path.encode()
+
+    _send_sync(sock, b'STAT', path)
+    reply = _recv_exact(sock, 16)
+    if reply[:4] != b'STAT':
+        raise AdbError(f"Unexpected sync response: {reply[:4]!r}")
+    mode = struct.unpack('<I', reply[4:8])[0]
+    if mode == 0:
+        raise AdbError(f"Remote file not found: {remote_path}")
+
+    _send_sync(sock, b'RECV', path)
+    chunks = []
+    while True:
+        header = _recv_exact(sock, 8)
+        chunk_id, length = header[:4], struct.unpack('<I', header[4:])[0]
+        if chunk_id == b'DATA':
+            chunks.append(_recv_exact(sock, length))
+        elif chunk_id == b'DONE':
+            break
+        elif chunk_id == b'FAIL':
+            raise AdbError(_recv_exact(sock, length).decode(errors='replace'))
+        else:
+            raise AdbError(f"Unexpected sync response: {chunk_id!r}")
+
+    _send_sync(sock, b'QUIT')
+    return b''.join(chunks)
+
+
+class AdbClient:
+    """adb host protocol client with per-device socket pools
+
+    Sockets in the pool have already completed ``host:transport:<serial>``
+    and are waiting for a service request. The server closes a socket once
+    its service finishes, so every request consumes one and the pool is
+    topped up again in the background.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 5037, pool_size: int = 2, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pools: Dict[str, List[socket.socket]] = {}
+        self._refilling: set = set()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        """Open a new connection to the adb server"""
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _host_request(self, request: str) -> bytes:
+        """Run a host service that replies with a length-prefixed payload"""
+        with self._connect() as sock:
+            _send_request(sock, request)
+            length = int(_recv_exact(sock, 4), 16)
+            return _recv_exact(sock, length)
+
+    def devices(self) -> List[Tuple[str, str]]:
+        """List (serial, state) pairs known to the server"""
+        payload = self._host_request("host:devices").decode(errors='replace')
+        devices = []
+        for line in payload.splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                devices.append((parts[0], parts[1]))
+        return devices
+
+    def connect(self, address: str) -> str:
+        """Ask the server to connect to a device over TCP"""
+        return self._host_request(f"host:connect:{address}").decode(errors='replace')
+
+    def _open_transport(self, serial: str) -> socket.socket:
+        """Open a socket bound to the device transport"""
+        sock = self._connect()
+        try:
+            _send_request(sock, f"host:transport:{serial}")
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _refill(self, serial: str) -> None:
+        """Top the device's pool back up to pool_size"""
+        try:
+            while True:
+                with self._lock:
+                    if len(self._pools.setdefault(serial, [])) >= self.pool_size:
+                        return
+                sock = self._open_transport(serial)
+                with self._lock:
+                    self._pools[serial].append(sock)
+        except (OSError, AdbError) as e:
+            app_logger.debug(f"Failed to refill adb socket pool for {serial}: {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard(serial)
+
+    def _schedule_refill(self, serial: str) -> None:
+        with self._lock:
+            if serial in self._refilling:
+                return
+            self._refilling.add(serial)
+        threading.Thread(target=self._refill, args=(serial,), name=f"adb-pool-{serial}", daemon=True).start()
+
+    def open_service(self, serial: str, service: str, timeout: Optional[float] = None) -> socket.socket:
+        """Open a device service, preferring a pre-opened pooled socket
+
+        The returned socket times out reads and writes after timeout seconds,
+        defaulting to the client timeout; pass 0 for a blocking socket. A
+        pooled socket can have gone stale if the device reconnected, in which
+        case the request is retried once on a fresh socket.
+        """
+        with self._lock:
+            pool = self._pools.get(serial, [])
+            sock = pool.pop() if pool else None
+
+        try:
+            if sock is not None:
+                try:
+                    _send_request(sock, service)
+                except (OSError, AdbError):
+                    sock.close()
+                    sock = None
+
+            if sock is None:
+                sock = self._open_transport(serial)
+                try:
+                    _send_request(sock, service)
+                except Exception:
+                    sock.close()
+                    raise
+
+            sock.settimeout(self.timeout if timeout is None else timeout or None)
+            return sock
+        finally:
+            self._schedule_refill(serial)
+
+    def shell(self, serial: str, command: str, timeout: Optional[float] = None) -> Tuple[int, str, str]:
+        """Run a shell command without a PTY, returning exit code, stdout and stderr
+
+        Uses the shell v2 protocol, which frames stdout and stderr and ends
+        with the exit code, unlike ``shell:`` where a failed command cannot be
+        told apart from one that printed an error.
+        """
+        with self.open_service(serial, f"shell,v2,raw:{command}", timeout) as sock:
+            output: Dict[int, List[bytes]] = {_SHELL_STDOUT: [], _SHELL_STDERR: []}
+            while True:
+                header = _recv_exact(sock, 5)
+                packet_id, length = header[0], struct.unpack('<I', header[1:])[0]
+                data = _recv_exact(sock, length)
+                if packet_id == _SHELL_EXIT:
+                    stdout, stderr = (b''.join(output[i]).decode(errors='replace') for i in (_SHELL_STDOUT, _SHELL_STDERR))
+                    return data[0], stdout, stderr
+                if packet_id in output:
+                    output[packet_id].append(data)
+
+    def exec_out(self, serial: str, command: str, timeout: Optional[float] = None) -> bytes:
+        """Run a command without a PTY and return its raw output"""
+        with self.open_service(serial, f"exec:{command}", timeout) as sock:
+            return _recv_all(sock)
+
+    def pull(self, serial: str, remote_path: str, timeout: Optional[float] = None) -> bytes:
+        """Read a file from the device through the sync service"""
+        with self.open_service(serial, "sync:", timeout) as sock:
+            return _sync_pull(sock, remote_path)
+
+    def close(self) -> None:
+        """Close all pooled sockets"""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for sock in pool:
+                sock.close()
+
+
+_client: Optional[AdbClient] = None
+_client_lock = threading.Lock()
+
+def use_native_adb() -> bool:
+    """Check whether config selects the native adb client"""
+    return CONFIG.adb.get("backend", "binary") == "native"
+
+def get_adb_client() -> AdbClient:
+    """Get the shared adb client configured from config.json"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AdbClient(
+                host=CONFIG.adb.get("server_host", "127.0.0.1"),
+                port=CONFIG.adb.get("server_port", 5037),
+                pool_size=CONFIG.adb.get("pool_size", 2)
+            )
+        return _client
+
+def close_adb_client() -> None:
+    """Close the shared adb client and its pooled sockets"""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,81 @@
+"""Awaitable ADB functionality
+
+Blocking device I/O runs on a single worker thread per device, so commands
+for one device stay in order while one event loop overlaps the waits of
+many devices.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from . import adb
+from .device import capture_screen as _capture_screen
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+def _get_executor(device_id: str) -> ThreadPoolExecutor:
+    """Get the worker thread that serializes I/O for a device"""
+    with _executors_lock:
+        executor = _executors.get(device_id)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"io-{device_id}")
+            _executors[device_id] = executor
+        return executor
+
+async def run_on_device(device_id: str, func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call on the device's I/O thread and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(device_id), functools.partial(func, *args, **kwargs))
+
+def shutdown_device_executor(device_id: str) -> None:
+    """Stop the I/O thread of a device"""
+    with _executors_lock:
+        executor = _executors.pop(device_id, None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+async def tap_screen(device_id: str, x: int, y: int) -> bool:
+    """Tap screen at coordinates"""
+    return await run_on_device(device_id, adb.tap_screen, device_id, x, y)
+
+async def swipe_screen(device_id: str, start_x: int, start_y: int, end_x: int, end_y: int, duration: int = 300) -> bool:
+    """Swipe screen from start to end coordinates"""
+    return await run_on_device(device_id, adb.swipe_screen, device_id, start_x, start_y, end_x, end_y, duration)
+
+async def long_press_screen(device_id: str, x: int, y: int, duration: int) -> bool:
+    """Execute a long press at coordinates, duration in milliseconds"""
+    return await run_on_device(device_id, adb.long_press_screen, device_id, x, y, duration)
+
+async def press_back(device_id: str) -> bool:
+    """Press back button"""
+    return await run_on_device(device_id, adb.press_back, device_id)
+
+async def flush_input(device_id: str) -> bool:
+    """Await until all queued inputs have run on the device"""
+    return await run_on_device(device_id, adb.flush_input, device_id)
+
+async def run_shell(device_id: str, args: list) -> Optional[str]:
+    """Run a one-off shell command and return its output"""
+    return await run_on_device(device_id, adb.run_shell, device_id, args)
+
+async def get_current_running_app(device_id: str) -> Optional[str]:
+    """Get the package name of the app in the foreground"""
+    return await run_on_device(device_id, adb.get_current_running_app, device_id)
+
+async def launch_package(device_id: str, package_name: str) -> None:
+    """Launch an app package"""
+    await run_on_device(device_id, adb.launch_package, device_id, package_name)
+
+async def force_stop_package(device_id: str, package_name: str) -> None:
+    """Force stop an app package"""
+    await run_on_device(device_id, adb.force_stop_package, device_id, package_name)
+
+async def capture_screen(device_id: str) -> Optional[np.ndarray]:
+    """Capture the screen into memory as a BGR image"""
+    return await run_on_device(device_id, _capture_screen, device_id)
@@ -2,6 +2,14 @@ from pathlib import Path
 from typing import Optional
 from src.core.logging import app_logger
 from src.core.device import cleanup_temp_files, cleanup_device_screenshots
+from src.core.adb import close_shell_sessions
+from src.core.adb_client import close_adb_client
+from src.core.frame_stream import stop_frame_streams
+from src.core.search_regions import SEARCH_REGIONS
+from src.core.debug_artifacts import DEBUG_WRITER
+from src.core.ocr_engine import close_ocr_engines
+from src.core.ocr_cache import OCR_CACHE
+from src.core.image_processing import WAIT_STATS
 
 class CleanupManager:
     _instance: Optional['CleanupManager'] = None
@@ -15,12 +23,16 @@ class CleanupManager:
         if not hasattr(self, 'initialized'):
             self.initialized = True
             self.cleanup_handlers = []
-            self.device_id = None
+            self.device_ids = []
             self.skip_cleanup = False
     
     def set_device(self, device_id: str):
         """Set the device ID for cleanup"""
-        self.device_id = device_id
+        self.device_ids = [device_id]
+
+    def set_devices(self, device_ids: list[str]):
+        """Set the device IDs for cleanup when running several devices"""
+        self.device_ids = list(device_ids)
     
     def set_skip_cleanup(self, skip: bool):
         """Set whether to skip cleanup on exit"""
@@ -37,12 +49,27 @@ class CleanupManager:
             app_logger.info("Skipping cleanup as requested")
             return
             
-        if not self.device_id:
+        if not self.device_ids:
             return
             
         try:
             app_logger.info("Running cleanup tasks...")
+            SEARCH_REGIONS.log_stats()
+            wait_stats = WAIT_STATS.to_dict()
+            if wait_stats["waits"]:
+                app_logger.info(
+                    f"Image waits: {wait_stats['captures']} captures, {wait_stats['matches']} matches, "
+                    f"saved {wait_stats['captures_saved']} captures and {wait_stats['matches_saved']} matches"
+                )
+            OCR_CACHE.log_stats()
+            SEARCH_REGIONS.save()
             cleanup_temp_files()
-            cleanup_device_screenshots(self.device_id)
+            for device_id in self.device_ids:
+                cleanup_device_screenshots(device_id)
+            DEBUG_WRITER.stop()
+            stop_frame_streams()
+            close_ocr_engines()
+            close_shell_sessions()
+            close_adb_client()
         except Exception as e:
             app_logger.error(f"Error during cleanup: {e}") 
\ No newline at end of file
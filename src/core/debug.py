@@ -1,30 +1,41 @@
 import cv2
-from typing import Tuple
+import numpy as np
+from typing import Optional, Tuple
 from .logging import app_logger
 from .image_processing import _take_and_load_screenshot
+from .device import tmp_path
+from .debug_artifacts import debug_enabled, write_debug_image
 
-def save_debug_region(device_id: str, region: Tuple[int, int, int, int], prefix: str):
+def save_debug_region(device_id: str, region: Tuple[int, int, int, int], prefix: str, img: Optional[np.ndarray] = None):
     """Helper function to save debug images with region highlighting
     
+    Does nothing unless the ``region`` debug category is enabled; the images
+    are written by the background debug writer.
+    
     Args:
         device_id: Device identifier
         region: Tuple of (x1, y1, x2, y2) coordinates
         prefix: Prefix for saved debug image filenames
+        img: Screenshot the region belongs to, captured when not given
     """
+    if not debug_enabled('region'):
+        return
+        
     try:
-        img = _take_and_load_screenshot(device_id)
+        if img is None:
+            img = _take_and_load_screenshot(device_id)
         if img is None:
             return
             
         x1, y1, x2, y2 = region
         
         # Save cropped region
-        region_img = img[y1:y2, x1:x2]
-        cv2.imwrite(f'tmp/debug_{prefix}.png', region_img)
+        write_debug_image('region', tmp_path(device_id, f'debug_{prefix}.png'), img[y1:y2, x1:x2])
         
         # Save full image with region highlighted
-        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.imwrite(f'tmp/debug_{prefix}_full.png', img)
+        def annotate(full_img: np.ndarray) -> None:
+            cv2.rectangle(full_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        write_debug_image('region', tmp_path(device_id, f'debug_{prefix}_full.png'), img, annotate)
         
     except Exception as e:
-        app_logger.error(f"Error saving debug images: {e}") 
\ No newline at end of file
+        app_logger.error(f"Error saving debug images: {e}") 
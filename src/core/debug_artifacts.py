@@ -0,0 +1,128 @@
+"""Background writer for debug images
+
+Lookups and OCR hand their debug images to a worker thread instead of
+encoding PNGs on the hot path. Frames are read-only, so images are queued
+by reference and any annotation is drawn on a copy by the worker. When a
+category is switched off callers skip the work entirely.
+"""
+
+import os
+import queue
+import random
+import threading
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+from .config import CONFIG
+from .logging import app_logger
+
+Annotate = Callable[[np.ndarray], None]
+
+
+class DebugWriter:
+    """Writes debug images from a bounded queue on a background thread
+
+    Images beyond the sampling rate are skipped, and images that arrive while
+    the queue is full are dropped rather than blocking the caller.
+    """
+
+    def __init__(self):
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.skipped = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _settings() -> dict:
+        return CONFIG.get('debug_artifacts', {})
+
+    def enabled(self, category: str) -> bool:
+        """Check whether a category of debug images is switched on"""
+        return bool(self._settings().get('categories', {}).get(category, False))
+
+    def _ensure_started(self) -> queue.Queue:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._queue = queue.Queue(maxsize=self._settings().get('queue_size', 64))
+                self._thread = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def submit(self, category: str, path: str, image: np.ndarray, annotate: Optional[Annotate] = None) -> bool:
+        """Queue an image for writing, returning False if it was not queued
+
+        annotate, if given, draws on a copy of the image in the worker.
+        """
+        if image is None or not self.enabled(category):
+            return False
+
+        sample_rate = self._settings().get('sample_rate', 1.0)
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            self.skipped += 1
+            return False
+
+        try:
+            self._ensure_started().put_nowait((path, image, annotate))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _run(self) -> None:
+        work = self._queue
+        while True:
+            item = work.get()
+            try:
+                if item is None:
+                    return
+                path, image, annotate = item
+                if annotate is not None:
+                    image = image.copy()
+                    annotate(image)
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                if cv2.imwrite(path, image):
+                    self.written += 1
+            except Exception as e:
+                app_logger.error(f"Error writing debug image: {e}")
+            finally:
+                work.task_done()
+
+    def flush(self) -> None:
+        """Wait until every queued image has been written"""
+        with self._lock:
+            work = self._queue if self._thread is not None and self._thread.is_alive() else None
+        if work is not None:
+            work.join()
+
+    def stop(self) -> None:
+        """Write what is queued, then stop the worker"""
+        self.flush()
+        with self._lock:
+            thread, self._thread = self._thread, None
+            work = self._queue
+        if thread is not None and thread.is_alive():
+            work.put(None)
+            thread.join(timeout=5)
+        if self.written or self.dropped or self.skipped:
+            app_logger.debug(
+                f"Debug images: {self.written} written, {self.skipped} skipped by sampling, "
+                f"{self.dropped} dropped on overflow"
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"written": self.written, "skipped": self.skipped, "dropped": self.dropped}
+
+
+DEBUG_WRITER = DebugWriter()
+
+def debug_enabled(category: str) -> bool:
+    """Check whether a category of debug images is switched on"""
+    return DEBUG_WRITER.enabled(category)
+
+def write_debug_image(category: str, path: str, image: np.ndarray, annotate: Optional[Annotate] = None) -> bool:
+    """Queue a debug image on the background writer"""
+    return DEBUG_WRITER.submit(category, path, image, annotate)
@@ -1,33 +1,158 @@
 """Device interaction utilities"""
 
-import subprocess
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
+from .adb import run_exec_out, run_shell
+from .device_properties import check_frame_geometry, get_device_properties
 from .logging import app_logger
 from pathlib import Path
+import re
 import shutil
+import struct
+import cv2
+import numpy as np
 from src.core.config import CONFIG
 
+# screencap pixel formats we can read (android PixelFormat values)
+RAW_FORMATS = {
+    1: cv2.COLOR_RGBA2BGR,  # RGBA_8888
+    2: cv2.COLOR_RGBA2BGR,  # RGBX_8888
+    5: cv2.COLOR_BGRA2BGR,  # BGRA_8888
+}
+
+# Direct grayscale conversions, identical to going through BGR
+RAW_GRAY_FORMATS = {
+    1: cv2.COLOR_RGBA2GRAY,
+    2: cv2.COLOR_RGBA2GRAY,
+    5: cv2.COLOR_BGRA2GRAY,
+}
+
+# Devices whose raw screencap output could not be parsed
+_raw_unsupported = set()
+
+class RawScreenshot:
+    """Raw screencap framebuffer exposed as a zero-copy NumPy view"""
+
+    def __init__(self, pixels: np.ndarray, pixel_format: int):
+        self.pixels = pixels
+        self.pixel_format = pixel_format
+        self._bgr: Optional[np.ndarray] = None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Height and width of the framebuffer"""
+        return self.pixels.shape[:2]
+
+    def bgr(self) -> np.ndarray:
+        """Convert to a BGR image on first request"""
+        if self._bgr is None:
+            self._bgr = cv2.cvtColor(self.pixels, RAW_FORMATS[self.pixel_format])
+        return self._bgr
+
+    def gray(self) -> np.ndarray:
+        """Grayscale image, from the BGR image if converted already"""
+        if self._bgr is not None:
+            return cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY)
+        return cv2.cvtColor(self.pixels, RAW_GRAY_FORMATS[self.pixel_format])
+
+def parse_raw_screencap(data: bytes) -> Optional[RawScreenshot]:
+    """Wrap raw screencap output as a RawScreenshot
+
+    The header is width, height and format as little-endian uint32, followed
+    by a colour space field on Android 9+. Returns None when the header does
+    not describe the payload.
+    """
+    if len(data) < 12:
+        return None
+
+    width, height, pixel_format = struct.unpack_from('<III', data)
+    if pixel_format not in RAW_FORMATS:
+        return None
+
+    pixel_bytes = width * height * 4
+    for header_size in (12, 16):
+        if len(data) == header_size + pixel_bytes:
+            pixels = np.frombuffer(data, dtype=np.uint8, count=pixel_bytes, offset=header_size)
+            return RawScreenshot(pixels.reshape(height, width, 4), pixel_format)
+    return None
+
+def capture_screen_raw(device_id: str) -> Optional[RawScreenshot]:
+    """Capture the unencoded framebuffer, skipping PNG encoding on the device"""
+    try:
+        data = run_exec_out(device_id, ['screencap'])
+        if not data:
+            app_logger.error("Failed to capture raw screen")
+            return None
+
+        raw = parse_raw_screencap(data)
+        if raw is None:
+            app_logger.warning(
+                f"Unrecognised raw screencap header from {device_id}, falling back to PNG capture"
+            )
+            _raw_unsupported.add(device_id)
+        return raw
+
+    except Exception as e:
+        app_logger.error(f"Error capturing raw screen: {e}")
+        return None
+
+def grab_screen(device_id: str) -> Optional[Union[RawScreenshot, np.ndarray]]:
+    """Capture the screen, leaving a raw framebuffer unconverted
+
+    Uses the backend selected by ``capture.backend`` in config.json: ``raw``
+    reads the unencoded framebuffer and returns it as a RawScreenshot,
+    ``png`` (default) decodes the PNG produced by ``screencap -p`` into a BGR
+    image. Both stream over ``exec-out`` so nothing touches the device or
+    local disk.
+    """
+    screen = None
+    backend = CONFIG.get('capture', {}).get('backend', 'png')
+    if backend == 'raw' and device_id not in _raw_unsupported:
+        screen = capture_screen_raw(device_id)
+
+    if screen is None:
+        screen = _capture_screen_png(device_id)
+
+    if screen is not None:
+        height, width = screen.shape[:2]
+        check_frame_geometry(device_id, width, height)
+    return screen
+
+def capture_screen(device_id: str) -> Optional[np.ndarray]:
+    """Capture the screen into memory as a BGR image"""
+    screen = grab_screen(device_id)
+    if isinstance(screen, RawScreenshot):
+        return screen.bgr()
+    return screen
+
+def _capture_screen_png(device_id: str) -> Optional[np.ndarray]:
+    """Capture the screen as PNG and decode it in memory"""
+    try:
+        data = run_exec_out(device_id, ['screencap', '-p'])
+        if not data:
+            app_logger.error("Failed to capture screen")
+            return None
+
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            app_logger.error(f"Failed to decode screen capture ({len(data)} bytes)")
+            return None
+
+        return img
+
+    except Exception as e:
+        app_logger.error(f"Error capturing screen: {e}")
+        return None
+
 def take_screenshot(device_id: str) -> bool:
-    """Take screenshot and pull to local tmp directory"""
+    """Take screenshot and save it to screen.png in the device's temp directory"""
     try:
-        ensure_dir("tmp")
-        
-        # Take screenshot on device
-        cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell screencap -p /sdcard/screen.png"
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            app_logger.error(f"Failed to take screenshot: {result.stderr}")
+        img = capture_screen(device_id)
+        if img is None:
             return False
-            
-        # Pull screenshot to local tmp directory
-        cmd = f"{CONFIG.adb['binary_path']} -s {device_id} pull /sdcard/screen.png tmp/screen.png"
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            app_logger.error(f"Failed to pull screenshot: {result.stderr}")
+
+        if not cv2.imwrite(tmp_path(device_id, "screen.png"), img):
+            app_logger.error("Failed to save screenshot")
             return False
-            
-        # Clean up device screenshots
-        cleanup_device_screenshots(device_id)
         return True
         
     except Exception as e:
@@ -35,17 +160,14 @@ def take_screenshot(device_id: str) -> bool:
         return False
 
 def get_screen_size(device_id: str) -> Tuple[int, int]:
-    """Get screen size from device"""
+    """Get screen size from the device properties cache"""
     try:
-        cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell wm size"
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            app_logger.error(f"Failed to get screen size: {result.stderr}")
+        properties = get_device_properties(device_id)
+        if properties is None:
+            app_logger.error("Failed to get screen size")
             return (1920, 1080)  # Default fallback
-            
-        # Parse output like "Physical size: 1920x1080"
-        size = result.stdout.strip().split(": ")[1].split("x")
-        return (int(size[0]), int(size[1]))
+
+        return properties.screen_size
         
     except Exception as e:
         app_logger.error(f"Error getting screen size: {e}")
@@ -54,20 +176,32 @@ def get_screen_size(device_id: str) -> Tuple[int, int]:
 def cleanup_device_screenshots(device_id: str) -> None:
     """Clean up screenshots from device"""
     try:
-        cmd = f"{CONFIG.adb['binary_path']} -s {device_id} shell rm -f /sdcard/screen*.png"
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
+        if run_shell(device_id, ['rm', '-f', '/sdcard/screen*.png']) is not None:
             app_logger.debug("Cleaned up device screenshots")
         else:
-            app_logger.warning(f"Failed to clean device screenshots: {result.stderr}")
+            app_logger.warning("Failed to clean device screenshots")
     except Exception as e:
         app_logger.error(f"Error cleaning device screenshots: {e}")
 
-def cleanup_temp_files() -> None:
-    """Clean up temporary files"""
+def device_tmp_dir(device_id: str, create: bool = True) -> Path:
+    """Get the temp directory of a device, e.g. tmp/127.0.0.1_5555"""
+    tmp_dir = Path("tmp") / re.sub(r'[^A-Za-z0-9._-]', '_', device_id)
+    if create:
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tmp_dir
+
+def tmp_path(device_id: Optional[str], filename: str) -> str:
+    """Path of a temp file, inside the device's temp directory when known"""
+    if device_id:
+        return str(device_tmp_dir(device_id) / filename)
+    ensure_dir("tmp")
+    return f"tmp/{filename}"
+
+def cleanup_temp_files(device_id: Optional[str] = None) -> None:
+    """Clean up temporary files, only those of one device if device_id is given"""
     try:
         # Remove entire tmp directory and its contents recursively
-        tmp_dir = Path("tmp")
+        tmp_dir = device_tmp_dir(device_id, create=False) if device_id else Path("tmp")
         if tmp_dir.exists():
             for item in tmp_dir.iterdir():
                 try:
@@ -82,7 +216,7 @@ def cleanup_temp_files() -> None:
             
             try:
                 tmp_dir.rmdir()
-                app_logger.debug("Cleaned up main temporary directory")
+                app_logger.debug(f"Cleaned up temporary directory {tmp_dir}")
             except Exception as e:
                 app_logger.warning(f"Failed to delete tmp directory: {e}")
     except Exception as e:
@@ -91,7 +225,7 @@ def cleanup_temp_files() -> None:
 def cleanup(device_id: str) -> None:
     """Cleanup device and local temp files"""
     cleanup_device_screenshots(device_id)
-    cleanup_temp_files()
+    cleanup_temp_files(device_id)
 
 def ensure_dir(path: str) -> None:
     """Ensure directory exists"""
@@ -0,0 +1,109 @@
+"""Per-device cache of display and build properties"""
+
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from .adb import run_shell
+from .logging import app_logger
+
+# One shell round trip for everything we cache. The orientation line is
+# missing on some devices, so the probe must not fail with grep's status;
+# a missing orientation is parsed as 0.
+_PROBE_COMMAND = (
+    "wm size; "
+    "wm density; "
+    "echo sdk=$(getprop ro.build.version.sdk); "
+    "dumpsys input | grep -m 1 SurfaceOrientation; "
+    "true"
+)
+
+
+class DeviceProperties:
+    """Display and build properties of a device"""
+
+    def __init__(self, width: int, height: int, density: int, orientation: int, sdk_level: int):
+        self.width = width
+        self.height = height
+        self.density = density
+        self.orientation = orientation
+        self.sdk_level = sdk_level
+
+    @property
+    def screen_size(self) -> Tuple[int, int]:
+        """Screen size as captured, accounting for landscape rotation"""
+        if self.orientation in (1, 3):
+            return self.height, self.width
+        return self.width, self.height
+
+    def __repr__(self) -> str:
+        return (
+            f"DeviceProperties({self.width}x{self.height}, density={self.density}, "
+            f"orientation={self.orientation}, sdk={self.sdk_level})"
+        )
+
+
+_cache: Dict[str, DeviceProperties] = {}
+_cache_lock = threading.Lock()
+
+def _last_match(pattern: str, text: str) -> Optional[re.Match]:
+    """Last match of pattern, so override values win over physical ones"""
+    matches = list(re.finditer(pattern, text))
+    return matches[-1] if matches else None
+
+def _parse_properties(output: str) -> Optional[DeviceProperties]:
+    """Parse the probe command output"""
+    size = _last_match(r'size:\s*(\d+)x(\d+)', output)
+    if size is None:
+        return None
+
+    density = _last_match(r'density:\s*(\d+)', output)
+    sdk = _last_match(r'sdk=(\d+)', output)
+    orientation = _last_match(r'SurfaceOrientation:\s*(\d)', output)
+
+    return DeviceProperties(
+        width=int(size.group(1)),
+        height=int(size.group(2)),
+        density=int(density.group(1)) if density else 0,
+        orientation=int(orientation.group(1)) if orientation else 0,
+        sdk_level=int(sdk.group(1)) if sdk else 0
+    )
+
+def load_device_properties(device_id: str) -> Optional[DeviceProperties]:
+    """Query the device and refresh its cached properties"""
+    output = run_shell(device_id, [_PROBE_COMMAND])
+    properties = _parse_properties(output or "")
+    if properties is None:
+        app_logger.error(f"Failed to read device properties for {device_id}")
+        return None
+
+    with _cache_lock:
+        _cache[device_id] = properties
+    app_logger.debug(f"Loaded properties for {device_id}: {properties}")
+    return properties
+
+def get_device_properties(device_id: str) -> Optional[DeviceProperties]:
+    """Get cached device properties, loading them on first use"""
+    properties = _cache.get(device_id)
+    if properties is None:
+        properties = load_device_properties(device_id)
+    return properties
+
+def invalidate_device_properties(device_id: str) -> None:
+    """Drop cached properties so the next access probes the device again"""
+    with _cache_lock:
+        _cache.pop(device_id, None)
+
+def check_frame_geometry(device_id: str, width: int, height: int) -> None:
+    """Invalidate the cache when a captured frame contradicts it
+
+    Every capture already tells us the current display geometry, so this is
+    the rotation/display-change probe and it costs nothing extra.
+    """
+    properties = _cache.get(device_id)
+    if properties is not None and properties.screen_size != (width, height):
+        app_logger.info(
+            f"Display of {device_id} changed from {properties.screen_size[0]}x{properties.screen_size[1]} "
+            f"to {width}x{height}, refreshing device properties"
+        )
+        invalidate_device_properties(device_id)
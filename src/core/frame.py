@@ -0,0 +1,151 @@
+"""Screen snapshots shared across the lookups of one decision step"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .adb import get_input_generation
+from .config import CONFIG
+from .device import RawScreenshot, grab_screen
+from .frame_stream import get_stream_frame
+from .logging import app_logger
+
+
+class Frame:
+    """One captured screen, tagged with the input generation it belongs to
+
+    The pixels are shared by every lookup that receives the frame, so they
+    are read-only; callers that draw on it must copy first. A raw screencap
+    is kept as is and only converted to BGR when ``image`` is first read, so
+    lookups that need just the geometry or the grayscale frame skip that
+    conversion.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        image: Union[np.ndarray, RawScreenshot],
+        generation: int,
+        timestamp: Optional[float] = None
+    ):
+        self.device_id = device_id
+        self.generation = generation
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self._raw: Optional[RawScreenshot] = None
+        self._image: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._scaled_gray: Dict[float, np.ndarray] = {}
+
+        if isinstance(image, RawScreenshot):
+            self._raw = image
+        else:
+            self._image = self._read_only(image)
+
+    @staticmethod
+    def _read_only(image: np.ndarray) -> np.ndarray:
+        if image.flags.writeable:
+            image = image.view()
+            image.flags.writeable = False
+        return image
+
+    @property
+    def image(self) -> np.ndarray:
+        """BGR pixels of the frame, converted from a raw capture on first use"""
+        if self._image is None:
+            self._image = self._read_only(self._raw.bgr())
+        return self._image
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        if self._image is None:
+            height, width = self._raw.shape
+            return height, width, 3
+        return self._image.shape
+
+    @property
+    def age(self) -> float:
+        """Seconds since the frame was captured"""
+        return time.time() - self.timestamp
+
+    def gray(self) -> np.ndarray:
+        """Grayscale version of the frame, converted once"""
+        if self._gray is None:
+            if self._image is None:
+                gray = self._raw.gray()
+            else:
+                gray = cv2.cvtColor(self._image, cv2.COLOR_BGR2GRAY)
+            gray.flags.writeable = False
+            self._gray = gray
+        return self._gray
+
+    def scaled_gray(self, scale: float) -> np.ndarray:
+        """Grayscale frame downscaled by a factor, cached per scale"""
+        if scale == 1.0:
+            return self.gray()
+        key = round(scale, 4)
+        scaled = self._scaled_gray.get(key)
+        if scaled is None:
+            height, width = self.shape[:2]
+            size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            scaled = cv2.resize(self.gray(), size, interpolation=cv2.INTER_AREA)
+            scaled.flags.writeable = False
+            self._scaled_gray[key] = scaled
+        return scaled
+
+    def is_current(self, max_age: Optional[float] = None) -> bool:
+        """Check that no input happened since capture and the frame is fresh enough"""
+        if self.generation != get_input_generation(self.device_id):
+            return False
+        return max_age is None or self.age <= max_age
+
+    @classmethod
+    def wrap(cls, device_id: str, image: Union[np.ndarray, RawScreenshot]) -> 'Frame':
+        """Wrap an image captured elsewhere as a frame of the current generation"""
+        return cls(device_id, image, get_input_generation(device_id))
+
+
+_current_frames: Dict[str, Frame] = {}
+_current_frames_lock = threading.Lock()
+
+def _max_frame_age() -> float:
+    return CONFIG.get('capture', {}).get('frame_max_age', 0.5)
+
+def capture_frame(device_id: str) -> Optional[Frame]:
+    """Capture a new frame and make it the device's current frame
+
+    Uses the newest streamed frame instead when a frame stream is running.
+    A raw screencap reaches the frame unconverted.
+    """
+    generation = get_input_generation(device_id)
+    img = get_stream_frame(device_id)
+    if img is None:
+        img = grab_screen(device_id)
+    if img is None:
+        app_logger.error("Failed to take screenshot")
+        return None
+
+    frame = Frame(device_id, img, generation)
+    with _current_frames_lock:
+        _current_frames[device_id] = frame
+    return frame
+
+def get_current_frame(device_id: str, fresh: bool = False) -> Optional[Frame]:
+    """Get the device's current frame, capturing only when it went stale
+
+    A frame is reused until an input action is sent or it exceeds
+    capture.frame_max_age, so every lookup between two inputs shares one
+    capture. Pass fresh=True to force a new capture, e.g. when polling.
+    """
+    if not fresh:
+        frame = _current_frames.get(device_id)
+        if frame is not None and frame.is_current(_max_frame_age()):
+            return frame
+    return capture_frame(device_id)
+
+def invalidate_frame(device_id: str) -> None:
+    """Drop the device's current frame"""
+    with _current_frames_lock:
+        _current_frames.pop(device_id, None)
@@ -0,0 +1,110 @@
+"""Block-wise difference between two frames
+
+Frames are compared as downsampled grayscale images split into blocks; a
+block counts as changed when its mean absolute difference exceeds a
+threshold. This is cheap enough to run on every captured frame and says
+where the screen changed, not just whether it did.
+"""
+
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .config import CONFIG
+from .frame import Frame
+
+Rect = Tuple[int, int, int, int]
+
+
+class FrameDiff:
+    """Result of comparing two frames
+
+    score is the fraction of unchanged blocks (1.0 means identical), changed
+    holds (x1, y1, x2, y2) rectangles in full-resolution coordinates and
+    stable tells whether the change is small enough to call the screen still.
+    """
+
+    def __init__(self, score: float, changed: List[Rect], stable: bool):
+        self.score = score
+        self.changed = changed
+        self.stable = stable
+
+    def __repr__(self) -> str:
+        return f"FrameDiff(score={self.score:.3f}, changed={len(self.changed)}, stable={self.stable})"
+
+
+def _settings() -> dict:
+    return CONFIG.get('frame_diff', {})
+
+def _downsampled_gray(image: Union[Frame, np.ndarray], scale: float) -> np.ndarray:
+    """Grayscale image at scale, reusing the frame's cached version when possible"""
+    if isinstance(image, Frame):
+        return image.scaled_gray(scale)
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if scale == 1.0:
+        return gray
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+def _block_means(diff: np.ndarray, block_size: int) -> np.ndarray:
+    """Mean of each block_size x block_size block, edge blocks included"""
+    height, width = diff.shape
+    rows = -(-height // block_size)
+    cols = -(-width // block_size)
+    padded = np.zeros((rows * block_size, cols * block_size), dtype=np.float32)
+    padded[:height, :width] = diff
+    sums = padded.reshape(rows, block_size, cols, block_size).sum(axis=(1, 3))
+
+    counts = np.full((rows, cols), block_size * block_size, dtype=np.float32)
+    if height % block_size:
+        counts[-1, :] = (height % block_size) * block_size
+    if width % block_size:
+        counts[:, -1] = counts[:, -1] / block_size * (width % block_size)
+    return sums / counts
+
+def diff_frames(
+    a: Union[Frame, np.ndarray],
+    b: Union[Frame, np.ndarray],
+    block_threshold: Optional[float] = None
+) -> FrameDiff:
+    """Compare two frames block by block
+
+    block_threshold overrides the configured mean difference a block needs
+    to count as changed.
+    """
+    settings = _settings()
+    scale = settings.get('scale', 0.25)
+    block_size = settings.get('block_size', 8)
+    if block_threshold is None:
+        block_threshold = settings.get('block_threshold', 10.0)
+    stable_fraction = settings.get('stable_fraction', 0.0)
+
+    shape_a = a.shape[:2]
+    shape_b = b.shape[:2]
+    if shape_a != shape_b:
+        height, width = shape_b
+        return FrameDiff(0.0, [(0, 0, width, height)], False)
+
+    small_a = _downsampled_gray(a, scale)
+    small_b = _downsampled_gray(b, scale)
+    means = _block_means(cv2.absdiff(small_a, small_b), block_size)
+    changed_mask = means > block_threshold
+
+    changed_fraction = float(changed_mask.mean())
+    score = 1.0 - changed_fraction
+
+    # Merge touching changed blocks into rectangles
+    changed = []
+    if changed_mask.any():
+        count, _, stats, _ = cv2.connectedComponentsWithStats(changed_mask.astype(np.uint8), connectivity=8)
+        height, width = shape_a
+        factor = block_size / scale
+        for x, y, w, h, _ in stats[1:count]:
+            changed.append((
+                int(x * factor),
+                int(y * factor),
+                min(width, int((x + w) * factor)),
+                min(height, int((y + h) * factor))
+            ))
+
+    return FrameDiff(score, changed, changed_fraction <= stable_fraction)
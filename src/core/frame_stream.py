@@ -0,0 +1,290 @@
+"""Continuous screen stream with a latest-frame buffer"""
+
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .adb import flush_input, get_last_input_time
+from .config import CONFIG
+from .device import get_screen_size
+from .logging import app_logger
+
+# screenrecord refuses to run longer than this
+SCREENRECORD_TIME_LIMIT = 180
+
+
+class FrameStream:
+    """Decode ``screenrecord`` output on a background thread
+
+    ``screenrecord`` streams H.264 over ``exec-out`` into ffmpeg, which
+    emits raw BGR frames at the configured downscaled size. Only the newest
+    frame is kept. The stream shuts itself down when nobody has read a frame
+    for ``idle_timeout`` seconds and restarts whenever screenrecord exits
+    because of its time limit.
+    """
+
+    MAX_FAILURES = 3
+
+    def __init__(
+        self,
+        device_id: str,
+        size: Tuple[int, int],
+        screen_size: Tuple[int, int],
+        bit_rate: int = 4000000,
+        idle_timeout: float = 30.0,
+        settle_time: float = 0.5
+    ):
+        self.device_id = device_id
+        self.size = size
+        self.screen_size = screen_size
+        self.bit_rate = bit_rate
+        self.idle_timeout = idle_timeout
+        self.settle_time = settle_time
+
+        self._lock = threading.Lock()
+        self._frame: Optional[np.ndarray] = None
+        self._frame_time = 0.0
+        self._scaled: Optional[np.ndarray] = None
+        self._last_access = time.time()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._processes: List[subprocess.Popen] = []
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the decoder thread if it is not already running
+
+        Every start gets its own stop event, so the idle watcher of an earlier
+        run can only ever stop that run and exits along with it.
+        """
+        with self._lock:
+            self._last_access = time.time()
+            if self.running:
+                return
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(self._stop_event,),
+                name=f"frame-stream-{self.device_id}",
+                daemon=True
+            )
+            self._thread.start()
+            threading.Thread(
+                target=self._watch_idle,
+                args=(self._stop_event,),
+                name=f"frame-stream-idle-{self.device_id}",
+                daemon=True
+            ).start()
+        app_logger.debug(f"Started frame stream for {self.device_id} at {self.size[0]}x{self.size[1]}")
+
+    def stop(self) -> None:
+        """Stop streaming and drop the buffered frame"""
+        with self._lock:
+            self._stop_event.set()
+            thread, self._thread = self._thread, None
+        self._kill_processes()
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        with self._lock:
+            self._frame = None
+            self._scaled = None
+
+    def latest(self) -> Optional[np.ndarray]:
+        """Get the newest frame at screen resolution
+
+        Returns None when no frame is buffered or when the buffered frame may
+        predate the last input: screenrecord only emits frames on change, so
+        an old frame is current unless an input landed after it and the
+        screen has not had ``settle_time`` to react.
+        """
+        self._last_access = time.time()
+        if not self.running:
+            return None
+
+        with self._lock:
+            if self._frame is None:
+                return None
+
+            last_input = get_last_input_time(self.device_id)
+            if self._frame_time < last_input and time.time() - last_input < self.settle_time:
+                return None
+
+            if self._scaled is None:
+                if (self._frame.shape[1], self._frame.shape[0]) == self.screen_size:
+                    self._scaled = self._frame
+                else:
+                    self._scaled = cv2.resize(self._frame, self.screen_size, interpolation=cv2.INTER_LINEAR)
+                    # Shared between consumers, so nobody may draw on it
+                    self._scaled.flags.writeable = False
+            return self._scaled
+
+    def _spawn(self, stop_event: threading.Event) -> List[subprocess.Popen]:
+        """Start screenrecord piped into ffmpeg, returning both processes"""
+        width, height = self.size
+        record = subprocess.Popen(
+            [
+                CONFIG.adb["binary_path"], '-s', self.device_id, 'exec-out',
+                'screenrecord', '--output-format=h264',
+                '--size', f"{width}x{height}",
+                '--bit-rate', str(self.bit_rate),
+                '--time-limit', str(SCREENRECORD_TIME_LIMIT),
+                '-'
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        decoder = subprocess.Popen(
+            [
+                CONFIG.get('frame_stream', {}).get('ffmpeg_path', 'ffmpeg'),
+                '-loglevel', 'error',
+                '-fflags', 'nobuffer', '-flags', 'low_delay',
+                '-f', 'h264', '-i', 'pipe:0',
+                '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1'
+            ],
+            stdin=record.stdout,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        # Let ffmpeg own the pipe so screenrecord sees EOF if ffmpeg exits
+        record.stdout.close()
+        processes = [record, decoder]
+        with self._lock:
+            stopped = stop_event.is_set()
+            if not stopped:
+                self._processes = processes
+        # A stop that ran while spawning found nothing to kill
+        if stopped:
+            self._kill_processes(processes)
+        return processes
+
+    def _kill_processes(self, processes: Optional[List[subprocess.Popen]] = None) -> None:
+        """Kill a pipeline, by default the current one; safe from any thread"""
+        with self._lock:
+            if processes is None:
+                processes = self._processes
+            if processes is self._processes:
+                self._processes = []
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+
+    def _watch_idle(self, stop_event: threading.Event) -> None:
+        """Shut the stream down once nobody has read a frame for a while
+
+        Runs separately because the decoder thread blocks on reads while the
+        screen is static and screenrecord emits nothing.
+        """
+        while not stop_event.wait(1.0):
+            if time.time() - self._last_access > self.idle_timeout:
+                app_logger.debug(f"Frame stream for {self.device_id} idle, shutting down")
+                stop_event.set()
+                self._kill_processes()
+
+    def _run(self, stop_event: threading.Event) -> None:
+        """Decoder loop, restarting the pipeline whenever screenrecord exits"""
+        width, height = self.size
+        frame_bytes = width * height * 3
+        failures = 0
+
+        while not stop_event.is_set():
+            try:
+                processes = self._spawn(stop_event)
+            except OSError as e:
+                app_logger.error(f"Failed to start frame stream: {e}")
+                break
+
+            decoder = processes[-1]
+            frames = 0
+            while not stop_event.is_set():
+                data = decoder.stdout.read(frame_bytes)
+                if len(data) < frame_bytes:
+                    break
+
+                frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+                with self._lock:
+                    self._frame = frame
+                    self._frame_time = time.time()
+                    self._scaled = None
+                frames += 1
+
+            self._kill_processes(processes)
+
+            if stop_event.is_set():
+                break
+
+            # Screenrecord hit its time limit or the pipeline broke
+            failures = 0 if frames else failures + 1
+            if failures >= self.MAX_FAILURES:
+                app_logger.error(f"Frame stream for {self.device_id} produced no frames, giving up")
+                break
+            app_logger.debug(f"Restarting frame stream for {self.device_id}")
+
+        # Let the idle watcher of this run exit too, and keep a newer run's frame
+        stop_event.set()
+        with self._lock:
+            if stop_event is self._stop_event:
+                self._frame = None
+                self._scaled = None
+
+
+_streams: Dict[str, FrameStream] = {}
+_streams_lock = threading.Lock()
+
+def stream_size(screen_size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    """Stream resolution for a screen, keeping its aspect ratio
+
+    Both sides are rounded to even numbers, which the H.264 encoder needs.
+    """
+    return tuple(max(2, round(side * scale / 2) * 2) for side in screen_size)
+
+def start_frame_stream(device_id: str) -> Optional[FrameStream]:
+    """Start (or keep alive) the frame stream for a device if enabled in config"""
+    stream_config = CONFIG.get('frame_stream', {})
+    if not stream_config.get('enabled', False):
+        return None
+
+    with _streams_lock:
+        stream = _streams.get(device_id)
+        if stream is None:
+            screen_size = get_screen_size(device_id)
+            stream = FrameStream(
+                device_id,
+                size=stream_size(screen_size, stream_config.get('scale', 0.5)),
+                screen_size=screen_size,
+                bit_rate=stream_config.get('bit_rate', 4000000),
+                idle_timeout=stream_config.get('idle_timeout', 30.0),
+                settle_time=stream_config.get('settle_time', 0.5)
+            )
+            _streams[device_id] = stream
+        stream.start()
+        return stream
+
+def get_stream_frame(device_id: str) -> Optional[np.ndarray]:
+    """Get the newest streamed frame for a device, or None if not streaming"""
+    stream = _streams.get(device_id)
+    if stream is None:
+        return None
+    flush_input(device_id)
+    return stream.latest()
+
+def stop_frame_stream(device_id: str) -> None:
+    """Stop the frame stream of one device"""
+    with _streams_lock:
+        stream = _streams.pop(device_id, None)
+    if stream is not None:
+        stream.stop()
+
+def stop_frame_streams() -> None:
+    """Stop all frame streams"""
+    with _streams_lock:
+        streams = list(_streams.values())
+        _streams.clear()
+    for stream in streams:
+        stream.stop()
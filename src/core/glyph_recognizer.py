@@ -0,0 +1,273 @@
+"""Closed-vocabulary alliance tag recognizer built on learned glyphs
+
+Alliance tags come from a short whitelist and are drawn in the game's pixel
+font, so a tag can be read by cutting the binarised crop into glyphs and
+matching each against reference glyphs. References are learned from
+Tesseract reads that parsed to a whitelisted tag and are stored as small
+images in ``state/glyphs/<code point>/``. A row is decoded to the whitelist
+entry whose glyphs match best, and is only accepted when every glyph looks
+more like its tag character than like any other learned character; callers
+fall back to Tesseract otherwise.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import CONFIG
+from .logging import app_logger
+
+OPENING = "[("
+CLOSING = "])"
+
+
+class GlyphMatch:
+    """Decoded tag with its mean and weakest glyph similarity
+
+    margin is the smallest lead of a tag glyph over the best other character.
+    """
+
+    def __init__(self, tag: str, confidence: float, weakest: float, margin: float):
+        self.tag = tag
+        self.confidence = confidence
+        self.weakest = weakest
+        self.margin = margin
+
+    def __repr__(self) -> str:
+        return (
+            f"GlyphMatch({self.tag}, confidence={self.confidence:.3f}, "
+            f"weakest={self.weakest:.3f}, margin={self.margin:.3f})"
+        )
+
+
+def _settings() -> dict:
+    return CONFIG.get('ocr_settings', {}).get('glyphs', {})
+
+def _whitelist() -> List[str]:
+    return CONFIG.get('control_list', {}).get('whitelist', {}).get('alliance', [])
+
+def _segment(binary: np.ndarray) -> Tuple[List[np.ndarray], int]:
+    """Glyph images of the text line in a binary crop, plus the line height
+
+    The line is the run of rows around the densest row; glyphs are the runs
+    of columns with ink in it, each spanning the full line height so that
+    case differences (s/S) survive normalization.
+    """
+    ink = binary > 127
+    if ink.mean() > 0.5:
+        ink = ~ink
+
+    row_ink = ink.sum(axis=1)
+    if not row_ink.any():
+        return [], 0
+    top = bottom = int(np.argmax(row_ink))
+    while top > 0 and row_ink[top - 1]:
+        top -= 1
+    while bottom < len(row_ink) - 1 and row_ink[bottom + 1]:
+        bottom += 1
+    line = ink[top:bottom + 1]
+
+    columns = np.concatenate(([False], line.any(axis=0), [False]))
+    edges = np.flatnonzero(columns[1:] != columns[:-1])
+    glyphs = [line[:, start:end] for start, end in zip(edges[::2], edges[1::2])]
+    return glyphs, line.shape[0]
+
+def _normalize(glyph: np.ndarray, line_height: int) -> np.ndarray:
+    """Glyph scaled to the configured height and centred in a fixed-size cell"""
+    width, height = _settings().get('glyph_size', [16, 16])
+    scale = height / line_height
+    glyph_width = min(width, max(1, round(glyph.shape[1] * scale)))
+    resized = cv2.resize(glyph.astype(np.uint8) * 255, (glyph_width, height), interpolation=cv2.INTER_AREA)
+    cell = np.zeros((height, width), dtype=np.uint8)
+    left = (width - glyph_width) // 2
+    cell[:, left:left + glyph_width] = resized
+    return cell
+
+def _vector(cell: np.ndarray) -> np.ndarray:
+    """Zero-mean, unit-length vector, so a dot product is a correlation"""
+    vector = cell.astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class GlyphRecognizer:
+    """Learned reference glyphs and tag decoding against the whitelist"""
+
+    def __init__(self, glyphs_dir: str = "state/glyphs"):
+        self.glyphs_dir = Path(glyphs_dir)
+        self._samples: Dict[str, List[np.ndarray]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._labels: List[str] = []
+        self._owners = np.array([])
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _rebuild(self) -> None:
+        self._labels = sorted(self._samples)
+        vectors = [vector for label in self._labels for vector in self._samples[label]]
+        self._matrix = np.stack(vectors) if vectors else None
+        self._owners = np.array([label for label in self._labels for _ in self._samples[label]])
+
+    def load(self) -> None:
+        """Load the reference glyphs saved by earlier runs"""
+        with self._lock:
+            self._samples = {}
+            if self.glyphs_dir.is_dir():
+                for char_dir in sorted(p for p in self.glyphs_dir.iterdir() if p.is_dir()):
+                    try:
+                        char = chr(int(char_dir.name, 16))
+                    except ValueError:
+                        continue
+                    for path in sorted(char_dir.glob("*.png")):
+                        cell = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+                        if cell is not None:
+                            self._samples.setdefault(char, []).append(_vector(cell))
+            self._rebuild()
+            self._loaded = True
+            if self._samples:
+                count = sum(len(samples) for samples in self._samples.values())
+                app_logger.debug(f"Loaded {count} reference glyphs for {len(self._samples)} characters")
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def _similarities(self, glyphs: List[np.ndarray], line_height: int) -> np.ndarray:
+        """Best similarity of every glyph to every known character"""
+        scores = np.stack([_vector(_normalize(glyph, line_height)) for glyph in glyphs]) @ self._matrix.T
+        return np.stack([scores[:, self._owners == label].max(axis=1) for label in self._labels], axis=1)
+
+    def recognize(self, binary: np.ndarray) -> Optional[GlyphMatch]:
+        """Whitelist entry whose glyphs best match a binary crop
+
+        None when there are no reference glyphs for it or the glyph count
+        fits no whitelist entry.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._matrix is None:
+                return None
+            glyphs, line_height = _segment(binary)
+            if not glyphs:
+                return None
+            similarities = self._similarities(glyphs, line_height)
+            labels = self._labels
+
+        # Drop glyphs that read as the brackets around the tag
+        best = [labels[i] for i in similarities.argmax(axis=1)]
+        start, end = 0, len(best)
+        while start < end and best[start] in OPENING:
+            start += 1
+        while end > start and best[end - 1] in CLOSING:
+            end -= 1
+        similarities = similarities[start:end]
+
+        index = {label: i for i, label in enumerate(labels)}
+        scored = []
+        for tag in _whitelist():
+            if len(tag) != len(similarities) or any(char not in index for char in tag):
+                continue
+            glyph_scores = similarities[np.arange(len(tag)), [index[char] for char in tag]]
+            scored.append((float(glyph_scores.mean()), tag, glyph_scores))
+        if not scored:
+            return None
+
+        confidence, tag, glyph_scores = max(scored, key=lambda item: item[0])
+
+        # The alternative to every whitelist entry is the best character for each
+        # glyph on its own, including learned non-member characters. The margin
+        # is the smallest lead of a tag glyph over any other character, so it
+        # is negative as soon as one glyph looks more like something else.
+        others = similarities.copy()
+        others[np.arange(len(tag)), [index[char] for char in tag]] = -np.inf
+        leads = glyph_scores - others.max(axis=1) if len(labels) > 1 else glyph_scores
+        return GlyphMatch(tag, confidence, float(glyph_scores.min()), float(leads.min()))
+
+    def wants_samples(self, text: str) -> bool:
+        """Check whether any character of a read still needs reference glyphs"""
+        self._ensure_loaded()
+        max_samples = _settings().get('max_samples', 8)
+        return any(
+            len(self._samples.get(char, [])) < max_samples
+            for char in text if char.isalnum() or char in OPENING + CLOSING
+        )
+
+    def learn(self, binary: np.ndarray, text: str, tag: str) -> int:
+        """Store the glyphs of a crop whose tag was confirmed by Tesseract
+
+        Callers must confirm the read independently, since Tesseract with the
+        alliance whitelist coerces any glyph into a whitelisted character.
+        Characters outside the whitelist are learned too, so non-member tags
+        have something better to match than the nearest whitelisted glyph.
+        The glyphs are labelled with the raw OCR text or the tag, with or
+        without brackets, whichever has as many characters as there are
+        glyphs. Returns the number of new reference glyphs.
+        """
+        glyphs, line_height = _segment(binary)
+        if not glyphs:
+            return 0
+        candidates = ["".join(text.split()), f"[{tag}]", f"[{tag}", f"{tag}]", tag]
+        labels = next((c for c in candidates if len(c) == len(glyphs)), None)
+        if labels is None:
+            return 0
+
+        settings = _settings()
+        max_samples = settings.get('max_samples', 8)
+        duplicate = settings.get('duplicate_similarity', 0.97)
+        learned = 0
+        self._ensure_loaded()
+        with self._lock:
+            for char, glyph in zip(labels, glyphs):
+                if not (char.isascii() and char.isalnum()) and char not in OPENING + CLOSING:
+                    continue
+                samples = self._samples.setdefault(char, [])
+                if len(samples) >= max_samples:
+                    continue
+                cell = _normalize(glyph, line_height)
+                vector = _vector(cell)
+                if samples and max(float(sample @ vector) for sample in samples) >= duplicate:
+                    continue
+
+                path = self.glyphs_dir / f"{ord(char):04x}" / f"{time.strftime('%Y%m%d_%H%M%S')}_{len(samples)}.png"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if not cv2.imwrite(str(path), cell):
+                    app_logger.error(f"Failed to save reference glyph: {path}")
+                    continue
+                samples.append(vector)
+                learned += 1
+            if learned:
+                self._rebuild()
+
+        if learned:
+            app_logger.debug(f"Learned {learned} glyphs from {tag}")
+        return learned
+
+
+GLYPH_RECOGNIZER = GlyphRecognizer()
+
+def recognize_alliance(binary: np.ndarray) -> Optional[GlyphMatch]:
+    """Read an alliance tag from its glyphs, None when not confident
+
+    Callers then fall back to Tesseract.
+    """
+    try:
+        match = GLYPH_RECOGNIZER.recognize(binary)
+        if match is None:
+            return None
+
+        app_logger.debug(f"Alliance glyphs matched {match}")
+        settings = _settings()
+        if (match.confidence < settings.get('min_confidence', 0.9)
+                or match.weakest < settings.get('min_glyph_similarity', 0.85)
+                or match.margin < settings.get('min_margin', 0.05)):
+            return None
+        return match
+
+    except Exception as e:
+        app_logger.error(f"Error matching alliance glyphs: {e}")
+        return None
@@ -1,76 +1,305 @@
 """Image processing utilities"""
 
+import asyncio
 import cv2
 import numpy as np
+import threading
 import time
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
 from .logging import app_logger
-from .device import take_screenshot
+from .async_adb import run_on_device
+from .device import tmp_path
+from .adb import get_last_input_time
+from .frame import Frame, get_current_frame
+from .frame_diff import diff_frames
 from .config import CONFIG
+from .template_store import TEMPLATES, DeviceTemplates, TemplateEntry, nominal_scale
+from .search_regions import SEARCH_REGIONS
+from .debug_artifacts import debug_enabled, write_debug_image
 import os
 
-def _load_template(template_name: str) -> Tuple[Optional[np.ndarray], Optional[dict]]:
-    """Load template and its config"""
-    template_config = CONFIG['templates'].get(template_name)
-    if not template_config:
-        app_logger.error(f"Template {template_name} not found in config")
-        return None, None
-        
-    template = cv2.imread(f"config/{template_config['path']}")
-    if template is None:
-        app_logger.error(f"Failed to load template: config/{template_config['path']}")
+def _device_templates(frame: Frame) -> DeviceTemplates:
+    """Templates rescaled for the device and resolution of a frame"""
+    return TEMPLATES.for_device(frame.device_id, (frame.shape[1], frame.shape[0]))
+
+def _load_template(template_name: str, frame: Optional[Frame] = None) -> Tuple[Optional[np.ndarray], Optional[dict]]:
+    """Get a preloaded template and its config from the template store
+
+    With a frame, the template is rescaled for that frame's device.
+    """
+    entry = _device_templates(frame).get(template_name) if frame is not None else TEMPLATES.get(template_name)
+    if entry is None:
         return None, None
         
-    return template, template_config
+    return entry.image, entry.config
 
 def _take_and_load_screenshot(device_id: str) -> Optional[np.ndarray]:
-    """Take and load a screenshot"""
-    if not take_screenshot(device_id):
-        app_logger.error("Failed to take screenshot")
+    """Get the current screen as a read-only image
+
+    Reuses the device's current frame when no input happened since it was
+    captured.
+    """
+    frame = get_current_frame(device_id)
+    if frame is None:
         return None
         
-    img = cv2.imread('tmp/screen.png')
-    if img is None:
-        app_logger.error("Failed to load screenshot")
+    return frame.image
+
+def _non_max_suppression(
+    scores: np.ndarray,
+    threshold: float,
+    w: int,
+    h: int
+) -> List[Tuple[int, int, float]]:
+    """Pick (center_x, center_y, score) hits from a score map, best first
+
+    Same result as repeatedly taking the minMaxLoc maximum and zeroing a
+    w x h box around it: every position at or above the threshold is visited
+    once in that order (score descending, row-major among ties) and kept
+    unless an earlier hit's box covers it. Positions on the flank of a peak
+    just outside that box are hits too, as they were with the zeroing loop.
+    """
+    ys, xs = np.nonzero(scores >= threshold)
+    if len(xs) == 0:
+        return []
+
+    # Stable sort keeps row-major order among equal scores, as minMaxLoc does
+    values = scores[ys, xs]
+    order = np.argsort(-values, kind='stable')
+
+    matches = []
+    suppressed = np.zeros(scores.shape, dtype=bool)
+    for x, y, value in zip(xs[order].tolist(), ys[order].tolist(), values[order].tolist()):
+        if suppressed[y, x]:
+            continue
+        matches.append((x + w//2, y + h//2, value))
+        
+        # Suppress region
+        suppressed[max(0, y - h//2):y + h//2, max(0, x - w//2):x + w//2] = True
+        
+    return matches
+
+def _match_all(img: np.ndarray, template: np.ndarray, threshold: float) -> List[Tuple[int, int, float]]:
+    """Match a template and return (center_x, center_y, score) of every hit in img"""
+    h, w = template.shape[:2]
+    if img.shape[0] < h or img.shape[1] < w:
+        return []
+        
+    result = cv2.matchTemplate(img, template, cv2.TM_CCOEFF_NORMED)
+    return _non_max_suppression(result, threshold, w, h)
+
+def _best_match(
+    img: np.ndarray,
+    template: np.ndarray,
+    region: Tuple[int, int, int, int] = None
+) -> Tuple[float, Tuple[int, int]]:
+    """Best match score and top-left location in screen coordinates"""
+    if region:
+        x1, y1, x2, y2 = region
+        img = img[y1:y2, x1:x2]
+    h, w = template.shape[:2]
+    if img.shape[0] < h or img.shape[1] < w:
+        return -1.0, (0, 0)
+        
+    result = cv2.matchTemplate(img, template, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    if region:
+        max_loc = (max_loc[0] + region[0], max_loc[1] + region[1])
+    return max_val, max_loc
+
+# Coarse matching stops shrinking once the template would get smaller than this
+MIN_COARSE_SIZE = 8
+# Candidates from the coarse pass that get confirmed at full resolution
+COARSE_CANDIDATES = 3
+# Coarse scores are lower than full resolution ones, so candidates get some slack
+COARSE_MARGIN = 0.15
+
+def _match_settings(entry: TemplateEntry) -> Tuple[bool, int]:
+    """Colour mode and pyramid levels of a template"""
+    return entry.config.get('color', True), entry.config.get('pyramid_levels', 0)
+
+def _coarse_to_fine(
+    frame: Frame,
+    entry: TemplateEntry,
+    threshold: float,
+    region: Tuple[int, int, int, int] = None
+) -> Tuple[float, Tuple[int, int]]:
+    """Best match of a template in a frame, honouring its matching mode
+
+    With pyramid_levels set, downscaled grayscale versions of the frame and
+    template are matched first; the best coarse candidates are then
+    confirmed at full resolution in a small window around each, in colour
+    or grayscale depending on the template's colour mode.
+    """
+    color, levels = _match_settings(entry)
+    source = frame.image if color else frame.gray()
+    template = entry.image if color else entry.gray
+
+    scale = 0.5 ** levels
+    while levels > 0 and min(entry.width, entry.height) * scale < MIN_COARSE_SIZE:
+        levels -= 1
+        scale *= 2
+    if levels <= 0:
+        return _best_match(source, template, region)
+
+    height, width = frame.shape[:2]
+    x1, y1, x2, y2 = region if region else (0, 0, width, height)
+    sx1, sy1 = int(x1 * scale), int(y1 * scale)
+    small = frame.scaled_gray(scale)[sy1:int(y2 * scale), sx1:int(x2 * scale)]
+    small_template = entry.resized(scale, gray=True)
+    th, tw = small_template.shape[:2]
+    if small.shape[0] < th or small.shape[1] < tw:
+        return -1.0, (0, 0)
+
+    result = cv2.matchTemplate(small, small_template, cv2.TM_CCOEFF_NORMED)
+
+    # Confirm the strongest coarse candidates in a window at full resolution
+    margin = int(round(2 / scale))
+    best_val, best_loc = -1.0, (0, 0)
+    for _ in range(COARSE_CANDIDATES):
+        _, coarse_val, _, coarse_loc = cv2.minMaxLoc(result)
+        if coarse_val < threshold - COARSE_MARGIN:
+            break
+
+        fx = int((coarse_loc[0] + sx1) / scale)
+        fy = int((coarse_loc[1] + sy1) / scale)
+        window = (
+            max(x1, fx - margin),
+            max(y1, fy - margin),
+            min(x2, fx + entry.width + margin),
+            min(y2, fy + entry.height + margin)
+        )
+        max_val, max_loc = _best_match(source, template, window)
+        if max_val > best_val:
+            best_val, best_loc = max_val, max_loc
+
+        # Suppress this candidate before looking for the next one
+        result[
+            max(0, coarse_loc[1] - th // 2):coarse_loc[1] + th // 2 + 1,
+            max(0, coarse_loc[0] - tw // 2):coarse_loc[0] + tw // 2 + 1
+        ] = -1.0
+
+    return best_val, best_loc
+
+def _match_learned(
+    frame: Frame,
+    entry: TemplateEntry,
+    threshold: float
+) -> Tuple[float, Tuple[int, int]]:
+    """Best match, searching learned regions first and the full frame on a miss"""
+    if not SEARCH_REGIONS.enabled:
+        return _coarse_to_fine(frame, entry, threshold)
+        
+    frame_size = (frame.shape[1], frame.shape[0])
+    regions = SEARCH_REGIONS.regions(entry.name, frame_size)
+    
+    # Regions covering most of the frame cost as much as a full scan
+    region_area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+    max_coverage = CONFIG.get('search_regions', {}).get('max_coverage', 0.5)
+    if region_area >= max_coverage * frame_size[0] * frame_size[1]:
+        regions = []
+    
+    start = time.perf_counter()
+    best = None
+    for region in regions:
+        max_val, max_loc = _coarse_to_fine(frame, entry, threshold, region)
+        if best is None or max_val > best[0]:
+            best = (max_val, max_loc, region)
+    if best is not None and best[0] >= threshold:
+        SEARCH_REGIONS.record_hit(entry.name, frame_size, best[2], (time.perf_counter() - start) * 1000)
+        return best[0], best[1]
+    wasted = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    max_val, max_loc = _coarse_to_fine(frame, entry, threshold)
+    SEARCH_REGIONS.record_miss(entry.name, (time.perf_counter() - start) * 1000, wasted)
+    if max_val >= threshold:
+        SEARCH_REGIONS.learn(entry.name, frame_size, (max_loc[0], max_loc[1], max_loc[0] + entry.width, max_loc[1] + entry.height))
+    return max_val, max_loc
+
+def _multi_scale_search(
+    frame: Frame,
+    templates: DeviceTemplates,
+    template_name: str,
+    threshold: float
+) -> Optional[Tuple[float, Tuple[int, int], float]]:
+    """Search scales around the nominal one for a template whose scale is unconfirmed
+
+    Returns the best (score, location, scale) above threshold, or None.
+    """
+    base = TEMPLATES.get(template_name)
+    if base is None:
         return None
         
-    return img
+    settings = CONFIG.get('template_scaling', {})
+    search_range = settings.get('search_range', 0.2)
+    step = settings.get('search_step', 0.05)
+    nominal = nominal_scale(base.config, templates.frame_size)
+    source = frame.image if base.config.get('color', True) else frame.gray()
+    
+    best = None
+    for i in range(-int(round(search_range / step)), int(round(search_range / step)) + 1):
+        scale = nominal * (1.0 + i * step)
+        if i == 0 or scale <= 0:
+            continue
+        width = max(1, int(round(base.width * scale)))
+        height = max(1, int(round(base.height * scale)))
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        template = cv2.resize(base.image if base.config.get('color', True) else base.gray, (width, height), interpolation=interpolation)
+        
+        max_val, max_loc = _best_match(source, template)
+        if max_val >= threshold and (best is None or max_val > best[0]):
+            best = (max_val, max_loc, scale)
+            
+    if best is not None:
+        app_logger.debug(f"Multi-scale search found {template_name} at scale {best[2]:.3f} ({best[0]:.3f})")
+    return best
 
 def find_template(
     device_id: str,
-    template_name: str
+    template_name: str,
+    frame: Optional[Frame] = None
 ) -> Optional[Tuple[int, int]]:
     """Find template in image and return center coordinates"""
     try:
         app_logger.debug(f"Looking for template: {template_name}")
         
-        template, template_config = _load_template(template_name)
-        if template is None:
+        # Take screenshot first, unless the caller shares a frame
+        if frame is None:
+            frame = get_current_frame(device_id)
+            if frame is None:
+                return None
+        app_logger.debug(f"Screenshot loaded successfully. Shape: {frame.shape}")
+        
+        templates = _device_templates(frame)
+        entry = templates.get(template_name)
+        if entry is None:
             app_logger.debug(f"Failed to load template: {template_name}")
             return None
             
-        app_logger.debug(f"Template loaded successfully. Shape: {template.shape}")
+        app_logger.debug(f"Template loaded successfully. Shape: {entry.image.shape}")
         
-        # Take screenshot first
-        if not take_screenshot(device_id):
-            app_logger.error("Failed to take screenshot")
-            return None
-            
-        img = cv2.imread('tmp/screen.png')
-        if img is None:
-            app_logger.debug("Failed to load screenshot")
-            return None
-            
-        app_logger.debug(f"Screenshot loaded successfully. Shape: {img.shape}")
+        # Get threshold from template config or use default
+        threshold = entry.threshold
         
-        # Match template
-        result = cv2.matchTemplate(img, template, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        # Match template, trying the regions it was found in before
+        max_val, max_loc = _match_learned(frame, entry, threshold)
         
-        # Get threshold from template config or use default
-        threshold = template_config.get('threshold', CONFIG['match_threshold'])
-        app_logger.debug(f"Match values - Max: {max_val:.4f}, Min: {min_val:.4f}, Threshold: {threshold}")
-        app_logger.debug(f"Match location - Max: {max_loc}, Min: {min_loc}")
+        # Confirm the device scale on a hit, or search other scales until one is confirmed
+        if not templates.is_validated(template_name):
+            if max_val >= threshold:
+                templates.validate(template_name)
+            elif templates.should_search(template_name):
+                scaled = _multi_scale_search(frame, templates, template_name, threshold)
+                if scaled is not None:
+                    max_val, max_loc, scale = scaled
+                    templates.validate(template_name, scale)
+                    entry = templates.get(template_name)
+                else:
+                    templates.search_failed(template_name)
+        app_logger.debug(f"Match value - Max: {max_val:.4f}, Threshold: {threshold}")
+        app_logger.debug(f"Match location - Max: {max_loc}")
         
         # Fix the threshold comparison
         if max_val < threshold:  # Remove the incorrect "threshold - -0.16"
@@ -79,13 +308,15 @@ def find_template(
             
         app_logger.debug(f"Match value {max_val:.4f} EXCEEDS threshold {threshold} !")
         
-        # Save debug image
-        debug_img = img.copy()
-        h, w = template.shape[:2]
-        cv2.rectangle(debug_img, max_loc, (max_loc[0] + w, max_loc[1] + h), (0, 255, 0), 2)
-        cv2.putText(debug_img, f"{max_val:.3f}", (max_loc[0], max_loc[1] - 5),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-        cv2.imwrite(f'tmp/debug_find_{template_name}.png', debug_img)
+        w, h = entry.size
+        
+        # Save debug image in the background, drawn on a copy by the writer
+        if debug_enabled('find'):
+            def annotate(debug_img: np.ndarray) -> None:
+                cv2.rectangle(debug_img, max_loc, (max_loc[0] + w, max_loc[1] + h), (0, 255, 0), 2)
+                cv2.putText(debug_img, f"{max_val:.3f}", (max_loc[0], max_loc[1] - 5),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            write_debug_image('find', tmp_path(device_id, f'debug_find_{template_name}.png'), frame.image, annotate)
         
         # Get template dimensions and calculate center point
         center_x = max_loc[0] + w//2
@@ -101,19 +332,22 @@ def find_template(
 def find_all_templates(
     device_id: str,
     template_name: str,
-    search_region: Tuple[int, int, int, int] = None
+    search_region: Tuple[int, int, int, int] = None,
+    frame: Optional[Frame] = None
 ) -> list[Tuple[int, int]]:
     """Find all template matches in image and return center coordinates"""
     try:
-        template, template_config = _load_template(template_name)
+        if frame is None:
+            frame = get_current_frame(device_id)
+            if frame is None:
+                return []
+        img = frame.image
+        
+        template, template_config = _load_template(template_name, frame)
         if template is None:
             return []
             
         h, w = template.shape[:2]
-        
-        img = _take_and_load_screenshot(device_id)
-        if img is None:
-            return []
             
         # Get region to search
         if search_region:
@@ -122,28 +356,8 @@ def find_all_templates(
         else:
             img_region = img
             
-        result = cv2.matchTemplate(img_region, template, cv2.TM_CCOEFF_NORMED)
         threshold = template_config.get('threshold', CONFIG['match_threshold'])
-            
-        matches = []
-        result_copy = result.copy()
-        
-        while True:
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result_copy)
-            if max_val < threshold:
-                break
-                
-            # Store match with confidence
-            center_x = max_loc[0] + w//2
-            center_y = max_loc[1] + h//2
-            matches.append((center_x, center_y, max_val))
-            
-            # Suppress region
-            x1_sup = max(0, max_loc[0] - w//2)
-            y1_sup = max(0, max_loc[1] - h//2)
-            x2_sup = min(result_copy.shape[1], max_loc[0] + w//2)
-            y2_sup = min(result_copy.shape[0], max_loc[1] + h//2)
-            result_copy[y1_sup:y2_sup, x1_sup:x2_sup] = 0
+        matches = _match_all(img_region, template, threshold)
         
         # Adjust coordinates if search region was used
         adjusted_matches = []
@@ -154,7 +368,8 @@ def find_all_templates(
             adjusted_matches.append((x, y))
             
         # Save debug image
-        _save_debug_image(img, template_config['path'], matches, search_region, (w, h))
+        if debug_enabled('find_all'):
+            _save_debug_image(img, template_config['path'], matches, search_region, (w, h), device_id)
         
         app_logger.debug(f"Found {len(matches)} matches for {template_name} with threshold {threshold}")
         return adjusted_matches
@@ -162,50 +377,250 @@ def find_all_templates(
     except Exception as e:
         app_logger.error(f"Error finding templates: {e}")
         return []
+
+class TemplateMatches:
+    """Matches of several templates against one frame
+
+    ``matches`` maps each template to its (x, y, score) hits in screen
+    coordinates, best first; ``timings`` holds the match time per template
+    in milliseconds.
+    """
+
+    def __init__(self):
+        self.matches: Dict[str, List[Tuple[int, int, float]]] = {}
+        self.timings: Dict[str, float] = {}
+        self.elapsed: float = 0.0
+
+    def get(self, template_name: str) -> List[Tuple[int, int]]:
+        """Center coordinates of every match of a template"""
+        return [(x, y) for x, y, _ in self.matches.get(template_name, [])]
+
+    def best(self, template_name: str) -> Optional[Tuple[int, int]]:
+        """Center of the highest scoring match of a template"""
+        matches = self.matches.get(template_name)
+        if not matches:
+            return None
+        x, y, _ = matches[0]
+        return (x, y)
+
+    def __contains__(self, template_name: str) -> bool:
+        return bool(self.matches.get(template_name))
+
+_match_executor: Optional[ThreadPoolExecutor] = None
+_match_executor_lock = threading.Lock()
+
+def _get_match_executor() -> ThreadPoolExecutor:
+    """Get the pool shared by all batch matches
+
+    cv2.matchTemplate releases the GIL, so plain threads scale across cores.
+    """
+    global _match_executor
+    with _match_executor_lock:
+        if _match_executor is None:
+            workers = CONFIG.get('matching', {}).get('workers') or min(4, os.cpu_count() or 1)
+            _match_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match")
+        return _match_executor
+
+def _match_one(
+    img: np.ndarray,
+    templates: DeviceTemplates,
+    template_name: str,
+    roi: Optional[Tuple[int, int, int, int]]
+) -> Tuple[List[Tuple[int, int, float]], float]:
+    """Match one template for find_templates, returning its hits and time taken"""
+    start = time.perf_counter()
+    entry = templates.get(template_name)
+    if entry is None:
+        return [], 0.0
+        
+    matches = _match_all(img, entry.image, entry.threshold)
+    if roi:
+        matches = [(x + roi[0], y + roi[1], score) for x, y, score in matches]
+    matches.sort(key=lambda m: m[2], reverse=True)
+    return matches, (time.perf_counter() - start) * 1000
+
+def find_templates(
+    frame: Frame,
+    template_names: Iterable[str],
+    roi: Tuple[int, int, int, int] = None
+) -> TemplateMatches:
+    """Match several templates against one frame in parallel
+
+    Each template uses its own threshold from config. roi limits the search
+    to (x1, y1, x2, y2); returned coordinates are always screen coordinates.
+    """
+    result = TemplateMatches()
+    start = time.perf_counter()
+    
+    img = frame.image
+    if roi:
+        x1, y1, x2, y2 = roi
+        img = img[y1:y2, x1:x2]
+        
+    templates = _device_templates(frame)
+    names = list(dict.fromkeys(template_names))
+    futures = {name: _get_match_executor().submit(_match_one, img, templates, name, roi) for name in names}
+    for name, future in futures.items():
+        try:
+            result.matches[name], result.timings[name] = future.result()
+        except Exception as e:
+            app_logger.error(f"Error matching template {name}: {e}")
+            result.matches[name], result.timings[name] = [], 0.0
+            
+    result.elapsed = (time.perf_counter() - start) * 1000
+    timings = ", ".join(f"{name} {ms:.1f}" for name, ms in result.timings.items())
+    app_logger.debug(f"Matched {len(names)} templates in {result.elapsed:.1f} ms ({timings})")
+    return result
     
+class WaitStats:
+    """Counters of all change-aware waits, compared with fixed-interval polling"""
+
+    def __init__(self):
+        self.waits = 0
+        self.captures = 0
+        self.matches = 0
+        self.matches_saved = 0
+        self.captures_saved = 0
+        self._lock = threading.Lock()
+
+    def record(self, captures: int, matches: int, matches_saved: int, captures_saved: int) -> None:
+        with self._lock:
+            self.waits += 1
+            self.captures += captures
+            self.matches += matches
+            self.matches_saved += matches_saved
+            self.captures_saved += captures_saved
+
+    def to_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "waits": self.waits,
+                "captures": self.captures,
+                "matches": self.matches,
+                "matches_saved": self.matches_saved,
+                "captures_saved": self.captures_saved
+            }
+
+WAIT_STATS = WaitStats()
+
+class _WaitPoller:
+    """Polling schedule of one wait_for_image call
+
+    Polls every min_interval right after an input, at the base interval
+    while the screen keeps changing, and backs off up to max_interval while
+    it stays the same. A frame in which no block differs from the last one
+    that failed to match, by more than wait_polling.change_threshold, is
+    not matched again.
+    """
+
+    def __init__(self, device_id: str, interval: float, deadline: float):
+        settings = CONFIG.get('wait_polling', {})
+        self.device_id = device_id
+        self.interval = interval
+        self.deadline = deadline
+        self.min_interval = settings.get('min_interval', 0.2)
+        self.max_interval = settings.get('max_interval', 2.0)
+        self.backoff = settings.get('backoff', 1.5)
+        self.input_window = settings.get('input_window', 2.0)
+        self.change_threshold = settings.get('change_threshold', 2.0)
+
+        self.start = time.time()
+        self.delay = interval
+        self.last_failed: Optional[Frame] = None
+        self.captures = 0
+        self.matches = 0
+        self.matches_saved = 0
+
+    def should_match(self, frame: Frame) -> bool:
+        """Count a capture and check whether it differs from the last failure"""
+        self.captures += 1
+        if self.last_failed is not None and not diff_frames(
+                self.last_failed, frame, block_threshold=self.change_threshold).changed:
+            self.matches_saved += 1
+            self.delay = min(self.delay * self.backoff, self.max_interval)
+            return False
+        self.matches += 1
+        return True
+
+    def failed(self, frame: Frame) -> None:
+        """Remember a frame the template was not found in"""
+        self.last_failed = frame
+        self.delay = self.interval
+
+    def next_delay(self) -> Optional[float]:
+        """Seconds to sleep before the next probe, None once the deadline passed"""
+        now = time.time()
+        remaining = self.deadline - now
+        if remaining <= 0:
+            return None
+        delay = self.delay
+        if now - get_last_input_time(self.device_id) < self.input_window:
+            delay = min(delay, self.min_interval)
+        return min(delay, remaining)
+
+    def finish(self) -> None:
+        """Add this wait to WAIT_STATS"""
+        elapsed = time.time() - self.start
+        fixed_polls = int(elapsed / self.interval) + 1 if self.interval > 0 else self.captures
+        WAIT_STATS.record(self.captures, self.matches, self.matches_saved, max(0, fixed_polls - self.captures))
+
 def wait_for_image(
     device_id: str,
     template_name: str,
     timeout: float = 120.0,
-    interval: float = 1.0
+    interval: float = 1.0,
+    deadline: Optional[float] = None
 ) -> Optional[Tuple[int, int]]:
-    """Wait for template to appear in screenshot"""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        coords = find_template(device_id, template_name)
-        if coords:
-            return coords
-        time.sleep(interval)
-    return None
+    """Wait for template to appear in screenshot
+
+    Waits until deadline (a time.time() value) or for timeout seconds.
+    interval is the poll period while the screen changes; it speeds up right
+    after an input and slows down while the screen is static, and unchanged
+    frames are not matched again. The first probe may reuse the current
+    frame, later ones always capture.
+    """
+    poller = _WaitPoller(device_id, interval, deadline if deadline is not None else time.time() + timeout)
+    fresh = False
+    try:
+        while True:
+            frame = get_current_frame(device_id, fresh=fresh)
+            fresh = True
+            if frame is not None and poller.should_match(frame):
+                coords = find_template(device_id, template_name, frame=frame)
+                if coords:
+                    return coords
+                poller.failed(frame)
+                
+            delay = poller.next_delay()
+            if delay is None:
+                return None
+            time.sleep(delay)
+    finally:
+        poller.finish()
 
 def compare_screenshots(img1: np.ndarray, img2: np.ndarray) -> bool:
     """
     Compare two screenshots to detect if they are nearly identical
     Returns True if images are the same, False if different
+
+    Use diff_frames directly for the similarity score and changed areas.
     """
     if img1 is None or img2 is None:
         return False
         
-    if img1.shape != img2.shape:
-        return False
-        
-    # Calculate structural similarity index
-    score = cv2.matchTemplate(img1, img2, cv2.TM_CCOEFF_NORMED)[0][0]
-    
-    # Use match_threshold from config for consistency with template matching
-    return score >= CONFIG['match_threshold']
+    # Share of unchanged blocks, held to match_threshold like template matching
+    return diff_frames(img1, img2).score >= CONFIG['match_threshold']
 
 def _save_debug_image(
     img: np.ndarray, 
     template_name: str,
     matches: list[Tuple[int, int, float]] = None,
     search_region: Tuple[int, int, int, int] = None,
-    template_size: Tuple[int, int] = None
+    template_size: Tuple[int, int] = None,
+    device_id: str = None
 ) -> None:
-    """Save debug image with matches and search region highlighted"""
-    try:
-        debug_img = img.copy()
-        
+    """Queue a debug image with matches and search region highlighted"""
+    def annotate(debug_img: np.ndarray) -> None:
         # Draw search region if provided
         if search_region:
             x1, y1, x2, y2 = search_region
@@ -222,12 +637,8 @@ def _save_debug_image(
                 cv2.putText(debug_img, f"{conf:.3f}", (rect_x, rect_y - 5),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
                 
-        # Save debug image
-        template_name = os.path.basename(template_name)
-        cv2.imwrite(f'tmp/debug_template_{template_name}.png', debug_img)
-        
-    except Exception as e:
-        app_logger.error(f"Error saving debug image: {e}")
+    template_name = os.path.basename(template_name)
+    write_debug_image('find_all', tmp_path(device_id, f'debug_template_{template_name}.png'), img, annotate)
 
 def find_and_tap_template(
     device_id: str, 
@@ -265,3 +676,87 @@ def find_and_tap_template(
         humanized_tap(device_id, location[0], location[1])
         
     return True
+
+async def find_template_async(
+    device_id: str,
+    template_name: str,
+    frame: Optional[Frame] = None
+) -> Optional[Tuple[int, int]]:
+    """Awaitable find_template, run on the device's I/O thread"""
+    return await run_on_device(device_id, find_template, device_id, template_name, frame)
+
+async def find_all_templates_async(
+    device_id: str,
+    template_name: str,
+    search_region: Tuple[int, int, int, int] = None,
+    frame: Optional[Frame] = None
+) -> list[Tuple[int, int]]:
+    """Awaitable find_all_templates, run on the device's I/O thread"""
+    return await run_on_device(device_id, find_all_templates, device_id, template_name, search_region, frame)
+
+async def wait_for_image_async(
+    device_id: str,
+    template_name: str,
+    timeout: float = 120.0,
+    interval: float = 1.0,
+    deadline: Optional[float] = None
+) -> Optional[Tuple[int, int]]:
+    """Wait for template to appear, yielding to the event loop between probes
+
+    Same polling as wait_for_image.
+    """
+    poller = _WaitPoller(device_id, interval, deadline if deadline is not None else time.time() + timeout)
+    fresh = False
+    try:
+        while True:
+            frame = await run_on_device(device_id, get_current_frame, device_id, fresh)
+            fresh = True
+            if frame is not None and poller.should_match(frame):
+                coords = await find_template_async(device_id, template_name, frame)
+                if coords:
+                    return coords
+                poller.failed(frame)
+                
+            delay = poller.next_delay()
+            if delay is None:
+                return None
+            await asyncio.sleep(delay)
+    finally:
+        poller.finish()
+
+async def find_and_tap_template_async(
+    device_id: str, 
+    template_name: str,
+    error_msg: Optional[str] = None,
+    success_msg: Optional[str] = None,
+    long_press: bool = False,
+    press_duration: float = 1.0,
+    critical: bool = False,
+    timeout: float = None
+) -> bool:
+    """Awaitable find_and_tap_template"""
+    if timeout:
+        location = await wait_for_image_async(device_id, template_name, timeout=timeout)
+    else:
+        location = await find_template_async(device_id, template_name)
+    
+    if location is None:
+        if error_msg:
+            if critical:
+                app_logger.error(error_msg)
+            else:
+                app_logger.info(error_msg)
+        return False
+        
+    if success_msg:
+        app_logger.info(success_msg)
+        
+    # Import here to avoid circular dependency
+    from src.game.controls import humanized_tap_async, humanized_long_press_async
+        
+    if long_press:
+        await humanized_long_press_async(device_id, location[0], location[1], duration=press_duration)
+    else:
+        await humanized_tap_async(device_id, location[0], location[1])
+        
+    return True
@@ -25,6 +25,16 @@ app_logger = logging.getLogger('app')
 app_logger.addHandler(file_handler)
 app_logger.addHandler(console_handler)
 
+def include_thread_names() -> None:
+    """Prefix log lines with the thread name, used when each device runs on its own thread"""
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - [%(threadName)s] %(levelname)s - %(message)s'
+    ))
+    console_handler.setFormatter(logging.Formatter(
+        '%(asctime)s - [%(threadName)s] %(levelname)s - %(message)s',
+        datefmt='%H:%M:%S'
+    ))
+
 def setup_logging(debug: bool = False) -> None:
     """Setup logging configuration"""
     level = logging.DEBUG if debug else logging.INFO
@@ -0,0 +1,118 @@
+"""Cache of OCR results keyed by the preprocessed image
+
+The secretary list shows the same applicant rows over and over, so the
+binarised alliance crop handed to the OCR engine is often byte-identical to
+one read moments ago. Results are kept in a bounded LRU with a TTL, keyed by
+a hash of that image and the engine settings.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from .config import CONFIG
+from .logging import app_logger
+
+OcrResult = Tuple[str, float]
+
+
+def image_key(image: np.ndarray, *settings: Hashable) -> Tuple:
+    """Cache key for an OCR input image and the settings it is read with"""
+    digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16).digest()
+    return (digest, image.shape, image.dtype.str) + settings
+
+
+class OcrCache:
+    """Bounded LRU of OCR results with a time to live"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[Tuple, Tuple[float, OcrResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    @staticmethod
+    def _settings() -> dict:
+        return CONFIG.get('ocr_cache', {})
+
+    def enabled(self) -> bool:
+        return bool(self._settings().get('enabled', True))
+
+    def get(self, key: Tuple) -> Optional[OcrResult]:
+        """Cached result for a key, None on a miss or when expired"""
+        if not self.enabled():
+            return None
+
+        ttl = self._settings().get('ttl', 600)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and ttl and now - entry[0] > ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, result: OcrResult) -> None:
+        """Store a result, evicting the least recently used entries when full"""
+        if not self.enabled():
+            return
+
+        max_entries = self._settings().get('max_entries', 256)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evicted": self.evicted
+            }
+
+    def log_stats(self) -> None:
+        """Log the hit rate"""
+        stats = self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        if not lookups:
+            return
+        app_logger.info(
+            f"OCR cache: {stats['hits']}/{lookups} hits ({stats['hits'] * 100 / lookups:.1f}%), "
+            f"{stats['expired']} expired, {stats['evicted']} evicted"
+        )
+
+
+OCR_CACHE = OcrCache()
+
+def _engine_key(engine, image: np.ndarray) -> Tuple:
+    return image_key(image, engine.name, engine.lang, engine.psm, engine.oem, tuple(sorted(engine.variables.items())))
+
+def cached_recognize(engine, image: np.ndarray) -> OcrResult:
+    """Recognize an image with an OCR engine, reusing the result for an identical image"""
+    key = _engine_key(engine, image)
+    result = OCR_CACHE.get(key)
+    if result is None:
+        result = engine.recognize(image)
+        OCR_CACHE.put(key, result)
+    return result
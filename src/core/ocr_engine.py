@@ -0,0 +1,196 @@
+"""OCR engines working directly on NumPy images
+
+The default engine keeps one in-process Tesseract API handle per thread
+through tesserocr, so the model is loaded and configured once and images
+are handed over without temp files. When tesserocr is not installed the
+pytesseract engine is used, which runs the tesseract binary per call.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pytesseract
+
+from .config import CONFIG
+from .logging import app_logger
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Text, mean confidence and (x1, y1, x2, y2) box of one recognized line
+OcrLine = Tuple[str, float, Tuple[int, int, int, int]]
+
+
+class OcrEngine:
+    """Recognizes text in an image with fixed language, page segmentation and variables"""
+
+    name = "base"
+
+    def __init__(self, lang: str, psm: int, oem: int, variables: Optional[Dict[str, str]] = None):
+        self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self.variables = dict(variables or {})
+
+    def recognize(self, image: np.ndarray) -> Tuple[str, float]:
+        """Text in the image and its mean confidence (0-100, -1 when unknown)"""
+        raise NotImplementedError
+
+    def recognize_lines(self, image: np.ndarray) -> List[OcrLine]:
+        """Text, mean confidence and (x1, y1, x2, y2) box of every text line, top to bottom"""
+        raise NotImplementedError
+
+    def image_to_string(self, image: np.ndarray) -> str:
+        """Text in the image"""
+        return self.recognize(image)[0]
+
+    def close(self) -> None:
+        """Release engine resources"""
+
+
+class PytesseractEngine(OcrEngine):
+    """Runs the tesseract binary for every call"""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str, psm: int, oem: int, variables: Optional[Dict[str, str]] = None):
+        super().__init__(lang, psm, oem, variables)
+        options = ' '.join(f'-c {key}={value}' for key, value in self.variables.items())
+        self.config = f'--psm {psm} --oem {oem} {options}'.strip()
+
+    def recognize(self, image: np.ndarray) -> Tuple[str, float]:
+        data = pytesseract.image_to_data(image, lang=self.lang, config=self.config, output_type=pytesseract.Output.DICT)
+        words = [word for word in data['text'] if word.strip()]
+        confidences = [float(conf) for word, conf in zip(data['text'], data['conf']) if word.strip() and float(conf) >= 0]
+        confidence = sum(confidences) / len(confidences) if confidences else -1.0
+        return ' '.join(words), confidence
+
+    def recognize_lines(self, image: np.ndarray) -> List[OcrLine]:
+        data = pytesseract.image_to_data(image, lang=self.lang, config=self.config, output_type=pytesseract.Output.DICT)
+        lines: Dict[Tuple[int, int, int], List[int]] = {}
+        for i, word in enumerate(data['text']):
+            if word.strip():
+                lines.setdefault((data['block_num'][i], data['par_num'][i], data['line_num'][i]), []).append(i)
+
+        results = []
+        for indices in lines.values():
+            words = [data['text'][i] for i in indices]
+            confidences = [float(data['conf'][i]) for i in indices if float(data['conf'][i]) >= 0]
+            box = (
+                min(data['left'][i] for i in indices),
+                min(data['top'][i] for i in indices),
+                max(data['left'][i] + data['width'][i] for i in indices),
+                max(data['top'][i] + data['height'][i] for i in indices)
+            )
+            confidence = sum(confidences) / len(confidences) if confidences else -1.0
+            results.append((' '.join(words), confidence, box))
+        return sorted(results, key=lambda line: line[2][1])
+
+
+class TesserocrEngine(OcrEngine):
+    """Keeps one initialized Tesseract API handle per thread"""
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str, psm: int, oem: int, variables: Optional[Dict[str, str]] = None,
+                 tessdata_path: Optional[str] = None):
+        super().__init__(lang, psm, oem, variables)
+        self.tessdata_path = tessdata_path
+        self._local = threading.local()
+        self._apis: List = []
+        self._lock = threading.Lock()
+
+    def _api(self):
+        api = getattr(self._local, 'api', None)
+        if api is None:
+            kwargs = {'lang': self.lang, 'psm': self.psm, 'oem': self.oem, 'variables': self.variables}
+            if self.tessdata_path:
+                kwargs['path'] = self.tessdata_path
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+            with self._lock:
+                self._apis.append(api)
+        return api
+
+    def _set_image(self, image: np.ndarray):
+        api = self._api()
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        return api
+
+    def recognize(self, image: np.ndarray) -> Tuple[str, float]:
+        api = self._set_image(image)
+        text = api.GetUTF8Text().strip()
+        return text, float(api.MeanTextConf())
+
+    def recognize_lines(self, image: np.ndarray) -> List[OcrLine]:
+        api = self._set_image(image)
+        api.Recognize()
+        iterator = api.GetIterator()
+        if iterator is None:
+            return []
+
+        level = tesserocr.RIL.TEXTLINE
+        results = []
+        for line in tesserocr.iterate_level(iterator, level):
+            box = line.BoundingBox(level)
+            text = (line.GetUTF8Text(level) or '').strip()
+            if box is None or not text:
+                continue
+            results.append((text, float(line.Confidence(level)), tuple(box)))
+        return sorted(results, key=lambda line: line[2][1])
+
+    def close(self) -> None:
+        with self._lock:
+            apis, self._apis = self._apis, []
+        for api in apis:
+            api.End()
+
+
+_engines: Dict[Tuple, OcrEngine] = {}
+_engines_lock = threading.Lock()
+
+def _engine_class(name: str) -> type:
+    """Engine class for an ocr_settings.engine value"""
+    if name == "pytesseract":
+        return PytesseractEngine
+    if name == "tesserocr" and tesserocr is None:
+        app_logger.warning("tesserocr is not installed, falling back to pytesseract")
+    if tesserocr is not None and name in ("auto", "tesserocr"):
+        return TesserocrEngine
+    return PytesseractEngine
+
+def get_ocr_engine(lang: str, psm: int, oem: int, variables: Optional[Dict[str, str]] = None) -> OcrEngine:
+    """Shared engine for a language, page segmentation mode and variable set"""
+    variables = {key: str(value) for key, value in (variables or {}).items()}
+    settings = CONFIG.get('ocr_settings', {})
+    engine_name = settings.get('engine', 'auto')
+    key = (engine_name, lang, psm, oem, tuple(sorted(variables.items())))
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine_class = _engine_class(engine_name)
+            if engine_class is TesserocrEngine:
+                engine = TesserocrEngine(lang, psm, oem, variables, settings.get('tessdata_path'))
+            else:
+                engine = engine_class(lang, psm, oem, variables)
+            app_logger.debug(f"Created {engine.name} OCR engine for {lang} (psm {psm})")
+            _engines[key] = engine
+        return engine
+
+def close_ocr_engines() -> None:
+    """Release every shared engine"""
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        try:
+            engine.close()
+        except Exception as e:
+            app_logger.error(f"Error closing OCR engine: {e}")
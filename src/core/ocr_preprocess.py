@@ -0,0 +1,84 @@
+"""Preprocessing of alliance tag crops for OCR
+
+The crop can be scaled so its glyphs reach a target height instead of by a
+fixed factor, then binarised with Otsu and, when enlarged enough, dilated.
+Adaptive scaling is off by default (min_scale = max_scale = 8) until it has
+been benchmarked against the fixed 8x path on real reject crops.
+Every step writes into per-thread buffers that are reused while the crop
+size stays the same, so repeated reads of applicant rows do not allocate.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import CONFIG
+
+_local = threading.local()
+
+
+def _settings() -> dict:
+    return CONFIG.get('ocr_settings', {}).get('preprocess', {})
+
+def _buffer(name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    """Per-thread uint8 buffer, reallocated only when the shape changes"""
+    buffers: Optional[Dict[str, np.ndarray]] = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    buf = buffers.get(name)
+    if buf is None or buf.shape != shape:
+        buf = buffers[name] = np.empty(shape, dtype=np.uint8)
+    return buf
+
+def alliance_scale(crop_height: int, min_scale: Optional[float] = None, max_scale: Optional[float] = None) -> float:
+    """Scale factor that brings the glyphs of a crop to the target height
+
+    The limits default to config, which pins them to the fixed 8x upscale the
+    OCR was tuned on; benchmarks/ocr_preprocessing.py passes wider ones to
+    measure the adaptive path before config is changed.
+    """
+    settings = _settings()
+    if min_scale is None:
+        min_scale = settings.get('min_scale', 8.0)
+    if max_scale is None:
+        max_scale = settings.get('max_scale', 8.0)
+    glyph_height = max(1.0, crop_height * settings.get('glyph_fraction', 0.3))
+    scale = settings.get('target_glyph_height', 40) / glyph_height
+    return float(min(max_scale, max(min_scale, scale)))
+
+def preprocess_alliance(cropped: np.ndarray, scale: Optional[float] = None) -> np.ndarray:
+    """Binary image of an alliance tag crop, ready for OCR
+
+    scale defaults to alliance_scale() of the crop height. The result lives in
+    a per-thread buffer and is overwritten by the next call on the same
+    thread, so copy it before keeping it.
+    """
+    height, width = cropped.shape[:2]
+    if scale is None:
+        scale = alliance_scale(height)
+
+    if cropped.ndim == 3:
+        gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY, dst=_buffer('gray', (height, width)))
+    else:
+        gray = cropped
+
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if size != (width, height):
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        enlarged = cv2.resize(gray, size, dst=_buffer('enlarged', size[::-1]), interpolation=interpolation)
+    else:
+        enlarged = gray
+
+    binary = _buffer('binary', size[::-1])
+    cv2.threshold(enlarged, 127, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=binary)
+
+    # A 2x2 dilation at 8x connects the pixel font's strokes; scale it with the image
+    kernel_size = round(scale / 4)
+    if kernel_size >= 2:
+        kernel = np.ones((kernel_size, kernel_size), np.uint8)
+        dilated = _buffer('dilated', size[::-1])
+        cv2.dilate(binary, kernel, dst=dilated, iterations=1)
+        return dilated
+    return binary
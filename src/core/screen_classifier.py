@@ -0,0 +1,159 @@
+"""Screen-state classifier backed by a thumbnail index
+
+Reference screenshots live in ``config/screens/<label>/*.png``. Each one is
+shrunk to a small normalized thumbnail, and the current screen is
+identified with a single matrix product against all of them instead of
+probing templates one by one.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from .config import CONFIG
+from .frame import Frame, get_current_frame
+from .logging import app_logger
+
+
+class ScreenMatch:
+    """Classification of one frame"""
+
+    def __init__(self, label: str, confidence: float, margin: float):
+        self.label = label
+        self.confidence = confidence
+        self.margin = margin
+
+    def __repr__(self) -> str:
+        return f"ScreenMatch({self.label}, confidence={self.confidence:.3f}, margin={self.margin:.3f})"
+
+
+def _settings() -> dict:
+    return CONFIG.get('screen_classifier', {})
+
+def _thumbnail(image: np.ndarray) -> np.ndarray:
+    """Zero-mean, unit-length thumbnail vector, so a dot product is a correlation"""
+    width, height = _settings().get('thumbnail_size', [18, 40])
+    small = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    small -= small.mean()
+    norm = np.linalg.norm(small)
+    return small / norm if norm else small
+
+
+class ScreenIndex:
+    """Thumbnails of labelled reference screenshots"""
+
+    def __init__(self, screens_dir: str = "config/screens"):
+        self.screens_dir = Path(screens_dir)
+        self.labels: List[str] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._vector_labels: Optional[np.ndarray] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, reload: bool = True) -> None:
+        """Build the index from the reference screenshots"""
+        with self._lock:
+            if self._loaded and not reload:
+                return
+
+            start = time.perf_counter()
+            vectors, vector_labels = [], []
+            if self.screens_dir.is_dir():
+                for label_dir in sorted(p for p in self.screens_dir.iterdir() if p.is_dir()):
+                    for path in sorted(label_dir.glob("*.png")):
+                        image = cv2.imread(str(path))
+                        if image is None:
+                            app_logger.error(f"Failed to load reference screen: {path}")
+                            continue
+                        vectors.append(_thumbnail(image))
+                        vector_labels.append(label_dir.name)
+
+            self.labels = sorted(set(vector_labels))
+            self._vectors = np.stack(vectors) if vectors else None
+            self._vector_labels = np.array(vector_labels)
+            self._loaded = True
+            if vectors:
+                elapsed = (time.perf_counter() - start) * 1000
+                app_logger.info(
+                    f"Indexed {len(vectors)} reference screens for {len(self.labels)} labels in {elapsed:.1f} ms"
+                )
+
+    def save_reference(self, label: str, image: np.ndarray) -> Optional[Path]:
+        """Store a screenshot as a reference screen for a label and reindex"""
+        path = self.screens_dir / label / f"{time.strftime('%Y%m%d_%H%M%S')}.png"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not cv2.imwrite(str(path), image):
+            app_logger.error(f"Failed to save reference screen: {path}")
+            return None
+        self.load()
+        return path
+
+    def has_label(self, label: str) -> bool:
+        """Check whether there are reference screens for a label"""
+        if not self._loaded:
+            self.load(reload=False)
+        return label in self.labels
+
+    def classify(self, image: np.ndarray) -> Optional[ScreenMatch]:
+        """Best matching label with its similarity and lead over the next label"""
+        if not self._loaded:
+            self.load(reload=False)
+        if self._vectors is None:
+            return None
+
+        scores = self._vectors @ _thumbnail(image)
+        best = int(np.argmax(scores))
+        label = str(self._vector_labels[best])
+        others = scores[self._vector_labels != label]
+        runner_up = float(others.max()) if len(others) else -1.0
+        return ScreenMatch(label, float(scores[best]), float(scores[best]) - runner_up)
+
+
+SCREEN_INDEX = ScreenIndex()
+
+def classify_screen(device_id: str, frame: Optional[Frame] = None) -> Optional[ScreenMatch]:
+    """Identify the current screen, None when unsure
+
+    The result is None when the classifier is disabled, there are no
+    reference screens, or the best label is not confident enough; callers
+    then fall back to template probes.
+    """
+    settings = _settings()
+    if not settings.get('enabled', True):
+        return None
+
+    try:
+        if frame is None:
+            frame = get_current_frame(device_id)
+            if frame is None:
+                return None
+
+        match = SCREEN_INDEX.classify(frame.image)
+        if match is None:
+            return None
+
+        app_logger.debug(f"Screen classified as {match}")
+        if match.confidence < settings.get('min_confidence', 0.9) or match.margin < settings.get('min_margin', 0.02):
+            return None
+        return match
+
+    except Exception as e:
+        app_logger.error(f"Error classifying screen: {e}")
+        return None
+
+def screen_is(device_id: str, label: str, frame: Optional[Frame] = None) -> Optional[bool]:
+    """Check the current screen against a label
+
+    Returns None when the classifier cannot tell, including when there are no
+    reference screens for the label, so callers know to probe templates.
+    """
+    if not SCREEN_INDEX.has_label(label):
+        return None
+    match = classify_screen(device_id, frame)
+    if match is None:
+        return None
+    return match.label == label
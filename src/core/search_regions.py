@@ -0,0 +1,217 @@
+"""Learned search regions for templates
+
+Most UI elements always appear in the same spot, so every template
+remembers the areas where it matched before, per screen resolution.
+Lookups try those areas first and only scan the full frame on a miss.
+"""
+
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .config import CONFIG
+from .logging import app_logger
+
+Region = Tuple[int, int, int, int]
+
+
+class TemplateRegionStats:
+    """Lookup counters of one template"""
+
+    def __init__(self, lookups: int = 0, hits: int = 0, time_saved: float = 0.0, full_scan_ms: float = 0.0):
+        self.lookups = lookups
+        self.hits = hits
+        self.time_saved = time_saved
+        self.full_scan_ms = full_scan_ms
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "time_saved": round(self.time_saved, 3),
+            "full_scan_ms": round(self.full_scan_ms, 3)
+        }
+
+
+class SearchRegionStore:
+    """Regions where templates matched before, persisted as JSON
+
+    Regions are keyed by template name and frame resolution, since a region
+    learned on one resolution means nothing on another.
+    """
+
+    def __init__(self, path: Path = Path("state/search_regions.json")):
+        self.path = path
+        self._regions: Dict[str, List[dict]] = {}
+        self._stats: Dict[str, TemplateRegionStats] = {}
+        self._loaded = False
+        self._dirty = False
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    @staticmethod
+    def _key(template_name: str, frame_size: Tuple[int, int]) -> str:
+        return f"{template_name}@{frame_size[0]}x{frame_size[1]}"
+
+    @property
+    def enabled(self) -> bool:
+        return CONFIG.get('search_regions', {}).get('enabled', True)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._regions = data.get("regions", {})
+            self._stats = {
+                name: TemplateRegionStats(**stats)
+                for name, stats in data.get("stats", {}).items()
+            }
+        except Exception as e:
+            app_logger.error(f"Error loading search regions: {e}")
+
+    def save(self) -> None:
+        """Write regions and stats to disk
+
+        The data is copied under the lock and written to a unique temporary
+        file that replaces the old one, so concurrent saves never interleave.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._loaded:
+                    return
+                data = {
+                    "regions": copy.deepcopy(self._regions),
+                    "stats": {name: stats.to_dict() for name, stats in self._stats.items()}
+                }
+                self._dirty = False
+                self._last_save = time.monotonic()
+            tmp_name = None
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=self.path.parent, prefix=self.path.name, suffix=".tmp", delete=False
+                ) as f:
+                    tmp_name = f.name
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_name, self.path)
+            except Exception as e:
+                app_logger.error(f"Error saving search regions: {e}")
+                if tmp_name and os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+
+    def _save_soon(self) -> None:
+        """Save unless the last save was less than search_regions.save_interval ago
+
+        Anything left unsaved is written by the save at cleanup.
+        """
+        interval = CONFIG.get('search_regions', {}).get('save_interval', 30.0)
+        with self._lock:
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= interval
+        if due:
+            self.save()
+
+    def regions(self, template_name: str, frame_size: Tuple[int, int]) -> List[Region]:
+        """Learned regions of a template, most used first"""
+        with self._lock:
+            self._ensure_loaded()
+            entries = self._regions.get(self._key(template_name, frame_size), [])
+            return [tuple(entry["rect"]) for entry in sorted(entries, key=lambda e: e["hits"], reverse=True)]
+
+    def learn(self, template_name: str, frame_size: Tuple[int, int], match_rect: Region) -> None:
+        """Remember the area around a full-frame match
+
+        The rect is padded so small layout shifts still hit, merged into an
+        overlapping region when there is one, and the least used region is
+        dropped once a template has too many.
+        """
+        settings = CONFIG.get('search_regions', {})
+        padding = settings.get('padding', 1.0)
+        max_regions = settings.get('max_regions', 4)
+
+        x1, y1, x2, y2 = match_rect
+        pad_x = int((x2 - x1) * padding)
+        pad_y = int((y2 - y1) * padding)
+        rect = [
+            max(0, x1 - pad_x),
+            max(0, y1 - pad_y),
+            min(frame_size[0], x2 + pad_x),
+            min(frame_size[1], y2 + pad_y)
+        ]
+
+        with self._lock:
+            self._ensure_loaded()
+            entries = self._regions.setdefault(self._key(template_name, frame_size), [])
+            for entry in entries:
+                ex1, ey1, ex2, ey2 = entry["rect"]
+                if rect[0] < ex2 and ex1 < rect[2] and rect[1] < ey2 and ey1 < rect[3]:
+                    entry["rect"] = [min(ex1, rect[0]), min(ey1, rect[1]), max(ex2, rect[2]), max(ey2, rect[3])]
+                    break
+            else:
+                entries.append({"rect": rect, "hits": 0})
+                if len(entries) > max_regions:
+                    entries.remove(min(entries, key=lambda e: e["hits"]))
+        app_logger.debug(f"Learned search region {rect} for {template_name}")
+        self._save_soon()
+
+    def record_hit(self, template_name: str, frame_size: Tuple[int, int], region: Region, elapsed_ms: float) -> None:
+        """Count a lookup answered from a learned region"""
+        with self._lock:
+            for entry in self._regions.get(self._key(template_name, frame_size), []):
+                if tuple(entry["rect"]) == tuple(region):
+                    entry["hits"] += 1
+                    break
+            stats = self._stats.setdefault(template_name, TemplateRegionStats())
+            stats.lookups += 1
+            stats.hits += 1
+            if stats.full_scan_ms:
+                stats.time_saved += max(0.0, stats.full_scan_ms - elapsed_ms) / 1000
+
+    def record_miss(self, template_name: str, full_scan_ms: float, wasted_ms: float = 0.0) -> None:
+        """Count a lookup that needed a full-frame scan
+
+        wasted_ms is the time spent on learned regions before falling back.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(template_name, TemplateRegionStats())
+            stats.lookups += 1
+            stats.time_saved -= wasted_ms / 1000
+            # Running average of the full scan cost, used to estimate savings
+            if stats.full_scan_ms:
+                stats.full_scan_ms = stats.full_scan_ms * 0.8 + full_scan_ms * 0.2
+            else:
+                stats.full_scan_ms = full_scan_ms
+
+    def stats(self) -> Dict[str, TemplateRegionStats]:
+        """Lookup counters per template"""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._stats)
+
+    def log_stats(self) -> None:
+        """Report hit rate and time saved per template"""
+        for name, stats in sorted(self.stats().items()):
+            if stats.lookups:
+                app_logger.info(
+                    f"Search regions for {name}: {stats.hits}/{stats.lookups} hits "
+                    f"({stats.hit_rate:.0%}), saved {stats.time_saved:.2f}s"
+                )
+
+
+SEARCH_REGIONS = SearchRegionStore()
+
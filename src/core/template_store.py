@@ -0,0 +1,334 @@
+"""In-memory store of decoded templates"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from .config import CONFIG
+from .logging import app_logger
+
+
+class TemplateEntry:
+    """Decoded template with its derived forms"""
+
+    def __init__(self, name: str, image: np.ndarray, config: dict, scale: float = 1.0, fingerprint: str = ""):
+        self.name = name
+        self.config = config
+        self.scale = scale
+        self.fingerprint = fingerprint
+        self.image = image
+        self.gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.height, self.width = image.shape[:2]
+        self._resized: Dict[Tuple[float, bool], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+        # Shared by every lookup, so nobody may modify them
+        self.image.flags.writeable = False
+        self.gray.flags.writeable = False
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Template width and height"""
+        return self.width, self.height
+
+    @property
+    def threshold(self) -> float:
+        """Match threshold from the template config or the global default"""
+        return self.config.get('threshold', CONFIG['match_threshold'])
+
+    def resized(self, scale: float, gray: bool = False) -> np.ndarray:
+        """Get the template scaled by a factor, cached per scale"""
+        if scale == 1.0:
+            return self.gray if gray else self.image
+
+        key = (round(scale, 4), gray)
+        with self._lock:
+            resized = self._resized.get(key)
+            if resized is None:
+                source = self.gray if gray else self.image
+                width = max(1, int(round(self.width * scale)))
+                height = max(1, int(round(self.height * scale)))
+                interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+                resized = cv2.resize(source, (width, height), interpolation=interpolation)
+                resized.flags.writeable = False
+                self._resized[key] = resized
+            return resized
+
+    def drop_resized(self, scale: float) -> None:
+        """Forget cached resized versions for a scale"""
+        with self._lock:
+            for gray in (False, True):
+                self._resized.pop((round(scale, 4), gray), None)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by this entry and its derived forms"""
+        return self.image.nbytes + self.gray.nbytes + sum(r.nbytes for r in self._resized.values())
+
+
+def source_resolution(config: dict) -> Tuple[int, int]:
+    """Resolution a template was captured at"""
+    width, height = config.get('source_resolution') or CONFIG.get('template_resolution', [1080, 2400])
+    return int(width), int(height)
+
+def template_fingerprint(image: np.ndarray, config: dict) -> str:
+    """Short hash of a source template and the resolution it was captured at
+
+    Rescaled copies and confirmed scales are stored under it, so editing the
+    template image or its source_resolution invalidates them.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(np.ascontiguousarray(image).data)
+    digest.update(repr((image.shape, source_resolution(config))).encode())
+    return digest.hexdigest()
+
+def nominal_scale(config: dict, frame_size: Tuple[int, int]) -> float:
+    """Scale that maps a template from its source resolution to a frame
+
+    UI elements scale with the short side of the screen, so this works for
+    both orientations.
+    """
+    source_width, source_height = source_resolution(config)
+    return min(frame_size) / min(source_width, source_height)
+
+
+class DeviceTemplates:
+    """Templates rescaled for one device and resolution, cached on disk
+
+    The scale of each template starts at its nominal value. Once a match
+    confirms it (possibly after a multi-scale search found a better one) it
+    is marked validated and stored in scales.json next to the rescaled
+    images, so later runs skip both the resize and the search. Both are
+    tied to the source template's fingerprint and are rebuilt when the
+    template changes.
+    """
+
+    def __init__(self, store: 'TemplateStore', device_id: str, frame_size: Tuple[int, int], cache_dir: Path):
+        self.store = store
+        self.device_id = device_id
+        self.frame_size = frame_size
+        self.cache_dir = cache_dir
+        self._entries: Dict[str, TemplateEntry] = {}
+        self._scales: Dict[str, float] = {}
+        self._sources: Dict[str, str] = {}
+        self._validated: Set[str] = set()
+        self._failed_searches: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._load_scales()
+
+    @property
+    def _scales_file(self) -> Path:
+        return self.cache_dir / "scales.json"
+
+    def _load_scales(self) -> None:
+        if not self._scales_file.exists():
+            return
+        try:
+            with open(self._scales_file) as f:
+                data = json.load(f)
+            for name, info in data.items():
+                self._scales[name] = info["scale"]
+                self._sources[name] = info.get("source", "")
+                if info.get("validated"):
+                    self._validated.add(name)
+        except Exception as e:
+            app_logger.error(f"Error loading template scales for {self.device_id}: {e}")
+
+    def _save_scales(self) -> None:
+        data = {
+            name: {"scale": scale, "validated": name in self._validated, "source": self._sources.get(name, "")}
+            for name, scale in self._scales.items()
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._scales_file, "w") as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            app_logger.error(f"Error saving template scales for {self.device_id}: {e}")
+
+    def _build(self, base: TemplateEntry, scale: float) -> TemplateEntry:
+        """Rescale a template, reading and writing the on-disk cache"""
+        if abs(scale - 1.0) < 1e-3:
+            return base
+
+        path = self.cache_dir / f"{base.name}@{scale:.4f}-{base.fingerprint}.png"
+        image = cv2.imread(str(path)) if path.exists() else None
+        if image is None:
+            image = base.resized(scale).copy()
+            base.drop_resized(scale)
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # Copies rescaled from an older version of the template
+                for stale in self.cache_dir.glob(f"{base.name}@*.png"):
+                    if not stale.stem.endswith(f"-{base.fingerprint}"):
+                        stale.unlink()
+                cv2.imwrite(str(path), image)
+            except Exception as e:
+                app_logger.debug(f"Could not cache scaled template {path}: {e}")
+        return TemplateEntry(base.name, image, base.config, scale, base.fingerprint)
+
+    def get(self, name: str) -> Optional[TemplateEntry]:
+        """Template rescaled for this device"""
+        entry = self._entries.get(name)
+        if entry is not None:
+            return entry
+
+        base = self.store.get(name)
+        if base is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                if name in self._scales and self._sources.get(name) != base.fingerprint:
+                    app_logger.info(f"Template {name} changed, dropping its cached scale for {self.device_id}")
+                    del self._scales[name]
+                    self._validated.discard(name)
+                scale = self._scales.get(name)
+                if scale is None:
+                    scale = nominal_scale(base.config, self.frame_size)
+                    self._scales[name] = scale
+                    self._sources[name] = base.fingerprint
+                    # Native resolution needs no confirmation
+                    if abs(scale - 1.0) < 1e-3:
+                        self._validated.add(name)
+                entry = self._build(base, scale)
+                self._entries[name] = entry
+            return entry
+
+    def is_validated(self, name: str) -> bool:
+        """Check whether a match has confirmed the template's scale"""
+        return name in self._validated
+
+    def validate(self, name: str, scale: Optional[float] = None) -> None:
+        """Mark a template's scale as confirmed, switching to a new scale if given"""
+        if name in self._validated and scale is None:
+            return
+        base = self.store.get(name)
+        with self._lock:
+            if scale is not None and base is not None and abs(scale - self._scales.get(name, 0.0)) >= 1e-3:
+                self._scales[name] = scale
+                self._sources[name] = base.fingerprint
+                self._entries[name] = self._build(base, scale)
+                app_logger.info(f"Template {name} rescaled to {scale:.3f} for {self.device_id}")
+            self._validated.add(name)
+            self._save_scales()
+
+    def should_search(self, name: str) -> bool:
+        """Check whether a miss may pay for a multi-scale search now
+
+        A miss usually means the template is simply not on screen, so failed
+        searches back off instead of running on every poll.
+        """
+        failed = self._failed_searches.get(name)
+        return failed is None or time.monotonic() >= failed[1]
+
+    def search_failed(self, name: str) -> None:
+        """Back off further searches after a multi-scale search found nothing
+
+        The wait doubles with every failure up to a limit. It is kept in memory
+        only: giving up never marks the scale as confirmed.
+        """
+        settings = CONFIG.get('template_scaling', {})
+        attempts = self._failed_searches.get(name, (0, 0.0))[0] + 1
+        backoff = min(
+            settings.get('max_search_backoff', 300.0),
+            settings.get('search_backoff', 5.0) * 2 ** (attempts - 1)
+        )
+        self._failed_searches[name] = (attempts, time.monotonic() + backoff)
+
+    def prepare(self) -> None:
+        """Rescale every template up front"""
+        start = time.perf_counter()
+        for name in CONFIG['templates']:
+            self.get(name)
+        self._save_scales()
+        elapsed = (time.perf_counter() - start) * 1000
+        app_logger.info(
+            f"Prepared {len(self._entries)} templates for {self.device_id} at "
+            f"{self.frame_size[0]}x{self.frame_size[1]} in {elapsed:.1f} ms"
+        )
+
+
+class TemplateStore:
+    """Loads every template in config once and serves lookups from memory"""
+
+    def __init__(self, config_dir: str = "config", cache_dir: str = "state/templates"):
+        self.config_dir = config_dir
+        self.cache_dir = Path(cache_dir)
+        self._entries: Dict[str, TemplateEntry] = {}
+        self._devices: Dict[Tuple[str, Tuple[int, int]], DeviceTemplates] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, reload: bool = True) -> None:
+        """Decode every entry of CONFIG['templates'] and report the cost"""
+        with self._lock:
+            if self._loaded and not reload:
+                return
+
+            start = time.perf_counter()
+            entries = {}
+            for name, template_config in CONFIG['templates'].items():
+                path = f"{self.config_dir}/{template_config['path']}"
+                image = cv2.imread(path)
+                if image is None:
+                    app_logger.error(f"Failed to load template: {path}")
+                    continue
+                entries[name] = TemplateEntry(name, image, template_config, fingerprint=template_fingerprint(image, template_config))
+
+            self._entries = entries
+            self._devices = {}
+            self._loaded = True
+            elapsed = (time.perf_counter() - start) * 1000
+            app_logger.info(
+                f"Loaded {len(entries)} templates in {elapsed:.1f} ms "
+                f"({self.memory_footprint() / 1024 / 1024:.2f} MB)"
+            )
+
+    def get(self, name: str) -> Optional[TemplateEntry]:
+        """Get a template entry, loading the store on first use"""
+        if not self._loaded:
+            self.load(reload=False)
+
+        entry = self._entries.get(name)
+        if entry is None:
+            if name not in CONFIG['templates']:
+                app_logger.error(f"Template {name} not found in config")
+        return entry
+
+    def for_device(self, device_id: Optional[str], frame_size: Tuple[int, int]) -> DeviceTemplates:
+        """Templates rescaled for a device at a frame resolution"""
+        key = (device_id or "default", (int(frame_size[0]), int(frame_size[1])))
+        templates = self._devices.get(key)
+        if templates is None:
+            with self._lock:
+                templates = self._devices.get(key)
+                if templates is None:
+                    device_dir = re.sub(r'[^A-Za-z0-9._-]', '_', key[0])
+                    cache_dir = self.cache_dir / device_dir / f"{key[1][0]}x{key[1][1]}"
+                    templates = DeviceTemplates(self, key[0], key[1], cache_dir)
+                    self._devices[key] = templates
+        return templates
+
+    def prepare_device(self, device_id: str, frame_size: Tuple[int, int]) -> DeviceTemplates:
+        """Rescale every template for a device on first contact"""
+        if not self._loaded:
+            self.load(reload=False)
+        templates = self.for_device(device_id, frame_size)
+        templates.prepare()
+        return templates
+
+    def memory_footprint(self) -> int:
+        """Total bytes held by all entries"""
+        return sum(entry.nbytes for entry in self._entries.values())
+
+
+TEMPLATES = TemplateStore()
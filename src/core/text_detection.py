@@ -2,14 +2,19 @@
 
 import os
 import cv2
-import pytesseract
 import re
 from typing import Tuple, Optional, Union, List, Dict, Any
 from .logging import app_logger
-from .device import take_screenshot, get_screen_size
+from .device import get_screen_size, tmp_path
 from .image_processing import _load_template, _take_and_load_screenshot, find_template, find_all_templates
+from .frame import Frame, get_current_frame
 from .config import CONFIG
+from .ocr_engine import OcrEngine, get_ocr_engine
+from .ocr_preprocess import preprocess_alliance
+from .ocr_cache import cached_recognize
+from .glyph_recognizer import GLYPH_RECOGNIZER, recognize_alliance
 from .debug import save_debug_region
+from .debug_artifacts import debug_enabled, write_debug_image
 import numpy as np
 import json
 from pathlib import Path
@@ -18,20 +23,30 @@ debug = True
 
 # pytesseract.pytesseract.tesseract_cmd = "C:\\Program Files\\Tesseract-OCR\\tesseract.exe"
 
+# Inputs of the last alliance OCR per device, kept by reference for reject logs
+_last_ocr_images: Dict[str, Dict[str, np.ndarray]] = {}
+
 def get_text_regions(
     accept_location: Tuple[int, int], 
     device_id: str,
-    existing_screenshot: Optional[np.ndarray] = None
+    existing_screenshot: Optional[np.ndarray] = None,
+    frame: Optional[Frame] = None
 ) -> Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int], Optional[np.ndarray]]:
-    """Calculate regions for alliance tag and name extraction based on bracket location"""
+    """Calculate regions for alliance tag and name extraction based on bracket location
+
+    Every lookup here runs against one frame: the one passed in, the
+    existing screenshot, or the device's current frame.
+    """
     width, height = get_screen_size(device_id)
     
-    if existing_screenshot is not None:
-        img = existing_screenshot
-    else:
-        img = _take_and_load_screenshot(device_id)
-        if img is None:
-            return (0, 0, 0, 0), (0, 0, 0, 0), None
+    if frame is None:
+        if existing_screenshot is not None:
+            frame = Frame.wrap(device_id, existing_screenshot)
+        else:
+            frame = get_current_frame(device_id)
+            if frame is None:
+                return (0, 0, 0, 0), (0, 0, 0, 0), None
+    img = frame.image
     
     app_logger.debug(f"Screen size: {width}x{height}")
     
@@ -43,7 +58,7 @@ def get_text_regions(
     y_offset = int(height * 0.015)  # 1.5% vertical search area
     
     # Get template size to ensure minimum search region
-    template, template_config = _load_template('left_bracket')
+    template, template_config = _load_template('left_bracket', frame)
     if template is not None:
         min_width = template.shape[1] * 3
         min_height = template.shape[0] * 3
@@ -63,28 +78,19 @@ def get_text_regions(
     if y2 - y1 < min_height:
         y2 = min(height, y1 + min_height)
     
-    # Take screenshot and crop to search region
-    if not take_screenshot(device_id):
-        return (0, 0, 0, 0), (0, 0, 0, 0), None
-        
-    img = cv2.imread('tmp/screen.png')
-    if img is None:
-        return (0, 0, 0, 0), (0, 0, 0, 0), None
-        
-    # Crop image to search region
-    search_region = img[y1:y2, x1:x2]
-    
     # Find brackets within cropped region
     left_brackets = find_all_templates(
         device_id,
         "left_bracket",
-        search_region=(x1, y1, x2, y2)
+        search_region=(x1, y1, x2, y2),
+        frame=frame
     )
     
     right_brackets = find_all_templates(
         device_id,
         "right_bracket",
-        search_region=(x1, y1, x2, y2)
+        search_region=(x1, y1, x2, y2),
+        frame=frame
     )
     
     # Filter brackets by vertical alignment with accept button
@@ -107,7 +113,7 @@ def get_text_regions(
         app_logger.debug(f"Selected brackets - Left: {left_bracket}, Right: {right_bracket}")
         
         # Get bracket width
-        template, _ = _load_template('left_bracket')
+        template, _ = _load_template('left_bracket', frame)
         bracket_width = template.shape[1] if template is not None else int(width * 0.01)
         
         # Calculate vertical bounds based on bracket position
@@ -130,7 +136,7 @@ def get_text_regions(
             min(height, y_center + y_padding)
         )
         
-        save_debug_region(device_id, alliance_region, "alliance")
+        save_debug_region(device_id, alliance_region, "alliance", img)
         return alliance_region, name_region, img
     
     # Fallback case with wider ratio
@@ -150,7 +156,7 @@ def get_text_regions(
     name_region = (split_x, y1, x2, y2)
     
     # Save debug image for fallback case too
-    save_debug_region(device_id, alliance_region, "alliance")
+    save_debug_region(device_id, alliance_region, "alliance", img)
     
     return alliance_region, name_region, img
 
@@ -158,11 +164,68 @@ def clean_text(text: str) -> str:
     """Strip non-alphanumeric characters from text"""
     return re.sub(r'[^a-zA-Z0-9]', '', text)
 
+def parse_alliance_text(text: str) -> str:
+    """Alliance tag in raw OCR text, empty when none is found"""
+    # Clean up text but preserve case
+    text = text.replace('—', '').replace('–', '').strip()
+
+    # Try to extract text between brackets first
+    bracket_match = re.search(r'[\[|\(](.*?)[\]|\)]', text)
+    if bracket_match:
+        return bracket_match.group(1)
+
+    # If no brackets, look for 3-4 letter sequences that match alliance patterns
+    words = re.findall(r'[A-Za-z0-9]{3,4}', text)
+    if words:
+        # Take first word that matches length of known alliances
+        for word in words:
+            if len(word) in {3, 4}:  # Most alliance tags are 3-4 chars
+                return word
+
+    return ""
+
+def alliance_ocr_engine(languages: str = 'eng', ocr_debug: bool = False, psm: int = 7,
+                        restrict_chars: bool = True) -> OcrEngine:
+    """OCR engine configured for the alliance tag pixel font
+
+    psm 7 reads a single row; batched reads of stacked rows use psm 6.
+    restrict_chars limits the output to characters of whitelisted tags.
+    """
+    variables = {
+        'tessedit_write_images': int(ocr_debug),
+        'textord_min_linesize': 2,
+        'edges_max_children_per_outline': 40
+    }
+    if restrict_chars:
+        variables['tessedit_char_whitelist'] = f'{ALLIANCE_CHARS}[]'
+    return get_ocr_engine(
+        languages,
+        psm=psm,
+        oem=1,  # LSTM only
+        variables=variables
+    )
+
+def _learn_glyphs(binary: np.ndarray, tag: str, languages: str) -> None:
+    """Teach the glyph recognizer from a read confirmed without the character whitelist
+
+    The whitelisted read coerces every glyph into a whitelisted character,
+    so the labels come from a second, unrestricted read. A whitelisted tag
+    is only learned when both reads agree; any other tag is learned as read,
+    giving non-member glyphs their own references.
+    """
+    whitelist = CONTROL_LIST.get('whitelist', {}).get('alliance', [])
+    if tag in whitelist and not GLYPH_RECOGNIZER.wants_samples(tag):
+        return
+
+    free_text, _ = cached_recognize(alliance_ocr_engine(languages, restrict_chars=False), binary)
+    free_text = free_text.strip()
+    free_tag = parse_alliance_text(free_text)
+    if free_tag and (free_tag == tag or free_tag not in whitelist):
+        GLYPH_RECOGNIZER.learn(binary, free_text, free_tag)
+
 def extract_text_from_region(device_id: str, region: Tuple[int, int, int, int], languages: Union[str, List[str]] = 'eng', img: Optional[np.ndarray] = None) -> str:
     if img is None:
-        if not take_screenshot(device_id):
-            return "", ""
-        img = cv2.imread('tmp/screen.png')
+        img = _take_and_load_screenshot(device_id)
         if img is None:
             return "", ""
     
@@ -170,88 +233,222 @@ def extract_text_from_region(device_id: str, region: Tuple[int, int, int, int],
     cropped = img[y1:y2, x1:x2]
     
     if languages == 'eng':
-        # Convert to grayscale
-        gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-        
-        # Higher scale factor for better detail
-        scale = 8
-        enlarged = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        # Scale to the target glyph height, binarise and dilate in reused buffers
+        binary = preprocess_alliance(cropped)
         
-        # Simple binary threshold
-        _, binary = cv2.threshold(enlarged, 127, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Save debug images; the preprocessing buffer is reused, so keep copies
+        ocr_debug = debug_enabled('ocr')
+        if ocr_debug:
+            write_debug_image('ocr', tmp_path(device_id, 'debug_alliance_original.png'), cropped)
+            write_debug_image('ocr', tmp_path(device_id, 'debug_alliance_processed.png'), binary.copy())
+        if debug_enabled('rejects'):
+            _last_ocr_images[device_id] = {
+                'original': cropped,
+                'processed': binary.copy(),
+                'full': img,
+                'region': region
+            }
         
-        # Optional: Add slight dilation to connect components
-        kernel = np.ones((2,2), np.uint8)
-        binary = cv2.dilate(binary, kernel, iterations=1)
+        # Whitelisted tags can be read from learned glyphs without Tesseract
+        use_glyphs = CONFIG.get('ocr_settings', {}).get('alliance_recognizer', 'tesseract') == 'glyphs'
+        if use_glyphs:
+            match = recognize_alliance(binary)
+            if match is not None:
+                return match.tag, f"[{match.tag}] (glyphs {match.confidence:.2f})"
         
-        # Save debug images
-        cv2.imwrite('tmp/debug_alliance_original.png', cropped)
-        cv2.imwrite('tmp/debug_alliance_processed.png', binary)
-        
-        # OCR with specific config for pixel font
-        config = (
-            '--psm 7 '  # Single line mode
-            '--oem 1 '  # LSTM only
-            f'-c tessedit_char_whitelist={ALLIANCE_CHARS}[] '
-            '-c tessedit_write_images=1 '
-            '-c textord_min_linesize=2 '
-            '-c edges_max_children_per_outline=40'
-        )
-        text = pytesseract.image_to_string(binary, lang=languages, config=config).strip()
+        # Rows already read earlier come back from the cache
+        text, _ = cached_recognize(alliance_ocr_engine(languages, ocr_debug), binary)
+        text = text.strip()
         original_text = text
         
-        # Clean up text but preserve case
-        text = text.replace('—', '').replace('–', '').strip()
-        
-        # Try to extract text between brackets first
-        bracket_match = re.search(r'[\[|\(](.*?)[\]|\)]', text)
-        if bracket_match:
-            return bracket_match.group(1), original_text
-            
-        # If no brackets, look for 3-4 letter sequences that match alliance patterns
-        words = re.findall(r'[A-Za-z0-9]{3,4}', text)
-        if words:
-            # Take first word that matches length of known alliances
-            for word in words:
-                if len(word) in {3, 4}:  # Most alliance tags are 3-4 chars
-                    return word, original_text
-        
-        return "", original_text
+        tag = parse_alliance_text(text)
+        if use_glyphs:
+            _learn_glyphs(binary, tag, languages)
+        return tag, original_text
         
     return "", original_text
 
-def log_rejected_alliance(alliance_text: str, original_text: str = ""):
-    """Log rejected alliance names to a file and store debug images"""
+class AllianceRow:
+    """Alliance tag read for one applicant row in a batched read
+
+    crop is the row's alliance crop, used to recognise the row again after
+    the list has shifted. doubtful rows must be read again on their own.
+    """
+
+    def __init__(self, accept_location: Tuple[int, int], region: Tuple[int, int, int, int],
+                 crop: np.ndarray, tag: str = "", text: str = "", confidence: float = -1.0):
+        self.accept_location = accept_location
+        self.region = region
+        self.crop = crop
+        self.tag = tag
+        self.text = text
+        self.confidence = confidence
+
+    @property
+    def doubtful(self) -> bool:
+        min_confidence = CONFIG.get('ocr_settings', {}).get('batch', {}).get('min_confidence', 80)
+        return not self.tag or self.confidence < min_confidence
+
+    def __repr__(self) -> str:
+        return f"AllianceRow({self.accept_location}, tag={self.tag!r}, text={self.text!r}, confidence={self.confidence:.1f})"
+
+def _stack_rows(binaries: List[np.ndarray]) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Stack row images as dark text on white with blank separators
+
+    Returns the stacked image and the (top, bottom) span of each row in it.
+    """
+    gap = max(binary.shape[0] for binary in binaries) // 2
+    width = max(binary.shape[1] for binary in binaries) + 2 * gap
+    height = sum(binary.shape[0] for binary in binaries) + gap * (len(binaries) + 1)
+    stacked = np.full((height, width), 255, dtype=np.uint8)
+
+    spans = []
+    y = gap
+    for binary in binaries:
+        h, w = binary.shape
+        # Text is the minority of pixels; invert rows with light text so all text is black on white
+        stacked[y:y + h, gap:gap + w] = binary if binary.mean() >= 127 else 255 - binary
+        spans.append((y, y + h))
+        y += h + gap
+    return stacked, spans
+
+def read_alliance_rows(
+    device_id: str,
+    accept_locations: List[Tuple[int, int]],
+    frame: Optional[Frame] = None
+) -> List[AllianceRow]:
+    """Read the alliance tags of every visible applicant row with one OCR call
+
+    The rows' alliance crops are preprocessed as for a single read, stacked
+    into one image and read line by line; every line is mapped back to the
+    row it lies in and keeps its confidence. Rows below
+    ocr_settings.batch.min_confidence are marked doubtful for the caller to
+    read again with extract_text_from_region; find_alliance_row finds a
+    row's result again once the list has moved.
+    """
+    settings = CONFIG.get('ocr_settings', {})
+    batch_settings = settings.get('batch', {})
+    if not batch_settings.get('enabled', True) or not accept_locations:
+        return []
+
+    try:
+        if frame is None:
+            frame = get_current_frame(device_id)
+            if frame is None:
+                return []
+
+        use_glyphs = settings.get('alliance_recognizer', 'tesseract') == 'glyphs'
+        rows: List[AllianceRow] = []
+        pending: List[Tuple[AllianceRow, np.ndarray]] = []
+        for accept_location in accept_locations:
+            region, _, img = get_text_regions(accept_location, device_id, frame=frame)
+            x1, y1, x2, y2 = region
+            if img is None or x2 <= x1 or y2 <= y1:
+                continue
+            cropped = img[y1:y2, x1:x2]
+            # Copy: the preprocessing buffer is reused by the next row
+            binary = preprocess_alliance(cropped).copy()
+            row = AllianceRow(accept_location, region, cropped.copy())
+            rows.append(row)
+
+            if use_glyphs:
+                match = recognize_alliance(binary)
+                if match is not None:
+                    row.tag, row.text, row.confidence = match.tag, f"[{match.tag}]", match.confidence * 100
+                    continue
+            pending.append((row, binary))
+
+        if not pending:
+            return rows
+
+        ocr_debug = debug_enabled('ocr')
+        stacked, spans = _stack_rows([binary for _, binary in pending])
+        lines = alliance_ocr_engine('eng', ocr_debug, psm=6).recognize_lines(stacked)
+
+        # A line belongs to the row its vertical centre falls in
+        row_lines: Dict[int, List] = {}
+        for text, confidence, (lx1, ly1, lx2, ly2) in lines:
+            center = (ly1 + ly2) / 2
+            for i, (top, bottom) in enumerate(spans):
+                if top <= center < bottom:
+                    row_lines.setdefault(i, []).append((lx1, text, confidence))
+                    break
+
+        for i, (row, _) in enumerate(pending):
+            parts = sorted(row_lines.get(i, []))
+            row.text = ' '.join(text for _, text, _ in parts)
+            row.tag = parse_alliance_text(row.text)
+            row.confidence = sum(conf for _, _, conf in parts) / len(parts) if parts else -1.0
+
+        doubtful = sum(row.doubtful for row, _ in pending)
+        app_logger.debug(
+            f"Batched OCR of {len(pending)} rows: {len(lines)} lines, {doubtful} doubtful rows"
+        )
+        return rows
+
+    except Exception as e:
+        app_logger.error(f"Error reading alliance rows: {e}")
+        return []
+
+def find_alliance_row(
+    device_id: str,
+    rows: List[AllianceRow],
+    region: Tuple[int, int, int, int],
+    img: np.ndarray
+) -> Optional[AllianceRow]:
+    """Confident batched read of the row whose alliance crop is in region
+
+    Rows move as applicants are accepted or rejected, so the row is found
+    by comparing crops rather than positions. Returns None when no confident
+    row matches, and the caller reads the crop on its own.
+    """
+    x1, y1, x2, y2 = region
+    cropped = img[y1:y2, x1:x2]
+    max_diff = CONFIG.get('ocr_settings', {}).get('batch', {}).get('max_crop_diff', 6.0)
+    for row in rows:
+        if row.doubtful or row.crop.shape != cropped.shape:
+            continue
+        if float(cv2.absdiff(row.crop, cropped).mean()) <= max_diff:
+            if debug_enabled('rejects'):
+                _last_ocr_images[device_id] = {
+                    'original': row.crop,
+                    'processed': preprocess_alliance(row.crop).copy(),
+                    'full': img,
+                    'region': region
+                }
+            return row
+    return None
+
+def log_rejected_alliance(alliance_text: str, original_text: str = "", device_id: Optional[str] = None):
+    """Log rejected alliance names to a file and store the OCR inputs"""
     from datetime import datetime
-    import shutil
     
     try:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Create reject directory with timestamp
-        reject_dir = f'tmp/rejects/{timestamp}'
-        os.makedirs(reject_dir, exist_ok=True)
+        # Reject directory with timestamp, created by the debug writer
+        reject_dir = tmp_path(device_id, f'rejects/{timestamp}')
         
         # Log text info with original parsed text
         with open('logs/rejected_alliances.log', 'a', encoding='utf-8') as f:
             f.write(f"{timestamp} - Final: {alliance_text}\n")
+            if device_id:
+                f.write(f"    Device: {device_id}\n")
             f.write(f"    Original OCR text: {original_text}\n")
             f.write(f"    Debug files: {reject_dir}/\n\n")
             
-        # Copy debug images if they exist
-        debug_files = {
-            'processed': 'tmp/debug_alliance_processed.png',
-            'original': 'tmp/debug_alliance_original.png',
-            'region': 'tmp/debug_alliance.png',
-            'full': 'tmp/debug_alliance_full.png',
-            'screen': 'tmp/screen.png'
-        }
-        
-        for img_type, src_path in debug_files.items():
-            if os.path.exists(src_path):
-                dst_path = f'{reject_dir}/{img_type}.png'
-                shutil.copy2(src_path, dst_path)
-                app_logger.debug(f"Saved {img_type} image to {dst_path}")
+        # Save the images the OCR ran on
+        images = _last_ocr_images.pop(device_id, None)
+        if images:
+            x1, y1, x2, y2 = images['region']
+            
+            def annotate(full_img: np.ndarray) -> None:
+                cv2.rectangle(full_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            
+            write_debug_image('rejects', f'{reject_dir}/original.png', images['original'])
+            write_debug_image('rejects', f'{reject_dir}/processed.png', images['processed'])
+            write_debug_image('rejects', f'{reject_dir}/full.png', images['full'], annotate)
+            app_logger.debug(f"Queued reject images for {reject_dir}")
                 
     except Exception as e:
         app_logger.error(f"Failed to log rejected alliance: {e}")
@@ -281,4 +478,4 @@ CONTROL_LIST = CONFIG.get('control_list', {
 })
 
 __all__ = ['CONTROL_LIST', 'ALLIANCE_CHARS', 'extract_text_from_region', 
-           'get_text_regions', 'log_rejected_alliance'] 
\ No newline at end of file
+           'get_text_regions', 'log_rejected_alliance', 'read_alliance_rows', 'find_alliance_row', 'AllianceRow'] 
\ No newline at end of file
@@ -1,16 +1,34 @@
 """Game control utilities for input and interaction"""
 
+import asyncio
 import time
 import random
-from src.core.image_processing import find_and_tap_template, find_template, wait_for_image
+from src.core.image_processing import find_and_tap_template, find_template, find_templates, wait_for_image
+from src.core.frame import get_current_frame
+from src.core.screen_classifier import classify_screen, screen_is
 from src.core.logging import app_logger
 from src.core.device import get_screen_size
-from src.core.adb import force_stop_package, launch_package, press_back, swipe_screen, tap_screen, long_press_screen
+from src.core.adb import force_stop_package, launch_package, press_back, swipe_screen, tap_screen, long_press_screen, queue_delay
+from src.core.async_adb import run_on_device
 from src.core.config import CONFIG
 
-def human_delay(delay: float):
-    """Add a human-like delay between actions"""
-    time.sleep(delay * CONFIG.get('sleep_multiplier', 1.0))
+def human_delay(delay: float, device_id: str = None):
+    """Add a human-like delay between actions
+
+    When device_id has queued inputs the delay is queued on the device
+    behind them, so it still separates those inputs from what follows.
+    """
+    seconds = delay * CONFIG.get('sleep_multiplier', 1.0)
+    if device_id and queue_delay(device_id, seconds):
+        return
+    time.sleep(seconds)
+
+async def human_delay_async(delay: float, device_id: str = None):
+    """Awaitable human_delay that yields to the event loop while waiting"""
+    seconds = delay * CONFIG.get('sleep_multiplier', 1.0)
+    if device_id and queue_delay(device_id, seconds):
+        return
+    await asyncio.sleep(seconds)
 
 def handle_swipes(device_id: str, direction: str = "up", num_swipes: int = 8) -> None:
     """Handle scrolling with swipes"""
@@ -43,7 +61,7 @@ def handle_swipes(device_id: str, direction: str = "up", num_swipes: int = 8) ->
         )
         
         swipe_screen(device_id, start_x, start_y, end_x, end_y, duration)
-        human_delay(CONFIG['timings']['scroll_delay'])
+        human_delay(CONFIG['timings']['scroll_delay'], device_id)
 
 def humanized_tap(device_id: str, x: int, y: int, critical: bool = False, delay: float = None) -> None:
     """Perform a humanized tap with randomization and delay
@@ -60,7 +78,7 @@ def humanized_tap(device_id: str, x: int, y: int, critical: bool = False, delay:
     rand_y = y + random.randint(-radius, radius)
 
     tap_screen(device_id, rand_x, rand_y)
-    human_delay(delay or CONFIG['timings']['tap_delay'])
+    human_delay(delay or CONFIG['timings']['tap_delay'], device_id)
 
 def humanized_long_press(device_id: str, x: int, y: int, duration: float = 1.0, critical: bool = False) -> bool:
     """Perform a humanized long press with randomization
@@ -84,13 +102,25 @@ def humanized_long_press(device_id: str, x: int, y: int, duration: float = 1.0,
         # Execute long press
         success = long_press_screen(device_id, rand_x, rand_y, ms_duration)
         if success:
-            human_delay(CONFIG['timings']['tap_delay'])
+            human_delay(CONFIG['timings']['tap_delay'], device_id)
             return True
         return False
         
     except Exception as e:
         app_logger.error(f"Error performing humanized long press: {e}")
         return False
+
+async def humanized_tap_async(device_id: str, x: int, y: int, critical: bool = False, delay: float = None) -> None:
+    """Awaitable humanized_tap, run on the device's I/O thread"""
+    await run_on_device(device_id, humanized_tap, device_id, x, y, critical, delay)
+
+async def humanized_long_press_async(device_id: str, x: int, y: int, duration: float = 1.0, critical: bool = False) -> bool:
+    """Awaitable humanized_long_press, the press itself is waited for off the event loop"""
+    return await run_on_device(device_id, humanized_long_press, device_id, x, y, duration, critical)
+
+async def handle_swipes_async(device_id: str, direction: str = "up", num_swipes: int = 8) -> None:
+    """Awaitable handle_swipes"""
+    await run_on_device(device_id, handle_swipes, device_id, direction, num_swipes)
  
 def launch_game(device_id: str):
     """Launch the game"""
@@ -100,34 +130,52 @@ def launch_game(device_id: str):
     
     start_time = time.time()
     while time.time() - start_time < CONFIG['timings']['launch_max_wait']:
-        # Check for start button first
-        start_loc = find_template(device_id, "start")
-        if start_loc:
-            app_logger.debug("Found start button, clicking it")
-            humanized_tap(device_id, start_loc[0], start_loc[1])
-            human_delay(CONFIG['timings']['menu_animation'])
-        
-        # Check for home icon
-        home_loc = find_template(device_id, "home")
-        if home_loc:
-            app_logger.debug("Found home icon")
-            time.sleep(CONFIG['timings']['launch_wait'])
-            navigate_home(device_id, True)
-            return True
+        # Check for the start button and the home icon in one capture
+        frame = get_current_frame(device_id, fresh=True)
+        if frame is not None:
+            # Ask the screen classifier first, probe templates when it is unsure
+            screen = classify_screen(device_id, frame)
+            if screen is not None and screen.label == "home":
+                home_loc, start_loc = True, None
+            elif screen is not None and screen.label == "loading":
+                home_loc, start_loc = None, None
+            else:
+                results = find_templates(frame, ["start", "home"])
+                home_loc, start_loc = results.best("home"), results.best("start")
+            
+            if home_loc:
+                app_logger.debug("Found home icon")
+                time.sleep(CONFIG['timings']['launch_wait'])
+                navigate_home(device_id, True)
+                return True
+            
+            if start_loc:
+                app_logger.debug("Found start button, clicking it")
+                humanized_tap(device_id, start_loc[0], start_loc[1])
+                human_delay(CONFIG['timings']['menu_animation'], device_id)
 
-        #small delay between checks    
-        human_delay(5)
+        #small delay between checks, queued behind any pending taps
+        human_delay(5, device_id)
     
     app_logger.error("Could not find home icon after launch")
     return False
 
+def _quit_popup_shown(device_id: str) -> bool:
+    """Check for the quit popup, asking the screen classifier first"""
+    shown = screen_is(device_id, "quit_popup")
+    if shown is None:
+        shown = find_template(device_id, "quit") is not None
+    return shown
+
 def navigate_home(device_id: str, force: bool = False) -> bool:
     """Navigate to home screen"""
     try:
         # Check if already at home
         if not force:
-            home_loc = find_template(device_id, "home")
-            if home_loc:
+            at_home = screen_is(device_id, "home")
+            if at_home is None:
+                at_home = find_template(device_id, "home") is not None
+            if at_home:
                 app_logger.debug("Already at home screen")
                 return True
             
@@ -136,23 +184,23 @@ def navigate_home(device_id: str, force: bool = False) -> bool:
         for attempt in range(max_attempts):
             # Not found, press back and wait
             press_back(device_id)
-            human_delay(CONFIG['timings']['menu_animation'])
+            human_delay(CONFIG['timings']['menu_animation'], device_id)
             
             # Take screenshot and look for home
-            quit_loc = find_template(device_id, "quit")
-            if quit_loc:
+            quit_shown = _quit_popup_shown(device_id)
+            if quit_shown:
                 app_logger.debug("Found quit button")
 
                 # Press back again to get to home
-                while quit_loc:
+                while quit_shown:
                     press_back(device_id)
-                    human_delay(CONFIG['timings']['menu_animation'])
-                    quit_loc = find_template(device_id, "quit")
+                    human_delay(CONFIG['timings']['menu_animation'], device_id)
+                    quit_shown = _quit_popup_shown(device_id)
                     
                 return True
                 
             # Not found, press back and wait
-            human_delay(CONFIG['timings']['menu_animation'])
+            human_delay(CONFIG['timings']['menu_animation'], device_id)
             
         app_logger.error("Failed to find home screen after maximum attempts")
         return False
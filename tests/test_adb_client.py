@@ -0,0 +1,77 @@
+"""Sync service framing of the native adb client's pull"""
+
+import struct
+
+import pytest
+
+from src.core.adb_client import AdbClient, AdbError, _sync_pull
+
+
+class FakeSocket:
+    """Socket that replays canned server bytes and records what was sent"""
+
+    def __init__(self, reply: bytes):
+        self.reply = reply
+        self.sent = b''
+
+    def recv(self, size: int) -> bytes:
+        # Hand out at most 3 bytes at a time to exercise partial reads
+        chunk, self.reply = self.reply[:min(size, 3)], self.reply[min(size, 3):]
+        return chunk
+
+    def sendall(self, data: bytes) -> None:
+        self.sent += data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def packet(chunk_id: bytes, payload: bytes = b'', length: int = None) -> bytes:
+    return chunk_id + struct.pack('<I', len(payload) if length is None else length) + payload
+
+def stat(mode: int = 0o100644, size: int = 0, mtime: int = 0) -> bytes:
+    return b'STAT' + struct.pack('<III', mode, size, mtime)
+
+
+def test_pull_joins_data_chunks_until_done():
+    sock = FakeSocket(stat(size=11) + packet(b'DATA', b'hello ') + packet(b'DATA', b'world') + packet(b'DONE', length=0))
+    assert _sync_pull(sock, "/sdcard/a.png") == b'hello world'
+
+    path = b"/sdcard/a.png"
+    assert sock.sent == packet(b'STAT', path) + packet(b'RECV', path) + packet(b'QUIT')
+
+def test_pull_of_empty_file():
+    sock = FakeSocket(stat() + packet(b'DONE', length=0))
+    assert _sync_pull(sock, "/sdcard/empty") == b''
+
+def test_pull_fail_raises_adb_error():
+    sock = FakeSocket(stat() + packet(b'DATA', b'partial') + packet(b'FAIL', b'permission denied'))
+    with pytest.raises(AdbError, match="permission denied"):
+        _sync_pull(sock, "/data/secret")
+
+def test_pull_missing_file_raises_before_recv():
+    sock = FakeSocket(stat(mode=0))
+    with pytest.raises(AdbError, match="not found"):
+        _sync_pull(sock, "/sdcard/missing")
+    assert b'RECV' not in sock.sent
+
+def test_pull_rejects_unknown_chunk():
+    sock = FakeSocket(stat() + packet(b'WHAT', b''))
+    with pytest.raises(AdbError, match="Unexpected sync response"):
+        _sync_pull(sock, "/sdcard/a.png")
+
+def test_client_pull_opens_sync_service(monkeypatch):
+    sock = FakeSocket(stat() + packet(b'DATA', b'png') + packet(b'DONE', length=0))
+    services = []
+
+    def open_service(serial, service, timeout=None):
+        services.append((serial, service))
+        return sock
+
+    client = AdbClient()
+    monkeypatch.setattr(client, "open_service", open_service)
+    assert client.pull("emulator-5554", "/sdcard/a.png") == b'png'
+    assert services == [("emulator-5554", "sync:")]
@@ -0,0 +1,54 @@
+"""Glyph recognizer must not accept tags that only resemble whitelisted ones"""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core import glyph_recognizer
+from src.core.glyph_recognizer import GlyphRecognizer
+from src.core.ocr_preprocess import preprocess_alliance
+
+WHITELIST = ["Brn", "sTAR", "Trol", "trol", "UbRg", "s8UP", "ssUP"]
+
+
+def render(text: str) -> np.ndarray:
+    """Binary alliance crop of a bracketed tag"""
+    img = np.full((96, 300, 3), 30, dtype=np.uint8)
+    cv2.putText(img, f"[{text}]", (10, 60), cv2.FONT_HERSHEY_PLAIN, 2.2, (240, 240, 240), 2)
+    return preprocess_alliance(img, 8.0).copy()
+
+
+@pytest.fixture
+def recognizer(tmp_path, monkeypatch):
+    recognizer = GlyphRecognizer(str(tmp_path / "glyphs"))
+    monkeypatch.setattr(glyph_recognizer, "GLYPH_RECOGNIZER", recognizer)
+    monkeypatch.setattr(glyph_recognizer, "_whitelist", lambda: WHITELIST)
+    for tag in WHITELIST:
+        recognizer.learn(render(tag), f"[{tag}]", tag)
+    return recognizer
+
+
+def test_whitelisted_tags_are_read(recognizer):
+    for tag in WHITELIST:
+        match = glyph_recognizer.recognize_alliance(render(tag))
+        assert match is not None and match.tag == tag
+
+
+@pytest.mark.parametrize("tag", ["Trel", "UbRq", "s9UP", "Brm", "BRn"])
+def test_near_miss_tags_fall_back(recognizer, tag):
+    # One glyph away from a whitelisted tag, with no references for that glyph
+    assert glyph_recognizer.recognize_alliance(render(tag)) is None
+
+
+def test_learned_non_member_glyphs_beat_whitelisted_ones(recognizer):
+    recognizer.learn(render("Trel"), "[Trel]", "Trel")
+    match = recognizer.recognize(render("Trel"))
+    assert match is not None and match.margin < 0
+    assert glyph_recognizer.recognize_alliance(render("Trel")) is None
+    assert glyph_recognizer.recognize_alliance(render("Trol")).tag == "Trol"
+
+
+def test_references_persist(recognizer):
+    reloaded = GlyphRecognizer(str(recognizer.glyphs_dir))
+    reloaded.load()
+    assert reloaded.recognize(render("Brn")).tag == "Brn"
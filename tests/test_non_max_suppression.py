@@ -0,0 +1,77 @@
+"""Vectorized non-maximum suppression must match the minMaxLoc loop it replaced"""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core.image_processing import _non_max_suppression
+
+
+def minmaxloc_loop(scores: np.ndarray, threshold: float, w: int, h: int):
+    """The original template matching loop: take the maximum, zero its box, repeat"""
+    result = scores.copy()
+    matches = []
+    while True:
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        if max_val < threshold:
+            break
+
+        center_x = max_loc[0] + w//2
+        center_y = max_loc[1] + h//2
+        matches.append((center_x, center_y, max_val))
+
+        x1_sup = max(0, max_loc[0] - w//2)
+        y1_sup = max(0, max_loc[1] - h//2)
+        x2_sup = min(result.shape[1], max_loc[0] + w//2)
+        y2_sup = min(result.shape[0], max_loc[1] + h//2)
+        result[y1_sup:y2_sup, x1_sup:x2_sup] = 0
+
+    return matches
+
+
+def smoothed_map(rng: np.random.Generator, shape=(200, 300), sigma=2.0) -> np.ndarray:
+    scores = cv2.GaussianBlur(rng.random(shape).astype(np.float32), (0, 0), sigma)
+    return (scores - scores.min()) / (scores.max() - scores.min())
+
+def screen_map(rng: np.random.Generator, size: int, noise: int) -> np.ndarray:
+    """matchTemplate scores of a noisy screen with a grid of icon copies"""
+    screen = cv2.GaussianBlur(rng.integers(0, 255, (600, 400, 3), dtype=np.uint8), (0, 0), 3)
+    icon = rng.integers(0, 255, (size, size, 3), dtype=np.uint8)
+    for y in range(20, 600 - size, size + 17):
+        for x in range(15, 400 - size, size + 11):
+            jitter = rng.integers(-noise, noise + 1, icon.shape)
+            screen[y:y + size, x:x + size] = np.clip(icon.astype(int) + jitter, 0, 255)
+    return cv2.matchTemplate(screen, icon, cv2.TM_CCOEFF_NORMED)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_loop_on_smoothed_maps(seed):
+    rng = np.random.default_rng(seed)
+    scores = smoothed_map(rng)
+    w, h = (int(v) for v in rng.integers(6, 31, 2))
+    assert _non_max_suppression(scores, 0.6, w, h) == minmaxloc_loop(scores, 0.6, w, h)
+
+@pytest.mark.parametrize("size,noise,threshold", [(24, 10, 0.8), (24, 60, 0.6), (40, 30, 0.9), (16, 80, 0.5)])
+def test_matches_loop_on_template_scores(size, noise, threshold):
+    rng = np.random.default_rng(size * noise)
+    scores = screen_map(rng, size, noise)
+    expected = minmaxloc_loop(scores, threshold, size, size)
+    assert expected
+    assert _non_max_suppression(scores, threshold, size, size) == expected
+
+def test_keeps_peak_flank_hits_outside_the_box():
+    # A ramp wider than the box: the flank beyond each zeroed box is a new hit
+    scores = np.zeros((40, 40), dtype=np.float32)
+    scores[20, 10:30] = np.linspace(0.7, 0.95, 20, dtype=np.float32)
+    hits = _non_max_suppression(scores, 0.6, 10, 10)
+    assert hits == minmaxloc_loop(scores, 0.6, 10, 10)
+    assert [x for x, _, _ in hits] == [34, 28, 22, 16]
+
+def test_ties_follow_row_major_order():
+    scores = np.zeros((30, 30), dtype=np.float32)
+    for y, x in [(20, 5), (5, 20), (5, 5)]:
+        scores[y, x] = 0.9
+    assert _non_max_suppression(scores, 0.8, 4, 4) == minmaxloc_loop(scores, 0.8, 4, 4)
+
+def test_nothing_above_threshold():
+    assert _non_max_suppression(np.full((10, 10), 0.5, dtype=np.float32), 0.6, 4, 4) == []